@@ -0,0 +1 @@
+"""Analysis pipeline behind data_analysis_project.py, usable without Streamlit."""
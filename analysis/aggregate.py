@@ -0,0 +1,197 @@
+"""Multi-aggregate engine for the report's groupbys.
+
+Every report table is a named spec of group keys plus named measures, in the
+same shape as pandas named aggregation::
+
+    specs = {
+        "products": (["Product_Name"], {"Quantity": ("Quantity", "sum"),
+                                        "Total_Spent": ("Total_Spent", "sum")}),
+        "region_categories": (["Region", "Product_Category"],
+                              {"Total_Spent": ("Total_Spent", "sum")}),
+    }
+    tables = aggregate(df, specs)
+
+Key columns are factorized once and shared by every spec that uses them.
+Specs are merged per distinct key set, and a key set that is contained in a
+larger one is rolled up from that key set's (much smaller) group table instead
+of scanning the rows again, so the number of full-data passes is bounded by
+the number of "maximal" key sets rather than the number of reports.
+
+sum, count, size and mean are computed with np.bincount and can be rolled
+up; any other function (e.g. median) falls back to a pandas groupby scan.
+Results match `df.groupby(keys, observed=True).agg(**measures).reset_index()`.
+"""
+import numpy as np
+import pandas as pd
+
+from analysis import profiling
+
+ADDITIVE = ("sum", "count", "size")
+
+
+def _factorize(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy().astype(np.int64), series.cat.categories
+    codes, uniques = pd.factorize(series, sort=True)
+    return codes.astype(np.int64), uniques
+
+
+def _primitives(measures):
+    """Split measures into additive primitives and functions needing a scan."""
+    prims, others = set(), set()
+    for column, func in measures.values():
+        if func == "mean":
+            prims |= {("sum", column), ("count", column)}
+        elif func == "size":
+            prims.add(("size", None))
+        elif func in ADDITIVE:
+            prims.add((func, column))
+        else:
+            others.add((func, column))
+    return prims, others
+
+
+def _group(codes, sizes, weights):
+    """Group rows by their key codes and reduce `weights` with bincount.
+
+    `codes` is one code array per key, `weights` maps a primitive to the
+    per-row values to add up (None for size). Returns per-group key codes and
+    per-group primitive values, groups in sorted key order.
+    """
+    ids = np.ravel_multi_index(codes, sizes) if len(codes) > 1 else codes[0]
+    n = int(np.prod(sizes))
+    if n <= 4 * len(ids) + 1024:
+        present = np.bincount(ids, minlength=n) > 0
+        observed = np.flatnonzero(present)
+        remap = np.full(n, -1, dtype=np.int64)
+        remap[observed] = np.arange(len(observed))
+        gid = remap[ids]
+    else:
+        observed, gid = np.unique(ids, return_inverse=True)
+    groups = len(observed)
+    values = {}
+    for prim, w in weights.items():
+        if w is None:
+            values[prim] = np.bincount(gid, minlength=groups)
+        else:
+            values[prim] = np.bincount(gid, weights=w, minlength=groups)
+    group_codes = np.unravel_index(observed, sizes) if len(sizes) > 1 else (observed,)
+    return list(group_codes), values
+
+
+def _row_weights(df, prims, valid):
+    weights = {}
+    for func, column in prims:
+        if func == "size":
+            weights[(func, column)] = None
+            continue
+        values = df[column].to_numpy()[valid]
+        notna = ~pd.isna(values)
+        if func == "count":
+            weights[(func, column)] = notna.astype(np.float64)
+        else:
+            weights[(func, column)] = np.where(notna, values, 0).astype(np.float64)
+    return weights
+
+
+def plan(keysets, cardinality):
+    """Pick, for each key set, the smallest superset to roll it up from.
+
+    Returns {keyset: parent or None}; None means a scan over the rows.
+    """
+    parents = {}
+    for keys in keysets:
+        supersets = [other for other in keysets if set(keys) < set(other)]
+        parents[keys] = min(supersets, key=cardinality, default=None)
+    return parents
+
+
+@profiling.instrument
+def aggregate(df, specs, stats=None):
+    """Compute every spec in `specs` over `df` and return {name: table}.
+
+    If `stats` is a dict it receives the number of row scans and rollups used.
+    """
+    keysets = []
+    for keys, _ in specs.values():
+        if tuple(keys) not in keysets:
+            keysets.append(tuple(keys))
+
+    factors = {}
+    with profiling.step("aggregate:factorize", len(df)):
+        for keys in keysets:
+            for key in keys:
+                if key not in factors:
+                    factors[key] = _factorize(df[key])
+
+    def cardinality(keys):
+        return int(np.prod([len(factors[k][1]) for k in keys]))
+
+    prims = {keys: set() for keys in keysets}
+    others = {keys: set() for keys in keysets}
+    for keys, measures in specs.values():
+        p, o = _primitives(measures)
+        prims[tuple(keys)] |= p
+        others[tuple(keys)] |= o
+
+    parents = plan(keysets, cardinality)
+    # a key set needing a pandas scan anyway is not worth rolling up
+    for keys in keysets:
+        if others[keys]:
+            parents[keys] = None
+    # push primitives up to the parents, smallest key sets first
+    for keys in sorted(keysets, key=len):
+        parent = parents[keys]
+        if parent is not None:
+            prims[parent] |= prims[keys]
+
+    counts = {"scans": 0, "rollups": 0}
+    states = {}
+    for keys in sorted(keysets, key=len, reverse=True):
+        sizes = [len(factors[k][1]) for k in keys]
+        parent = parents[keys]
+        kind = "scan" if parent is None else "rollup"
+        with profiling.step(f"aggregate:{kind}:{'+'.join(keys)}", len(df) if parent is None else None) as record:
+            if parent is None:
+                row_codes = [factors[k][0] for k in keys]
+                valid = np.logical_and.reduce([c >= 0 for c in row_codes])
+                if not valid.all():
+                    row_codes = [c[valid] for c in row_codes]
+                codes, values = _group(row_codes, sizes, _row_weights(df, prims[keys], valid))
+                for func, column in others[keys]:
+                    grouped = df.groupby(list(keys), observed=True, sort=True)[column]
+                    values[(func, column)] = grouped.agg(func).to_numpy()
+            else:
+                pcodes, pvalues = states[parent]
+                weights = {prim: pvalues[prim] for prim in prims[keys]}
+                codes, values = _group([pcodes[parent.index(k)] for k in keys], sizes, weights)
+            record["rows_out"] = len(codes[0])
+        counts[kind + "s"] += 1
+        states[keys] = (codes, values)
+
+    if stats is not None:
+        stats.update(counts)
+
+    tables = {}
+    for name, (keys, measures) in specs.items():
+        codes, values = states[tuple(keys)]
+        table = {}
+        for key, code in zip(keys, codes):
+            uniques = factors[key][1]
+            if isinstance(df[key].dtype, pd.CategoricalDtype):
+                table[key] = pd.Categorical.from_codes(code, dtype=df[key].dtype)
+            else:
+                table[key] = uniques.take(code)
+        for out, (column, func) in measures.items():
+            if func == "mean":
+                table[out] = values[("sum", column)] / values[("count", column)]
+            elif func == "size":
+                table[out] = values[("size", None)].astype(np.int64)
+            elif func == "count":
+                table[out] = values[(func, column)].astype(np.int64)
+            elif func == "sum" and pd.api.types.is_integer_dtype(df[column].dtype):
+                table[out] = values[(func, column)].astype(np.int64)
+            else:
+                table[out] = values[(func, column)]
+        tables[name] = pd.DataFrame(table)
+    return tables
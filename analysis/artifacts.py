@@ -0,0 +1,151 @@
+"""Writing the pipeline's output files.
+
+Each artifact is written once per run, in one of FORMATS, through a temporary
+file that is renamed into place, so readers never see a half-written file.
+A content hash of every artifact is kept in a small manifest next to the
+files, and an artifact whose content has not changed since the last write is
+skipped.
+"""
+import glob
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+
+from analysis import ingest, profiling
+
+FORMATS = {"csv": ".csv", "csv.gz": ".csv.gz", "parquet": ".parquet", "feather": ".feather"}
+DEFAULT_FORMAT = os.environ.get("ANALYSIS_ARTIFACT_FORMAT", "csv")
+MANIFEST = ".artifacts.json"
+
+
+def content_hash(df, fmt):
+    sha = hashlib.sha256()
+    sha.update(fmt.encode())
+    sha.update(repr([(str(column), str(dtype)) for column, dtype in df.dtypes.items()]).encode())
+    sha.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return sha.hexdigest()
+
+
+def _write(df, path, fmt):
+    if fmt == "csv":
+        df.to_csv(path)
+    elif fmt == "csv.gz":
+        df.to_csv(path, compression="gzip")
+    elif fmt == "parquet":
+        df.to_parquet(path, index=True)
+    elif fmt == "feather":
+        # feather only stores a default index, so keep the index as a column
+        df.reset_index().to_feather(path)
+
+
+def _load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+@profiling.instrument
+def write_artifacts(artifacts, directory=".", fmt=DEFAULT_FORMAT):
+    """Write each {name: frame} in `artifacts` to `directory` as `name` + extension.
+
+    Returns {name: path} for the files that were actually (re)written.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown artifact format {fmt!r}, expected one of {sorted(FORMATS)}")
+    os.makedirs(directory, exist_ok=True)
+    manifest = _load_manifest(directory)
+    written = {}
+    for name, df in artifacts.items():
+        filename = name + FORMATS[fmt]
+        path = os.path.join(directory, filename)
+        digest = content_hash(df, fmt)
+        if manifest.get(filename) == digest and os.path.exists(path):
+            continue
+        tmp = os.path.join(directory, f".{filename}.tmp")
+        _write(df, tmp, fmt)
+        os.replace(tmp, path)
+        manifest[filename] = digest
+        written[name] = path
+    _save_manifest(directory, manifest)
+    return written
+
+
+def tables_path(path):
+    """Where the report tables of the source at `path` are kept for the dashboard."""
+    return ingest.stem(path) + ".report"
+
+
+def _versions(directory):
+    return [os.path.basename(version) for version in glob.glob(os.path.join(directory, "v[0-9]*"))]
+
+
+def save_tables(tables, directory, fingerprint=None):
+    """Store the report tables: frames and series as Parquet, scalars in the manifest.
+
+    Each save writes a new version directory and switches the manifest to it
+    last, so a reader sees either the old tables or the new ones, never a mix.
+    The version before it is kept for readers still on it; older ones are
+    deleted.
+    """
+    os.makedirs(directory, exist_ok=True)
+    previous = _load_manifest(directory).get("current")
+    number = max([int(version[1:]) for version in _versions(directory)], default=0) + 1
+    current = f"v{number}"
+    os.makedirs(os.path.join(directory, current))
+    manifest = {"fingerprint": fingerprint, "current": current, "frames": [], "series": {}, "scalars": {}}
+    for name, table in tables.items():
+        if isinstance(table, pd.Series):
+            manifest["series"][name] = table.name
+            table = table.to_frame("values")
+        elif isinstance(table, pd.DataFrame):
+            manifest["frames"].append(name)
+        else:
+            manifest["scalars"][name] = None if table is None else table.item() if hasattr(table, "item") else table
+            continue
+        table.to_parquet(os.path.join(directory, current, f"{name}.parquet"), index=True)
+    _save_manifest(directory, manifest)
+    for version in _versions(directory):
+        if version not in (current, previous):
+            shutil.rmtree(os.path.join(directory, version), ignore_errors=True)
+    # tables stored before the versioned layout sat directly in `directory`
+    for stale in glob.glob(os.path.join(directory, "*.parquet")):
+        os.remove(stale)
+
+
+def load_tables(directory, fingerprint=None):
+    """The tables saved by save_tables(), or None if missing or saved for another source version."""
+    manifest = _load_manifest(directory)
+    if "current" not in manifest or (fingerprint is not None and manifest["fingerprint"] != fingerprint):
+        return None
+    tables = {}
+    for name in manifest["frames"] + list(manifest["series"]):
+        table = pd.read_parquet(os.path.join(directory, manifest["current"], f"{name}.parquet"))
+        if isinstance(table.index, pd.DatetimeIndex):
+            # Parquet keeps the dates but not the resampling frequency
+            table.index.freq = table.index.inferred_freq
+        tables[name] = table
+    for name, series_name in manifest["series"].items():
+        tables[name] = tables[name]["values"].rename(series_name)
+    tables.update(manifest["scalars"])
+    return tables
+
+
+def report_artifacts(df, ordered, tables):
+    """The files the report produces, keyed by their historical names."""
+    return {
+        "new": df,
+        "Top_selling": tables["Top_selling"],
+        "df_ordered_dates": ordered,
+    }
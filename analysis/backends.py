@@ -0,0 +1,245 @@
+"""Query backends for the report's aggregate tables.
+
+sections.report() only needs the AGGREGATES tables, plus the section 8
+outlier rows. A backend computes both straight from the source file:
+
+    "pandas"  loads the file and runs the aggregation engine in memory
+    "duckdb"  runs SQL over the CSV/Parquet file in-process, multi-threaded
+              and able to spill to disk
+    "polars"  builds lazy scans and collects every group-by in one parallel plan
+
+Each backend derives the enrich() columns, Spending_Segment's quartiles and
+the 99th-percentile outlier thresholds itself, with pandas' linear
+interpolation. Results come back typed and sorted as aggregate() returns them,
+so the tables are the same whichever backend made them. Float sums can
+differ in the last bits, because every backend adds them up in its own order.
+
+duckdb and polars are optional; install them to use those backends.
+"""
+import importlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from analysis import aggregate, ingest, profiling, sections
+
+DEFAULT_BACKEND = os.environ.get("ANALYSIS_BACKEND", "pandas")
+
+_CATEGORICAL = [column for column, dtype in ingest.SCHEMA.items() if dtype == "category"]
+_INTEGER = [column for column, dtype in ingest.SCHEMA.items() if dtype.startswith("int")]
+_SEASONS = {}
+for _month, _season in sections.month_to_season.items():
+    _SEASONS.setdefault(_season, []).append(_month)
+
+
+def _require(module):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise ImportError(f"the {module!r} backend needs the {module} package: pip install {module}") from None
+
+
+def _is_parquet(path):
+    return os.path.isdir(path) or os.path.splitext(path)[1].lower() == ".parquet"
+
+
+def _finalize(frame, keys, measures):
+    """Type and order one backend's result like aggregate() does."""
+    frame = frame.sort_values(list(keys)).reset_index(drop=True)
+    table = {}
+    for key in keys:
+        if key in _CATEGORICAL:
+            table[key] = pd.Categorical(frame[key], categories=sorted(frame[key].unique()))
+        elif key == "Transaction_Date":
+            table[key] = frame[key].astype("datetime64[ns]").to_numpy()
+        elif key in ingest.SCHEMA:
+            table[key] = frame[key].astype(ingest.SCHEMA[key]).to_numpy()
+        elif key in ("Year", "Month"):
+            table[key] = frame[key].astype(np.int32).to_numpy()
+        else:
+            table[key] = frame[key].astype(object).to_numpy()
+    for out, (column, func) in measures.items():
+        integer = func in ("count", "size") or (func == "sum" and column in _INTEGER)
+        table[out] = frame[out].astype(np.int64 if integer else np.float64).to_numpy()
+    return pd.DataFrame(table)
+
+
+def _outliers(frame, column):
+    frame = frame.sort_values("__row")
+    frame.index = pd.Index(frame.pop("__row").to_numpy(np.int64))
+    return frame[["Customer_ID", column]].astype({"Customer_ID": ingest.SCHEMA["Customer_ID"],
+                                                  column: ingest.SCHEMA[column]})
+
+
+def _pandas(path, specs):
+    df = ingest.load_data(path)
+    sections.drop_undated(df)
+    sections.enrich(df)
+    quantity, unit_price = sections.outliers(df, sections.outlier_thresholds(df))
+    return aggregate.aggregate(df, specs), {"quantity_outliers": quantity, "unit_price_outliers": unit_price}
+
+
+_SQL_FUNCS = {"sum": "sum({})", "count": "count({})", "size": "count(*)", "mean": "avg({})", "median": "median({})"}
+_SQL_TYPES = {"int32": "INTEGER", "int16": "SMALLINT", "int8": "TINYINT", "float64": "DOUBLE", "category": "VARCHAR"}
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(text):
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _duckdb(path, specs):
+    duckdb = _require("duckdb")
+    con = duckdb.connect()
+    try:
+        # `numbered` adds the row number the outlier tables are indexed by; the aggregates skip it
+        if os.path.isdir(path):
+            source = f"read_parquet({_literal(os.path.join(path, '**', '*.parquet'))}, hive_partitioning = false"
+            con.execute(f"CREATE VIEW loaded AS SELECT * FROM {source})")
+            con.execute("CREATE VIEW loaded_numbered AS SELECT row_number() OVER (ORDER BY filename, file_row_number) "
+                        f"- 1 AS __row, * FROM {source}, filename = true, file_row_number = true)")
+        elif _is_parquet(path):
+            con.execute(f"CREATE VIEW loaded AS SELECT * FROM read_parquet({_literal(path)})")
+            con.execute("CREATE VIEW loaded_numbered AS SELECT file_row_number AS __row, * "
+                        f"FROM read_parquet({_literal(path)}, file_row_number = true)")
+        else:
+            types = {column: _SQL_TYPES[dtype] for column, dtype in ingest.SCHEMA.items()}
+            types.update({column: "VARCHAR" for column in ingest.DATE_COLUMNS})
+            types = ", ".join(f"{_literal(column)}: {_literal(sql)}" for column, sql in types.items())
+            # unparseable dates become NULL, as pandas reads them as NaT
+            dates = ", ".join(f"TRY_CAST({_quote(column)} AS DATE) AS {_quote(column)}"
+                              for column in ingest.DATE_COLUMNS)
+            # a CSV scan has no stable row number, so load it once and use the insertion order
+            con.execute(f"CREATE TEMP TABLE loaded AS SELECT * REPLACE ({dates}) FROM read_csv({_literal(path)}, "
+                        f"header = true, types = {{{types}}})")
+            con.execute("CREATE VIEW loaded_numbered AS SELECT rowid AS __row, * FROM loaded")
+        # leave out the undated rows, as sections.drop_undated does; __row keeps the original numbering
+        con.execute("CREATE VIEW transactions AS SELECT * FROM loaded WHERE Transaction_Date IS NOT NULL")
+        con.execute("CREATE VIEW numbered AS SELECT * FROM loaded_numbered WHERE Transaction_Date IS NOT NULL")
+
+        low, high, quantity, unit_price = con.execute(
+            "SELECT quantile_cont(Unit_Price * Quantity, 0.25), quantile_cont(Unit_Price * Quantity, 0.75), "
+            f"quantile_cont(Quantity, {sections.OUTLIER_QUANTILE}), "
+            f"quantile_cont(Unit_Price, {sections.OUTLIER_QUANTILE}) FROM transactions").fetchone()
+        seasons = " ".join(f"WHEN month(Transaction_Date) IN ({', '.join(map(str, months))}) THEN '{season}'"
+                           for season, months in _SEASONS.items())
+        con.execute(f"""
+            CREATE VIEW enriched AS SELECT *,
+                Unit_Price * Quantity AS Total_Spent,
+                CASE WHEN Unit_Price * Quantity > CAST('{high!r}' AS DOUBLE) THEN 'High'
+                     WHEN Unit_Price * Quantity <= CAST('{low!r}' AS DOUBLE) THEN 'Low'
+                     ELSE 'Medium' END AS Spending_Segment,
+                CASE WHEN Age < 18 THEN ' Below 18' WHEN Age > 18 AND Age <= 35 THEN 'Young Adult'
+                     WHEN Age > 50 THEN 'Senior' ELSE 'Adult' END AS Age_Segment,
+                Unit_Price - Unit_Cost AS profit,
+                year(Transaction_Date) AS Year, month(Transaction_Date) AS Month, day(Transaction_Date) AS Day,
+                CASE {seasons} END AS Season
+            FROM transactions""")
+        con.execute("CREATE VIEW enriched_segments AS SELECT *, Gender || ' ' || Age_Segment AS Demographics_Segment "
+                    "FROM enriched")
+
+        tables = {}
+        for name, (keys, measures) in specs.items():
+            columns = ", ".join(_quote(key) for key in keys)
+            select = ", ".join(f"{_SQL_FUNCS[func].format(_quote(column))} AS {_quote(out)}"
+                               for out, (column, func) in measures.items())
+            frame = con.execute(f"SELECT {columns}, {select} FROM enriched_segments GROUP BY {columns}").df()
+            tables[name] = _finalize(frame, keys, measures)
+        issues = {
+            "quantity_outliers": _outliers(con.execute(
+                "SELECT __row, Customer_ID, Quantity FROM numbered WHERE Quantity < 0 OR Quantity > ?",
+                [quantity]).df(), "Quantity"),
+            "unit_price_outliers": _outliers(con.execute(
+                "SELECT __row, Customer_ID, Unit_Price FROM numbered WHERE Unit_Price > ?",
+                [unit_price]).df(), "Unit_Price"),
+        }
+        return tables, issues
+    finally:
+        con.close()
+
+
+def _polars(path, specs):
+    pl = _require("polars")
+    if _is_parquet(path):
+        source = os.path.join(path, "**", "*.parquet") if os.path.isdir(path) else path
+        scan = pl.scan_parquet(source, row_index_name="__row", hive_partitioning=False)
+    else:
+        schema = {column: pl.String if dtype == "category" else getattr(pl, dtype.capitalize())
+                  for column, dtype in ingest.SCHEMA.items()}
+        schema.update({column: pl.String for column in ingest.DATE_COLUMNS})
+        # unparseable dates become null, as pandas reads them as NaT
+        scan = (pl.scan_csv(path, schema_overrides=schema, row_index_name="__row")
+                .with_columns(pl.col(column).str.to_date(strict=False) for column in ingest.DATE_COLUMNS))
+    # leave out the undated rows, as sections.drop_undated does; __row keeps the original numbering
+    scan = scan.filter(pl.col("Transaction_Date").is_not_null())
+    scan = scan.with_columns(pl.col(column).cast(pl.String) for column in _CATEGORICAL)
+
+    spent = pl.col("Unit_Price") * pl.col("Quantity")
+    bounds = scan.select(
+        spent.quantile(0.25, "linear").alias("low"), spent.quantile(0.75, "linear").alias("high"),
+        pl.col("Quantity").quantile(sections.OUTLIER_QUANTILE, "linear").alias("Quantity"),
+        pl.col("Unit_Price").quantile(sections.OUTLIER_QUANTILE, "linear").alias("Unit_Price"),
+    ).collect().row(0, named=True)
+
+    age = pl.col("Age")
+    age_segment = (pl.when(age < 18).then(pl.lit(" Below 18"))
+                   .when((age > 18) & (age <= 35)).then(pl.lit("Young Adult"))
+                   .when(age > 50).then(pl.lit("Senior")).otherwise(pl.lit("Adult")))
+    month = pl.col("Transaction_Date").dt.month()
+    season = pl.when(month.is_in(_SEASONS["Winter"])).then(pl.lit("Winter"))
+    for name in ("Spring", "Summer", "Fall"):
+        season = season.when(month.is_in(_SEASONS[name])).then(pl.lit(name))
+    enriched = scan.with_columns(
+        spent.alias("Total_Spent"),
+        pl.when(spent > bounds["high"]).then(pl.lit("High"))
+        .when(spent <= bounds["low"]).then(pl.lit("Low")).otherwise(pl.lit("Medium")).alias("Spending_Segment"),
+        age_segment.alias("Age_Segment"),
+        (pl.col("Gender") + pl.lit(" ") + age_segment).alias("Demographics_Segment"),
+        (pl.col("Unit_Price") - pl.col("Unit_Cost")).alias("profit"),
+        pl.col("Transaction_Date").dt.year().alias("Year"),
+        month.alias("Month"),
+        pl.col("Transaction_Date").dt.day().alias("Day"),
+        season.alias("Season"),
+    )
+
+    funcs = {"sum": lambda c: pl.col(c).sum(), "count": lambda c: pl.col(c).count(), "size": lambda c: pl.len(),
+             "mean": lambda c: pl.col(c).mean(), "median": lambda c: pl.col(c).median()}
+    queries = [enriched.group_by(keys).agg(funcs[func](column).alias(out) for out, (column, func) in measures.items())
+               for keys, measures in specs.values()]
+    queries.append(scan.filter((pl.col("Quantity") < 0) | (pl.col("Quantity") > bounds["Quantity"]))
+                   .select("__row", "Customer_ID", "Quantity"))
+    queries.append(scan.filter(pl.col("Unit_Price") > bounds["Unit_Price"]).select("__row", "Customer_ID", "Unit_Price"))
+    # one plan for everything, so the scan and the enrichment are shared
+    *results, quantity, unit_price = pl.collect_all(queries)
+    tables = {name: _finalize(result.to_pandas(), keys, measures)
+              for (name, (keys, measures)), result in zip(specs.items(), results)}
+    issues = {"quantity_outliers": _outliers(quantity.to_pandas(), "Quantity"),
+              "unit_price_outliers": _outliers(unit_price.to_pandas(), "Unit_Price")}
+    return tables, issues
+
+
+BACKENDS = {"pandas": _pandas, "duckdb": _duckdb, "polars": _polars}
+
+
+@profiling.instrument
+def aggregates(path=ingest.DATA_PATH, specs=None, backend=DEFAULT_BACKEND):
+    """Compute `specs` (default sections.AGGREGATES) over `path` with `backend`.
+
+    Returns (tables, issues) like streaming.stream_aggregates().
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}, expected one of {sorted(BACKENDS)}")
+    specs = sections.AGGREGATES if specs is None else specs
+    return BACKENDS[backend](path, specs)
+
+
+def run(path=ingest.DATA_PATH, backend=DEFAULT_BACKEND):
+    """Sections 1-8 over `path` on `backend`; the row-level tables are skipped, as in streaming mode."""
+    agg, issues = aggregates(path, backend=backend)
+    tables = sections.report(agg)
+    tables.update(issues)
+    return tables
@@ -0,0 +1,221 @@
+"""Market-basket co-occurrence counts and association rules.
+
+A basket is the set of distinct products one customer has bought. The
+baskets are kept as the sparse customers x products incidence matrix B in
+CSR form (sorted customer ids, `offsets`, product `codes`), the same layout
+as the feature store's baskets minus repeat purchases. Alongside it the
+engine keeps N (non-empty baskets), B^T 1 (baskets per product) and B^T B
+(baskets per product pair).
+
+B^T B is computed straight from the CSR arrays: each basket is expanded into
+its product pairs and the pair ids are counted with one bincount, so the
+cost grows with the number of pairs, not with customers x products.
+
+For a rule A -> B:
+
+    support    = pairs[A, B] / N
+    confidence = pairs[A, B] / items[A]
+    lift       = confidence / (items[B] / N)
+
+cross_sell_table() picks, for every product, the consequent with the highest
+lift among the rules that clear the support and confidence floors and are
+strong enough to act on: a lift of at least MIN_LIFT over at least MIN_COUNT
+baskets. Random baskets give lifts scattered just around 1, so on such data
+no rule qualifies. Section 7 overrides the curated suggestion only for the
+products with a qualifying rule (recommend.cross_sell_with()). Up-sells
+name premium variants rather than other products, so they stay a fixed
+table.
+
+update() folds in new transactions: the baskets they touch are replaced, and
+only those baskets' old pairs are subtracted and new pairs added. Products
+not seen before extend the product list. Streaming mode builds its baskets
+chunk by chunk this way, and incremental mode keeps them in its state and
+folds each refresh's rows in.
+"""
+import numpy as np
+import pandas as pd
+
+MIN_SUPPORT = 0.01
+MIN_CONFIDENCE = 0.1
+MIN_LIFT = 1.5
+MIN_COUNT = 30
+RULE_COLUMNS = ["antecedent", "consequent", "count", "support", "confidence", "lift"]
+
+
+def _csr(owners, codes, rows, size):
+    """CSR baskets from (owner row, product code) pairs, deduplicated and sorted within a basket."""
+    keys = np.sort(np.asarray(owners, dtype=np.int64) * size + codes)
+    keys = keys[np.append(True, keys[1:] != keys[:-1])]  # a sort beats np.unique's hashing here
+    owners, codes = keys // size, keys % size
+    offsets = np.zeros(rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(owners, minlength=rows), out=offsets[1:])
+    return offsets, codes.astype(np.int32)
+
+
+def _owners(offsets):
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def _counts(offsets, codes, size):
+    """(baskets, items, pairs) of CSR baskets; pairs[a, b] counts the baskets holding both."""
+    sizes = np.diff(offsets)
+    items = np.bincount(codes, minlength=size)
+    # every product pairs with each product of its basket, itself included (the diagonal)
+    repeats = np.repeat(sizes, sizes)
+    left = np.repeat(codes, repeats)
+    starts = np.repeat(np.repeat(offsets[:-1], sizes), repeats)
+    within = np.arange(len(left)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    right = codes[starts + within]
+    pairs = np.bincount(left.astype(np.int64) * size + right, minlength=size * size).reshape(size, size)
+    return int((sizes > 0).sum()), items, pairs
+
+
+def _gather(offsets, codes, positions):
+    """The CSR baskets at `positions`."""
+    sizes = offsets[positions + 1] - offsets[positions]
+    sub_offsets = np.zeros(len(positions) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=sub_offsets[1:])
+    index = np.repeat(offsets[positions] - sub_offsets[:-1], sizes) + np.arange(sub_offsets[-1])
+    return sub_offsets, codes[index]
+
+
+class CoOccurrence:
+    """The baskets and their product and product-pair counts; see the module docstring."""
+
+    def __init__(self, products, customers, offsets, codes):
+        self.products = list(products)
+        self.customers = np.asarray(customers)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.baskets, self.items, self.pairs = _counts(self.offsets, self.codes, len(self.products))
+
+    @classmethod
+    def from_frame(cls, df):
+        """The baskets of the Customer_ID/Product_Name rows of `df`."""
+        names = df["Product_Name"]
+        if isinstance(names.dtype, pd.CategoricalDtype):
+            codes, products = names.cat.codes.to_numpy(), list(names.cat.categories)
+        else:
+            codes, products = pd.factorize(names, sort=True)
+            products = list(products)
+        owners, customers = pd.factorize(df["Customer_ID"].to_numpy(), sort=True)
+        keep = codes >= 0
+        offsets, codes = _csr(owners[keep], codes[keep], len(customers), len(products))
+        return cls(products, customers, offsets, codes)
+
+    @classmethod
+    def empty(cls):
+        """No baskets yet; update() adds them."""
+        return cls([], np.empty(0, dtype=np.int64), [0], [])
+
+    @classmethod
+    def from_store(cls, store):
+        """The baskets of a features.FeatureStore."""
+        offsets = np.asarray(store.arrays["basket_offsets"])
+        offsets, codes = _csr(_owners(offsets), np.asarray(store.arrays["basket_codes"]), len(offsets) - 1,
+                              len(store.vocab["products"]))
+        return cls(store.vocab["products"], np.asarray(store.arrays["customer_id"]), offsets, codes)
+
+    def __len__(self):
+        return self.baskets
+
+    def _extend(self, names):
+        """Add the products in `names` missing from the product list, keeping it sorted."""
+        products = sorted(set(self.products).union(names))
+        if len(products) == len(self.products):
+            return
+        remap = pd.Index(products).get_indexer(self.products)
+        items = np.zeros(len(products), dtype=self.items.dtype)
+        items[remap] = self.items
+        pairs = np.zeros((len(products), len(products)), dtype=self.pairs.dtype)
+        pairs[np.ix_(remap, remap)] = self.pairs
+        # the remap is increasing, so codes stay sorted within each basket
+        self.products, self.items, self.pairs = products, items, pairs
+        self.codes = remap[self.codes].astype(np.int32)
+
+    def update(self, delta):
+        """Fold the Customer_ID/Product_Name rows of `delta` into the baskets and counts."""
+        names = delta["Product_Name"]
+        self._extend(pd.unique(names.dropna()))
+        codes = pd.Categorical(names, categories=self.products).codes
+        keep = codes >= 0
+        delta, codes = delta[keep], codes[keep]
+        owners, touched = pd.factorize(delta["Customer_ID"].to_numpy(), sort=True)
+        size = len(self.products)
+
+        # the touched customers' old baskets (empty for new customers), then old + new
+        positions = np.searchsorted(self.customers, touched).clip(max=max(len(self.customers) - 1, 0))
+        known = self.customers[positions] == touched if len(self.customers) else np.zeros(len(touched), bool)
+        positions = positions[known]
+        old_offsets, old_codes = _gather(self.offsets, self.codes, positions)
+        old_owners = np.flatnonzero(known)[_owners(old_offsets)]
+        new_offsets, new_codes = _csr(np.concatenate([old_owners, owners]), np.concatenate([old_codes, codes]),
+                                      len(touched), size)
+
+        baskets, items, pairs = _counts(old_offsets, old_codes, size)
+        self.baskets -= baskets
+        self.items -= items
+        self.pairs -= pairs
+        baskets, items, pairs = _counts(new_offsets, new_codes, size)
+        self.baskets += baskets
+        self.items += items
+        self.pairs += pairs
+
+        # splice the new baskets into the CSR arrays, keeping customer order
+        customers = self.customers
+        if not known.all():
+            added = touched[~known]
+            customers = np.insert(customers, np.searchsorted(customers, added), added)
+        old_rows, new_rows = np.searchsorted(customers, self.customers), np.searchsorted(customers, touched)
+        sizes = np.zeros(len(customers), dtype=np.int64)
+        sizes[old_rows] = np.diff(self.offsets)
+        sizes[new_rows] = np.diff(new_offsets)
+        offsets = np.zeros(len(customers) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        codes = np.empty(offsets[-1], dtype=np.int32)
+        kept = np.ones(len(self.customers), dtype=bool)
+        kept[positions] = False
+        kept_owners = _owners(self.offsets)
+        kept_codes = kept[kept_owners]
+        kept_owners = kept_owners[kept_codes]
+        codes[offsets[old_rows[kept_owners]] + np.flatnonzero(kept_codes) - self.offsets[kept_owners]] = \
+            self.codes[kept_codes]
+        new_owners = _owners(new_offsets)
+        codes[offsets[new_rows[new_owners]] + np.arange(len(new_codes)) - new_offsets[new_owners]] = new_codes
+        self.customers, self.offsets, self.codes = customers, offsets, codes
+        return self
+
+    def rules(self, min_support=MIN_SUPPORT, min_confidence=MIN_CONFIDENCE):
+        """Every rule A -> B (A != B) clearing both floors, by descending lift."""
+        if not self.baskets:
+            return pd.DataFrame(columns=RULE_COLUMNS)
+        a, b = np.nonzero(~np.eye(len(self.products), dtype=bool) & (self.pairs > 0))
+        count = self.pairs[a, b]
+        confidence = count / self.items[a]
+        products = np.asarray(self.products, dtype=object)
+        rules = pd.DataFrame({
+            "antecedent": products[a],
+            "consequent": products[b],
+            "count": count,
+            "support": count / self.baskets,
+            "confidence": confidence,
+            "lift": confidence / (self.items[b] / self.baskets),
+        })
+        rules = rules[(rules["support"] >= min_support) & (rules["confidence"] >= min_confidence)]
+        return rules.sort_values(["lift", "count"], ascending=False, kind="stable").reset_index(drop=True)
+
+    def cross_sell_table(self, min_support=MIN_SUPPORT, min_confidence=MIN_CONFIDENCE, min_lift=MIN_LIFT,
+                         min_count=MIN_COUNT):
+        """{product: the consequent with the highest lift}, for products with a rule clearing every floor."""
+        rules = self.rules(min_support, min_confidence)
+        best = rules[(rules["lift"] >= min_lift) & (rules["count"] >= min_count)].drop_duplicates("antecedent")
+        return dict(zip(best["antecedent"], best["consequent"]))
+
+    def save(self, path):
+        np.savez(path, products=np.asarray(self.products, dtype=str), customers=self.customers,
+                 offsets=self.offsets, codes=self.codes)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["products"].tolist(), data["customers"], data["offsets"], data["codes"])
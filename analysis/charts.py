@@ -0,0 +1,185 @@
+"""Dashboard charts: cached PNG renders, or Vega-Lite specs drawn by the browser.
+
+Every chart is a function of one small aggregate table. png() renders it
+server-side with matplotlib and keeps the PNG bytes in a bounded LRU cache
+keyed on a content hash of that table, so a rerun over unchanged data costs a
+hash and a dict lookup instead of a rasterization. Figures are built with
+the object-oriented API, never registered with pyplot, and cleared as soon
+as they are encoded, so nothing accumulates between page views.
+
+vega_lite() returns a Vega-Lite spec carrying only the aggregated rows, for
+st.vega_lite_chart; the browser renders it and the server does no drawing.
+"""
+import collections
+import io
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from analysis import artifacts
+
+CACHE_SIZE = int(os.environ.get("ANALYSIS_FIGURE_CACHE", "32"))
+RENDERER = os.environ.get("ANALYSIS_CHARTS", "matplotlib")
+DPI = 200
+PAYMENT_COLORS = ['gold', 'lightblue', 'lightgreen', 'pink']
+
+
+# bar chart kind -> (x column, color, title, x label); top_selling keeps Product_Name in its index
+BARS = {
+    "product_sales": ("Product_Name", "skyblue", "Products Sales Performance", "Product"),
+    "category_sales": ("Product_Category", "pink", "Categories Sales Performance ", "Product Category"),
+}
+
+
+def _bar_table(kind, table):
+    x = BARS[kind][0]
+    return table.reset_index() if x not in table.columns else table
+
+
+def _bar(kind):
+    def draw(fig, table):
+        x, color, title, xlabel = BARS[kind]
+        table = _bar_table(kind, table)
+        ax = fig.subplots()
+        ax.bar(table[x], table["Total_Spent"], color=color)
+        ax.set_title(title)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel("Total Revenue")
+        ax.tick_params(axis="x", labelrotation=45)
+    return draw
+
+
+def _payment_share(fig, table):
+    ax = fig.subplots()
+    ax.pie(table["Total_Spent"], labels=table["Payment_Method"], colors=PAYMENT_COLORS, autopct='%1.1f%%',
+           startangle=90)
+    ax.axis('equal')
+
+
+def _sales_over_time(fig, table, label):
+    ax = fig.subplots()
+    for product, series in table.groupby("Product_Name", sort=False):
+        ax.plot(series["Date"], series["Total_Spent"], marker="o", markersize=3, label=product)
+    ax.set_title(f"Sales Trends Over Time ({label})")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Total Revenue")
+    ax.legend(title="Product")
+    ax.tick_params(axis="x", labelrotation=45)
+
+
+# kind -> (matplotlib drawing function, figure size)
+FIGURES = {
+    "product_sales": (_bar("product_sales"), (8, 6)),
+    "category_sales": (_bar("category_sales"), (8, 6)),
+    "payment_share": (_payment_share, None),
+    "sales_over_time": (_sales_over_time, (8, 6)),
+}
+
+
+def series_frame(series):
+    """timeseries.plot_series() output as a long (Product_Name, Date, Total_Spent) frame."""
+    parts = [pd.DataFrame({"Product_Name": product, "Date": dates, "Total_Spent": np.asarray(values)})
+             for product, (dates, values) in series.items()]
+    if not parts:
+        return pd.DataFrame(columns=["Product_Name", "Date", "Total_Spent"])
+    return pd.concat(parts, ignore_index=True)
+
+
+class FigureCache:
+    """A thread-safe LRU of rendered PNGs keyed on (chart kind, options, table content)."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def png(self, kind, table, **options):
+        key = artifacts.content_hash(table, f"{kind}:{sorted(options.items())!r}")
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        image = render(kind, table, **options)
+        with self._lock:
+            self._entries[key] = image
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def render(kind, table, **options):
+    """Rasterize one chart to PNG bytes, disposing of the figure afterwards."""
+    # matplotlib costs a third of the dashboard's imports, so only a page that
+    # draws a PNG pays for it
+    from matplotlib.figure import Figure
+
+    draw, size = FIGURES[kind]
+    fig = Figure(figsize=size)
+    try:
+        draw(fig, table, **options)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=DPI, bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+cache = FigureCache()
+
+
+def png(kind, table, **options):
+    """The chart as PNG bytes, from the shared cache when the table is unchanged."""
+    return cache.png(kind, table, **options)
+
+
+def _records(table):
+    table = table.copy()
+    for column in table.columns:
+        if pd.api.types.is_datetime64_any_dtype(table[column]):
+            table[column] = table[column].dt.strftime("%Y-%m-%d")
+        elif isinstance(table[column].dtype, pd.CategoricalDtype):
+            table[column] = table[column].astype(str)
+    return table.to_dict(orient="records")
+
+
+def vega_lite(kind, table, **options):
+    """A Vega-Lite spec for the chart, embedding only the aggregated rows."""
+    revenue = {"field": "Total_Spent", "type": "quantitative", "title": "Total Revenue"}
+    if kind in BARS:
+        x, color, title, xlabel = BARS[kind]
+        return {
+            "title": title.strip(),
+            "data": {"values": _records(_bar_table(kind, table)[[x, "Total_Spent"]])},
+            "mark": {"type": "bar", "color": color},
+            "encoding": {"x": {"field": x, "type": "nominal", "title": xlabel, "sort": None}, "y": revenue},
+        }
+    if kind == "payment_share":
+        return {
+            "data": {"values": _records(table[["Payment_Method", "Total_Spent"]])},
+            "mark": {"type": "arc"},
+            "encoding": {"theta": {"field": "Total_Spent", "type": "quantitative"},
+                         "color": {"field": "Payment_Method", "type": "nominal",
+                                   "scale": {"range": PAYMENT_COLORS}},
+                         "tooltip": [{"field": "Payment_Method"}, revenue]},
+        }
+    if kind == "sales_over_time":
+        return {
+            "title": f"Sales Trends Over Time ({options['label']})",
+            "data": {"values": _records(table)},
+            "mark": {"type": "line", "point": {"size": 9}},
+            "encoding": {"x": {"field": "Date", "type": "temporal"}, "y": revenue,
+                         "color": {"field": "Product_Name", "type": "nominal", "title": "Product"}},
+        }
+    raise ValueError(f"unknown chart {kind!r}, expected one of {sorted(FIGURES)}")
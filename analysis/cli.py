@@ -0,0 +1,148 @@
+"""Command-line entry point for the batch run, independent of Streamlit.
+
+    python -m analysis run [--path data/e_commerce_data.csv] [--out .] [--format csv] [--quiet]
+                           [--executor serial|thread|process] [--workers N]
+    python -m analysis run --incremental [--state ./state] [--path data/e_commerce_data.csv]
+                           [--segment-tolerance 0.01]
+    python -m analysis serve [--path data/e_commerce_data.csv] [--host 127.0.0.1] [--port 8765]
+
+`run` computes sections 1-8 and writes everything the dashboard reads: the
+report tables (artifacts.tables_path), the artifact files, the quarantine
+file, the partitioned dataset, the filter cube and the customer feature
+store. The dashboard then only loads them. The sections run on the
+scheduler's graph (analysis.scheduler), serially unless --executor picks a
+thread or process pool. `run --incremental` is the daily
+refresh of an append-only source: it folds only the rows added since the
+last refresh into the stored state (analysis.incremental), replaces the
+report tables and the filter cube, and leaves the other row-level stores
+from the last full run. `serve` keeps the tables in one process and hands
+them to any number of viewers (analysis.server).
+
+The pipeline modules pull in pandas, numpy and pyarrow, so they are imported
+inside the commands; `--help` and argument errors return without them.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+# --executor -> scheduler.run() executor
+EXECUTORS = {"serial": None, "thread": "thread", "process": "process"}
+
+
+def compute(path, quiet=False, snapshot=True, executor=None, workers=None):
+    """Load `path` and run sections 1-8; returns (df, ordered, tables) and writes nothing else.
+
+    The sections run on the scheduler's graph: serially by default, or on a
+    "thread" or "process" pool of `workers`. With snapshot=False not even
+    the ingest snapshot of a CSV is written.
+    """
+    from analysis import ingest, scheduler
+
+    with scheduler.quiet() if quiet else contextlib.nullcontext():
+        df = ingest.load_data(path, snapshot=snapshot)
+        ordered, tables, _ = scheduler.run_all(df, executor=executor, workers=workers)
+    return df, ordered, tables
+
+
+def run(path=None, out=".", fmt=None, quiet=False, executor=None, workers=None):
+    """Compute the report for `path` and write every precomputed store; returns the tables.
+
+    `path` is a transactions file or a dataset directory. A directory is
+    already partitioned, so no dataset is written for it.
+    """
+    from analysis import artifacts, cube, dataset, features, ingest, profiling, validation
+
+    path = os.path.normpath(path or ingest.DATA_PATH)
+    fingerprint = ingest.source_fingerprint(path)
+    with profiling.profile(memory=profiling.PROFILE_PATH is not None) as prof:
+        df, ordered, tables = compute(path, quiet, executor=executor, workers=workers)
+        artifacts.write_artifacts(artifacts.report_artifacts(df, ordered, tables), out,
+                                  fmt or artifacts.DEFAULT_FORMAT)
+        validation.write_quarantine(tables["quarantine"], validation.quarantine_path(path))
+        if not os.path.isdir(path):
+            dataset.write(df, dataset.dataset_path(path), fingerprint)
+        cube.save(cube.build(df), cube.cube_path(path), fingerprint)
+        features.build(df).save(features.store_path(path), fingerprint)
+    tables["profile"] = prof.frame()
+    artifacts.save_tables(tables, artifacts.tables_path(path), fingerprint)
+    if profiling.PROFILE_PATH:
+        prof.save(profiling.PROFILE_PATH)
+    return tables
+
+
+def refresh(path=None, state_dir=None, quiet=False, segment_tolerance=None):
+    """Fold the rows appended to `path` into the incremental state and store the report tables and cube."""
+    from analysis import artifacts, cube, incremental, ingest, profiling, scheduler
+
+    path = path or ingest.DATA_PATH
+    state_dir = state_dir or incremental.DEFAULT_STATE_DIR
+    if segment_tolerance is None:
+        segment_tolerance = incremental.DEFAULT_SEGMENT_TOLERANCE
+    fingerprint = ingest.source_fingerprint(path)
+    with profiling.profile(memory=profiling.PROFILE_PATH is not None) as prof:
+        with scheduler.quiet() if quiet else contextlib.nullcontext():
+            tables = incremental.refresh(path, state_dir, segment_tolerance=segment_tolerance)
+    tables["profile"] = prof.frame()
+    artifacts.save_tables(tables, artifacts.tables_path(path), fingerprint)
+    # the refresh merged the appended rows into its cube, so the dashboard does not rebuild its own
+    olap = incremental.load_cube(state_dir)
+    if olap is not None:
+        cube.save(olap, cube.cube_path(path), fingerprint)
+    if profiling.PROFILE_PATH:
+        prof.save(profiling.PROFILE_PATH)
+    return tables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m analysis", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="compute sections 1-8 and write the artifacts")
+    run_parser.add_argument("--path", help="transactions file or dataset directory (default: data/e_commerce_data.csv)")
+    run_parser.add_argument("--out", default=".", help="directory for the artifact files")
+    run_parser.add_argument("--format", dest="fmt", help="artifact format: csv, csv.gz, parquet or feather")
+    run_parser.add_argument("--quiet", action="store_true", help="skip the console report")
+    run_parser.add_argument("--executor", choices=sorted(EXECUTORS), default="serial",
+                            help="run the independent sections on a thread or process pool (default: serial)")
+    run_parser.add_argument("--workers", type=int, help="pool size (default: one per CPU)")
+    run_parser.add_argument("--incremental", action="store_true",
+                            help="only fold the rows appended since the last incremental run")
+    run_parser.add_argument("--state", help="state directory for --incremental (default: ./state)")
+    run_parser.add_argument("--segment-tolerance", type=float,
+                            help="with --incremental, the share of rows the Spending_Segment tables may place in a "
+                                 "neighbouring segment before they are rebuilt from the whole file (default: 0.01); "
+                                 "0 keeps them exact, but then nearly every refresh re-reads the whole file")
+    serve_parser = commands.add_parser("serve", help="serve the report tables over HTTP (see analysis.server)")
+    serve_parser.add_argument("--path",
+                              help="transactions file or dataset directory (default: data/e_commerce_data.csv)")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, help="port to listen on, 0 for any (default: 8765)")
+    serve_parser.add_argument("--interval", type=float, help="seconds between source checks (default: 5)")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        from analysis import ingest, server
+
+        server.serve(args.path or ingest.DATA_PATH, args.host,
+                     server.PORT if args.port is None else args.port,
+                     server.REFRESH_INTERVAL if args.interval is None else args.interval)
+        return 0
+    start = time.perf_counter()
+    if args.incremental:
+        from analysis import incremental
+
+        tables = refresh(args.path, args.state, args.quiet, args.segment_tolerance)
+        last = incremental.load_manifest(args.state or incremental.DEFAULT_STATE_DIR)["last_refresh"]
+        print(f"{last['delta_rows']} new rows folded in", file=sys.stderr)
+        if last["late_rows"]:
+            print(f"{last['late_rows']} of them are dated before the previous refresh", file=sys.stderr)
+        if last["rebuilt_segments"]:
+            print("Spending_Segment tables rebuilt from the whole file", file=sys.stderr)
+        elif last["segment_drift"]:
+            print(f"Spending_Segment tables are approximate: up to {last['segment_drift']:.2%} of rows sit in a "
+                  "neighbouring segment (see --segment-tolerance)", file=sys.stderr)
+    else:
+        tables = run(args.path, args.out, args.fmt, args.quiet, EXECUTORS[args.executor], args.workers)
+    print(f"{len(tables)} tables written in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    return 0
@@ -0,0 +1,123 @@
+"""A thin client for the report server (analysis.server).
+
+The dashboard uses it instead of loading the tables, the filter cube and the
+customer features itself when ANALYSIS_SERVER is set, e.g.
+ANALYSIS_SERVER=http://127.0.0.1:8765; it then needs no local copy of the
+source.
+
+Each of tables(), cube() and features() first revalidates its collection's
+index with the version it last saw. While the server answers 304, that is
+the only request and what was already decoded is returned as it is; after a
+new version, every item is fetched once.
+"""
+import http.client
+import io
+import json
+import os
+import threading
+from urllib.parse import quote, urlsplit
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from analysis import cube, features, server
+
+SERVER = os.environ.get("ANALYSIS_SERVER")
+
+
+def decode_arrow(body, kind):
+    """The table encoded by server.encode_arrow()."""
+    batch = pa.ipc.open_stream(body).read_all()
+    if kind == "scalar":
+        return batch.column("value")[0].as_py()
+    table = batch.to_pandas()
+    if isinstance(table.index, pd.DatetimeIndex):
+        # Arrow keeps the dates but not the resampling frequency
+        table.index.freq = table.index.inferred_freq
+    if kind == "series":
+        return table["values"].rename(json.loads(batch.schema.metadata[b"series_name"]))
+    return table
+
+
+def decode_npy(body, kind="array"):
+    """The array encoded by server.encode_npy()."""
+    return np.load(io.BytesIO(body))
+
+
+class ReportClient:
+    """Fetches the report from `url` over one keep-alive connection, revalidating by ETag."""
+
+    def __init__(self, url=SERVER, timeout=60):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.timeout = timeout
+        self.version = None
+        self.requests = 0
+        # collection -> ETag of its index, and what was assembled from that version
+        self._etags = {}
+        self._cache = {}
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _get(self, target, headers):
+        for attempt in (0, 1):
+            if self._connection is None:
+                self._connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self._connection.request("GET", target, headers=headers)
+                response = self._connection.getresponse()
+                body = response.read()
+                break
+            except (ConnectionError, http.client.HTTPException):
+                # the server closed an idle connection; reconnect once
+                self._connection.close()
+                self._connection = None
+                if attempt:
+                    raise
+        self.requests += 1
+        if response.status not in (200, 304):
+            raise RuntimeError(f"GET {target}: {response.status} {response.reason}")
+        return response.status, response.getheader("ETag"), body
+
+    def _fetch(self, collection, decode, accept, assemble):
+        """assemble(index, {name: decoded item}) for `collection`, kept until its version changes."""
+        with self._lock:
+            etag = self._etags.get(collection)
+            headers = {"If-None-Match": etag} if etag else {}
+            while True:
+                status, etag, body = self._get(f"/{collection}", headers)
+                if status == 304:
+                    return self._cache[collection]
+                index = json.loads(body)
+                items = {}
+                for name, kind in index["items"].items():
+                    _, tag, data = self._get(f"/{collection}/{quote(name)}", {"Accept": accept})
+                    if not tag.startswith(f'"{index["version"]}-'):
+                        break
+                    items[name] = decode(data, kind)
+                else:
+                    self.version, self._etags[collection] = index["version"], etag
+                    self._cache[collection] = assemble(index, items)
+                    return self._cache[collection]
+                # the server swapped in a new version halfway through, so start over on it
+                headers = {}
+
+    def tables(self):
+        """Every report table, decoded; unchanged versions cost one conditional request."""
+        return self._fetch("tables", decode_arrow, server.ARROW, lambda index, tables: tables)
+
+    def cube(self):
+        """The filter cube, as cube.load() gives it."""
+        return self._fetch("cube", decode_arrow, server.ARROW,
+                           lambda index, tables: cube.from_tables(tables, index["dtypes"]))
+
+    def features(self):
+        """The customer feature store, held in memory."""
+        return self._fetch("features", decode_npy, server.NPY,
+                           lambda index, arrays: features.FeatureStore(arrays, index["vocab"], index["meta"]))
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,238 @@
+"""A precomputed aggregate cube for filtering the dashboard without re-scanning.
+
+The cube holds the AGGREGATES measures grouped by the filter dimensions
+(DIMENSIONS) plus whatever extra keys each spec needs, one table per distinct
+set of extra keys. The derived keys in DERIVED are functions of the
+dimensions, so carrying them adds no cells. Every measure is kept in
+additive form (sums, counts and sizes; a mean as its sum and count), so a
+filtered report is: mask the cube cells, roll them up to each spec's keys
+with the aggregation engine, and run sections 2-6 on the result.
+
+Specs keyed by Customer_ID are left out, since customer-grain cells would be
+as many as the transactions. Medians are not additive and come back as NaN.
+The other cells are bounded by the dimensions' values, not the row count: on
+the 10k-row sample some tables have about as many cells as rows, but at 10M
+synthetic rows the largest holds 11% of them (benchmarks/bench_cube.py).
+
+Cube tables are additive too: merge() folds in the cube of appended rows,
+which is how an incremental refresh keeps the cube current, and
+build_stream() builds the cube of a large file chunk by chunk.
+save() and load() keep a cube next to the source as Parquet files, tagged
+with the source fingerprint like the ingest snapshot.
+"""
+import collections
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from analysis import aggregate, ingest, scheduler, sections, streaming
+
+DIMENSIONS = ["Transaction_Date", "Region", "Product_Category", "Gender", "Age_Segment"]
+DERIVED = ["Year", "Month", "Season", "Demographics_Segment"]
+
+Cube = collections.namedtuple("Cube", "tables dtypes")
+
+
+def _primitive(column, func):
+    return f"{func}:{column}"
+
+
+def _primitives(measures):
+    prims = set()
+    for column, func in measures.values():
+        if func == "mean":
+            prims |= {("sum", column), ("count", column)}
+        elif func in aggregate.ADDITIVE:
+            prims.add((func, column))
+    return prims
+
+
+def _table_name(keys):
+    extras = [key for key in keys if key not in DIMENSIONS and key not in DERIVED]
+    return "+".join(extras) or "base"
+
+
+def cube_specs(specs=None):
+    """The cube tables for `specs` as aggregate() specs, keyed by table name."""
+    specs = sections.AGGREGATES if specs is None else specs
+    tables = {}
+    for keys, measures in specs.values():
+        if "Customer_ID" in keys:
+            continue
+        name = _table_name(keys)
+        extras = [key for key in keys if key not in DIMENSIONS and key not in DERIVED]
+        _, prims = tables.setdefault(name, (DIMENSIONS + DERIVED + extras, {}))
+        for func, column in _primitives(measures):
+            prims[_primitive(column, func)] = (column, func)
+    return tables
+
+
+def _keys(table):
+    return [column for column in table.columns if ":" not in column]
+
+
+def _categorize(table, keys):
+    for key in keys:
+        if not isinstance(table[key].dtype, pd.CategoricalDtype):
+            table[key] = table[key].astype("category")
+    return table
+
+
+def build(df, specs=None):
+    """Build the cube from the enriched frame `df`."""
+    tables = aggregate.aggregate(df, cube_specs(specs))
+    for name, (keys, _) in cube_specs(specs).items():
+        _categorize(tables[name], keys)
+    dtypes = {key: str(df[key].dtype) for key in df.columns}
+    return Cube(tables, dtypes)
+
+
+def merge(cube, other):
+    """The cube of both `cube`'s and `other`'s transactions."""
+    tables = {}
+    for name, table in cube.tables.items():
+        keys, prims = _keys(table), [column for column in table.columns if ":" in column]
+        both = {key: union_categoricals([table[key], other.tables[name][key]], sort_categories=True)
+                for key in keys}
+        both.update({prim: np.concatenate([table[prim].to_numpy(), other.tables[name][prim].to_numpy()])
+                     for prim in prims})
+        spec = {name: (keys, {prim: (prim, "sum") for prim in prims})}
+        tables[name] = aggregate.aggregate(pd.DataFrame(both), spec)[name]
+    return Cube(tables, cube.dtypes)
+
+
+def build_stream(path, chunksize=streaming.DEFAULT_CHUNKSIZE):
+    """Build the cube of a file too big for memory, one chunk at a time."""
+    bounds, _ = streaming.profile(path, chunksize)
+    cube = None
+    for chunk in streaming.iter_chunks(path, chunksize):
+        sections.drop_undated(chunk)
+        part = build(sections.enrich(chunk, bounds))
+        cube = part if cube is None else merge(cube, part)
+    return cube
+
+
+def cube_path(path=ingest.DATA_PATH):
+    return ingest.stem(path) + ".cube"
+
+
+def save(cube, directory, fingerprint):
+    os.makedirs(directory, exist_ok=True)
+    for name, table in cube.tables.items():
+        tmp = os.path.join(directory, f".{name}.parquet.tmp")
+        table.to_parquet(tmp, index=False)
+        os.replace(tmp, os.path.join(directory, f"{name}.parquet"))
+    manifest = {"fingerprint": fingerprint, "tables": sorted(cube.tables), "dtypes": cube.dtypes}
+    with open(os.path.join(directory, "cube.json.tmp"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(os.path.join(directory, "cube.json.tmp"), os.path.join(directory, "cube.json"))
+
+
+def load(directory, fingerprint=None):
+    """The cube saved in `directory`, or None if missing or built from another source version."""
+    try:
+        with open(os.path.join(directory, "cube.json")) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if fingerprint is not None and manifest["fingerprint"] != fingerprint:
+        return None
+    tables = {name: pd.read_parquet(os.path.join(directory, f"{name}.parquet")) for name in manifest["tables"]}
+    return from_tables(tables, manifest["dtypes"])
+
+
+def from_tables(tables, dtypes):
+    """The Cube of `tables` read back from a file or the report server, with their keys categorical again."""
+    return Cube({name: _categorize(table, _keys(table)) for name, table in tables.items()}, dtypes)
+
+
+def load_or_build(path=ingest.DATA_PATH):
+    """The cube for `path`, rebuilt and saved if the source changed since it was built."""
+    fingerprint = ingest.source_fingerprint(path)
+    cube = load(cube_path(path), fingerprint)
+    if cube is None:
+        cube = build_stream(path)
+        save(cube, cube_path(path), fingerprint)
+    return cube
+
+
+def _mask(table, filters):
+    mask = np.ones(len(table), dtype=bool)
+    for key, wanted in filters.items():
+        if wanted is None:
+            continue
+        column = table[key]
+        if key == "Transaction_Date":
+            start, end = (pd.Timestamp(bound) if bound is not None else None for bound in wanted)
+            categories = column.cat.categories
+            lo = 0 if start is None else categories.searchsorted(start, side="left")
+            hi = len(categories) if end is None else categories.searchsorted(end, side="right")
+            codes = column.cat.codes.to_numpy()
+            mask &= (codes >= lo) & (codes < hi)
+        else:
+            mask &= column.isin(list(wanted)).to_numpy()
+    return mask
+
+
+def _restore(values, dtype):
+    if dtype == "category":
+        return values.array
+    return values.astype(values.cat.categories.dtype).astype(dtype).to_numpy()
+
+
+def rollup(cube, filters=None, specs=None):
+    """The AGGREGATES tables (minus the customer-grain ones) over the cells matching `filters`.
+
+    `filters` maps a dimension to the allowed values, or Transaction_Date to
+    a (start, end) pair of inclusive bounds; None means no restriction.
+    """
+    specs = sections.AGGREGATES if specs is None else specs
+    filters = filters or {}
+    by_table = collections.defaultdict(dict)
+    for name, (keys, measures) in specs.items():
+        if "Customer_ID" not in keys:
+            prims = {_primitive(column, func): (_primitive(column, func), "sum")
+                     for func, column in _primitives(measures)}
+            by_table[_table_name(keys)][name] = (keys, prims)
+    tables = {}
+    for table_name, table_specs in by_table.items():
+        table = cube.tables[table_name]
+        if filters:
+            table = table[_mask(table, filters)]
+        rolled = aggregate.aggregate(table, table_specs)
+        for name, (keys, _) in table_specs.items():
+            part = rolled[name]
+            result = {key: _restore(part[key], cube.dtypes[key]) for key in keys}
+            for out, (column, func) in specs[name][1].items():
+                if func == "mean":
+                    result[out] = (part[_primitive(column, "sum")] / part[_primitive(column, "count")]).to_numpy()
+                elif func in aggregate.ADDITIVE:
+                    result[out] = part[_primitive(column, func)].to_numpy()
+                else:
+                    result[out] = np.nan
+            tables[name] = pd.DataFrame(result)
+    return tables
+
+
+def report(cube, filters=None):
+    """Sections 2-6 over the cells matching `filters`; returns their tables.
+
+    Returns None when no transaction matches.
+    """
+    if filters and not _mask(cube.tables["base"], filters).any():
+        return None
+    agg = rollup(cube, filters)
+    tables = {}
+    with scheduler.quiet():
+        for section in (sections.product_performance, sections.temporal_patterns, sections.location_insights,
+                        sections.payment_trends, sections.demographics):
+            tables.update(section(None, agg))
+    return tables
+
+
+def values(cube, dimension):
+    """The values of `dimension` present in the cube, for building filter widgets."""
+    return list(cube.tables["base"][dimension].cat.categories)
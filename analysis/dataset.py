@@ -0,0 +1,241 @@
+"""The transactions as a Hive-style Parquet dataset partitioned by Year/Month.
+
+    e_commerce_data.dataset/
+        _dataset.json
+        Year=2024/Month=01/part-00000.parquet
+        Year=2024/Month=02/part-00001.parquet
+        ...
+
+Every file holds the source columns of one month's rows; Year and Month live
+only in the directory names, and enrich() derives them again. Zero-padded
+months keep the paths in date order, so a plain directory read returns the
+rows month by month.
+
+The manifest lists every file with its row count, size and the min/max of
+each STATS column. load() and files() prune on those statistics before
+opening anything: a date range reads only the files whose dates overlap it,
+then drops the rows outside it. run() reports on such a window.
+
+append() writes new rows as new files, one per month they fall in, and
+never rewrites existing ones; a month that already has files gets another.
+write() brings the dataset to a whole frame: the manifest keeps a digest of
+each month's rows, so only the months whose rows changed are rewritten, the
+months not in the dataset yet are appended, and the rest are left alone.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from analysis import ingest, profiling, sections
+
+MANIFEST = "_dataset.json"
+STATS = ["Transaction_Date", "Transaction_ID", "Customer_ID", "Quantity", "Unit_Price", "Age", "Unit_Cost"]
+SOURCE_COLUMNS = list(ingest.SCHEMA) + ingest.DATE_COLUMNS
+
+
+def dataset_path(path=ingest.DATA_PATH):
+    """The dataset written for the source at `path`; a dataset directory is its own."""
+    if os.path.isdir(path):
+        return os.path.normpath(path)
+    return os.path.splitext(path)[0] + ".dataset"
+
+
+def partition(year, month):
+    return f"Year={year}/Month={month:02d}"
+
+
+def load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _save_manifest(directory, manifest):
+    path = os.path.join(directory, MANIFEST)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _stat(value):
+    return value.isoformat() if isinstance(value, pd.Timestamp) else value.item()
+
+
+def _months(df):
+    """{partition: the source columns of its rows} for every month `df` has rows in."""
+    columns = [column for column in df.columns if column in SOURCE_COLUMNS]
+    dates = df["Transaction_Date"]
+    return {partition(year, month): df[columns].iloc[rows]
+            for (year, month), rows in df.groupby([dates.dt.year, dates.dt.month], sort=True).indices.items()}
+
+
+def _digest(part):
+    return hashlib.sha256(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes()).hexdigest()
+
+
+def _write_parts(months, directory, manifest):
+    """Write one new file per {partition: rows} in `months`; returns their entries."""
+    written = []
+    for month, part in months.items():
+        name = f"{month}/part-{manifest['next_file']:05d}.parquet"
+        path = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(part, preserve_index=False)
+        pq.write_table(table, path + ".tmp")
+        os.replace(path + ".tmp", path)
+        written.append({
+            "path": name,
+            "rows": len(part),
+            "bytes": os.path.getsize(path),
+            "stats": {column: [_stat(part[column].min()), _stat(part[column].max())]
+                      for column in STATS if column in part},
+        })
+        manifest["next_file"] += 1
+    return written
+
+
+@profiling.instrument
+def append(df, directory, fingerprint=None):
+    """Add the rows of `df` to the dataset in `directory` as new files; returns their entries."""
+    manifest = load_manifest(directory) or {"fingerprint": None, "next_file": 0, "files": [], "months": {}}
+    if fingerprint is not None:
+        manifest["fingerprint"] = fingerprint
+    months = _months(df)
+    existing = {os.path.dirname(entry["path"]) for entry in manifest["files"]}
+    written = _write_parts(months, directory, manifest)
+    # a month that had files already now holds rows no single digest covers, so write() redoes it
+    digests = manifest.setdefault("months", {})
+    for month, part in months.items():
+        digests[month] = None if month in existing else _digest(part)
+    # the manifest is switched last, so readers never see a file list pointing at missing files
+    manifest["files"] += written
+    _save_manifest(directory, manifest)
+    return written
+
+
+@profiling.instrument
+def write(df, directory, fingerprint=None):
+    """Make the dataset in `directory` hold the rows of `df`; returns the entries of the files written.
+
+    Months whose rows are unchanged keep their files. Changed months get one
+    new file each in a single manifest switch, then their old files are
+    removed; months the dataset has no files for yet are append()ed.
+    """
+    manifest = load_manifest(directory)
+    if manifest is not None and "months" not in manifest:
+        # written before the month digests were kept, so nothing can be reused
+        shutil.rmtree(directory)
+        manifest = None
+    if manifest is None:
+        return append(df, directory, fingerprint)
+    months = _months(df)
+    digests = {month: _digest(part) for month, part in months.items()}
+    known = manifest["months"]
+    stale = {month for month in known if digests.get(month) != known[month]}
+    written = _write_parts({month: months[month] for month in stale if month in months}, directory, manifest)
+    removed = [entry for entry in manifest["files"] if os.path.dirname(entry["path"]) in stale]
+    manifest["files"] = [entry for entry in manifest["files"]
+                         if os.path.dirname(entry["path"]) not in stale] + written
+    for month in stale:
+        if month in digests:
+            known[month] = digests[month]
+        else:
+            del known[month]
+    if fingerprint is not None:
+        manifest["fingerprint"] = fingerprint
+    _save_manifest(directory, manifest)
+    for entry in removed:
+        path = os.path.join(directory, entry["path"])
+        os.remove(path)
+        with contextlib.suppress(OSError):
+            # drops the Month= and Year= directories of a month that is gone
+            os.removedirs(os.path.dirname(path))
+    new = [month for month in months if month not in known]
+    if new:
+        written += append(pd.concat([months[month] for month in new]), directory, fingerprint)
+    return written
+
+
+def load_or_build(path=ingest.DATA_PATH):
+    """The dataset directory for `path`, rewritten if the source changed since it was written."""
+    if os.path.isdir(path):
+        return dataset_path(path)
+    fingerprint = ingest.source_fingerprint(path)
+    directory = dataset_path(path)
+    manifest = load_manifest(directory)
+    if manifest is None or manifest["fingerprint"] != fingerprint:
+        write(ingest.load_data(path), directory, fingerprint)
+    return directory
+
+
+def _overlaps(entry, ranges):
+    for column, (low, high) in ranges.items():
+        low_stat, high_stat = entry["stats"][column]
+        if column in ingest.DATE_COLUMNS:
+            low_stat, high_stat = pd.Timestamp(low_stat), pd.Timestamp(high_stat)
+        if (high is not None and low_stat > high) or (low is not None and high_stat < low):
+            return False
+    return True
+
+
+def _ranges(start, end, ranges):
+    ranges = dict(ranges or {})
+    if start is not None or end is not None:
+        ranges["Transaction_Date"] = (pd.Timestamp(start) if start is not None else None,
+                                      pd.Timestamp(end) if end is not None else None)
+    return ranges
+
+
+def files(directory, start=None, end=None, ranges=None):
+    """The manifest entries of the files that can hold rows in the given bounds.
+
+    `start` and `end` bound Transaction_Date, inclusive; `ranges` maps other
+    STATS columns to (low, high) pairs, where None leaves a side open.
+    """
+    manifest = load_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f"no dataset manifest in {directory!r}")
+    ranges = _ranges(start, end, ranges)
+    return [entry for entry in manifest["files"] if _overlaps(entry, ranges)]
+
+
+@profiling.instrument
+def load(directory, start=None, end=None, ranges=None, columns=None):
+    """The rows of the dataset within the bounds (see files()), reading only the files that can hold them."""
+    entries = files(directory, start, end, ranges)
+    ranges = _ranges(start, end, ranges)
+    needed = None if columns is None else list(dict.fromkeys([*columns, *ranges]))
+    tables = [pq.read_table(os.path.join(directory, entry["path"]), columns=needed, partitioning=None)
+              for entry in sorted(entries, key=lambda entry: entry["path"])]
+    if not tables:
+        empty = pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in ingest.SCHEMA.items()})
+        empty["Transaction_Date"] = pd.Series(dtype="datetime64[ns]")
+        return empty[[column for column in SOURCE_COLUMNS if needed is None or column in needed]]
+    df = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+    mask = pd.Series(True, index=df.index)
+    for column, (low, high) in ranges.items():
+        if low is not None:
+            mask &= df[column] >= low
+        if high is not None:
+            mask &= df[column] <= high
+    df = df[mask.to_numpy()].reset_index(drop=True)
+    return df if columns is None else df[list(columns)]
+
+
+def bounds(directory):
+    """The (first, last) Transaction_Date in the dataset, from the manifest alone."""
+    stats = [entry["stats"]["Transaction_Date"] for entry in load_manifest(directory)["files"]]
+    return pd.Timestamp(min(low for low, _ in stats)), pd.Timestamp(max(high for _, high in stats))
+
+
+def run(directory, start=None, end=None):
+    """Sections 1-8 over the transactions dated `start` to `end`; returns (date-ordered frame, tables)."""
+    return sections.run_all(load(directory, start, end))
@@ -0,0 +1,205 @@
+"""A per-customer feature store backed by flat arrays.
+
+One row per Customer_ID, in ascending id order, with a numpy array per
+feature: transaction count, total and High-segment spend, first and last
+purchase day, recency, the customer's usual Spending_Segment, and the
+Gender, Age and Region of their latest transaction. Categorical features are
+small integer codes into the vocabularies kept with the store; -1 stands for
+a blank value and decodes to None. Rows without a Customer_ID are left out.
+
+Each customer's products are a CSR-style basket: `basket_offsets[i]` to
+`basket_offsets[i + 1]` slices `basket_codes`, the product codes in the
+order the transactions appear in the source, skipping blank products as
+basket.CoOccurrence does. This replaces the stringified lists of
+grouped_product.csv.
+
+save() writes every array as a .npy file and load() memory-maps them, so
+opening the store costs nothing up front. Point lookups binary-search the
+sorted ids, and bulk scans read whole columns.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from analysis import ingest, sections
+
+SEGMENTS = ["Low", "Medium", "High"]
+COLUMNS = ["customer_id", "transactions", "total_spent", "high_spent", "first_purchase", "last_purchase",
+           "recency_days", "segment", "gender", "age", "region"]
+CATEGORICAL = {"segment": "segments", "gender": "genders", "region": "regions"}
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+
+def _codes(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), list(series.cat.categories)
+    codes, uniques = pd.factorize(series, sort=True)
+    return codes, list(uniques)
+
+
+def _decode(vocab, code):
+    return vocab[code] if code >= 0 else None
+
+
+class FeatureStore:
+    """Customer features as parallel arrays; see the module docstring for the layout."""
+
+    def __init__(self, arrays, vocab, meta):
+        self.arrays = arrays
+        self.vocab = vocab
+        self.meta = meta
+
+    def __len__(self):
+        return len(self.arrays["customer_id"])
+
+    def __contains__(self, customer_id):
+        ids = self.arrays["customer_id"]
+        i = np.searchsorted(ids, customer_id)
+        return bool(i < len(ids) and ids[i] == customer_id)
+
+    def positions(self, customer_ids):
+        """Row positions of `customer_ids`; raises KeyError for unknown ids."""
+        ids = self.arrays["customer_id"]
+        customer_ids = np.asarray(customer_ids)
+        found = np.searchsorted(ids, customer_ids).clip(max=len(ids) - 1)
+        missing = ids[found] != customer_ids
+        if missing.any():
+            raise KeyError(f"unknown Customer_ID {customer_ids[missing][:5].tolist()}")
+        return found
+
+    def basket(self, customer_id):
+        """The products `customer_id` bought, one per transaction with a product."""
+        i = int(self.positions([customer_id])[0])
+        offsets = self.arrays["basket_offsets"]
+        codes = self.arrays["basket_codes"][offsets[i]:offsets[i + 1]]
+        return [self.vocab["products"][code] for code in codes]
+
+    def lookup(self, customer_id):
+        """All features of one customer as a dict, with codes decoded."""
+        i = int(self.positions([customer_id])[0])
+        profile = {}
+        for column in COLUMNS:
+            value = self.arrays[column][i]
+            if column in CATEGORICAL:
+                value = _decode(self.vocab[CATEGORICAL[column]], value)
+            elif column in ("first_purchase", "last_purchase"):
+                value = pd.Timestamp(_EPOCH + value)
+            else:
+                value = value.item()
+            profile[column] = value
+        profile["basket"] = self.basket(customer_id)
+        return profile
+
+    def frame(self, columns=None):
+        """A DataFrame over every customer, for bulk scans; blank categories are NaN."""
+        table = {}
+        for column in columns or COLUMNS:
+            values = np.asarray(self.arrays[column])
+            if column in CATEGORICAL:
+                values = pd.Categorical.from_codes(values, self.vocab[CATEGORICAL[column]])
+            elif column in ("first_purchase", "last_purchase"):
+                values = (_EPOCH + values).astype("datetime64[ns]")
+            table[column] = values
+        return pd.DataFrame(table)
+
+    def baskets(self):
+        """Every basket as a Series of product lists, indexed by Customer_ID."""
+        products = np.asarray(self.vocab["products"], dtype=object)[np.asarray(self.arrays["basket_codes"])]
+        offsets = np.asarray(self.arrays["basket_offsets"])
+        return pd.Series([list(products[a:b]) for a, b in zip(offsets[:-1], offsets[1:])],
+                         index=pd.Index(np.asarray(self.arrays["customer_id"]), name="Customer_ID"),
+                         name="Product_Name")
+
+    def save(self, directory, fingerprint=None):
+        os.makedirs(directory, exist_ok=True)
+        for name, values in self.arrays.items():
+            tmp = os.path.join(directory, f".{name}.npy.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, np.asarray(values))
+            os.replace(tmp, os.path.join(directory, f"{name}.npy"))
+        manifest = {"fingerprint": fingerprint, "arrays": sorted(self.arrays), "vocab": self.vocab, **self.meta}
+        with open(os.path.join(directory, "features.json.tmp"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(os.path.join(directory, "features.json.tmp"), os.path.join(directory, "features.json"))
+
+    @classmethod
+    def load(cls, directory, fingerprint=None):
+        """Memory-map the store in `directory`; None if missing or built from another source version."""
+        try:
+            with open(os.path.join(directory, "features.json")) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if fingerprint is not None and manifest["fingerprint"] != fingerprint:
+            return None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in manifest["arrays"]}
+        return cls(arrays, manifest["vocab"], {"reference_date": manifest["reference_date"]})
+
+
+def build(df):
+    """Build the store from the enriched frame `df`."""
+    df = df[df["Customer_ID"].notna()]
+    ids, inverse = np.unique(df["Customer_ID"].to_numpy(), return_inverse=True)
+    n = len(ids)
+    counts = np.bincount(inverse, minlength=n)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    days = (df["Transaction_Date"].to_numpy().astype("datetime64[D]") - _EPOCH).astype(np.int32)
+    rows = np.arange(len(df))
+    by_customer = np.argsort(inverse, kind="stable")              # source order within a customer
+    by_date = np.lexsort((rows, days, inverse))                     # latest transaction last
+    latest = by_date[offsets[1:] - 1]
+
+    spent = df["Total_Spent"].to_numpy(dtype=np.float64)
+    segment = pd.Categorical(df["Spending_Segment"], categories=SEGMENTS).codes
+    high = segment == SEGMENTS.index("High")
+    # the usual segment is the most frequent one, ties going to the higher segment
+    segment_counts = np.stack([np.bincount(inverse[segment == s], minlength=n) for s in range(len(SEGMENTS))])
+    usual = (len(SEGMENTS) - 1 - np.argmax(segment_counts[::-1], axis=0)).astype(np.int8)
+    usual[segment_counts.sum(axis=0) == 0] = -1
+
+    product_codes, products = _codes(df["Product_Name"])
+    # blank products are left out of the baskets
+    basket_codes = product_codes[by_customer]
+    basket_offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(inverse[product_codes >= 0], minlength=n), out=basket_offsets[1:])
+    gender_codes, genders = _codes(df["Gender"])
+    region_codes, regions = _codes(df["Region"])
+    reference = int(days.max())
+    arrays = {
+        "customer_id": ids.astype(np.int32),
+        "transactions": counts.astype(np.int32),
+        "total_spent": np.bincount(inverse, weights=spent, minlength=n),
+        "high_spent": np.bincount(inverse[high], weights=spent[high], minlength=n),
+        "first_purchase": np.minimum.reduceat(days[by_customer], offsets[:-1]),
+        "last_purchase": np.maximum.reduceat(days[by_customer], offsets[:-1]),
+        "segment": usual,
+        "gender": gender_codes[latest].astype(np.int8),
+        # a blank Age is kept as -1
+        "age": np.nan_to_num(df["Age"].to_numpy(dtype=np.float64)[latest], nan=-1).astype(np.int8),
+        "region": region_codes[latest].astype(np.int8),
+        "basket_offsets": basket_offsets,
+        "basket_codes": basket_codes[basket_codes >= 0].astype(np.int16),
+    }
+    arrays["recency_days"] = (reference - arrays["last_purchase"]).astype(np.int32)
+    vocab = {"products": products, "segments": SEGMENTS, "genders": genders, "regions": regions}
+    return FeatureStore(arrays, vocab, {"reference_date": str(_EPOCH + reference)})
+
+
+def store_path(path=ingest.DATA_PATH):
+    return ingest.stem(path) + ".features"
+
+
+def load_or_build(path=ingest.DATA_PATH):
+    """The store for `path`, rebuilt and saved if the source changed since it was built."""
+    fingerprint = ingest.source_fingerprint(path)
+    store = FeatureStore.load(store_path(path), fingerprint)
+    if store is None:
+        df = ingest.load_data(path)
+        sections.drop_undated(df)
+        build(sections.enrich(df)).save(store_path(path), fingerprint)
+        store = FeatureStore.load(store_path(path), fingerprint)
+    return store
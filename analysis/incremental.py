@@ -0,0 +1,281 @@
+"""Incremental append mode: fold only the transactions added since the last run.
+
+A state directory keeps, for every AGGREGATES spec, the mergeable partial
+table streaming mode builds (per customer, product, region, month, segment,
+...), the exact Total_Spent value counts, the customer baskets section 7
+mines (basket.CoOccurrence), the dashboard's aggregate cube (analysis.cube),
+and a manifest with the watermark: the byte offset and row count already
+folded into the state, plus the highest Transaction_Date and Transaction_ID
+seen so far. A refresh reads only the bytes after that offset, up to the
+last complete line when it starts, so rows still being appended are left for
+the next refresh. It folds them into the partial tables, merges their cube
+into the stored one with cube.merge(), and finalizes the report tables from
+the state. Appended rows dated before the stored watermark are counted as
+late in the manifest's last_refresh: they are folded in all the same, but
+they change periods an earlier report already covered.
+
+Metrics that are not additive are finalized from additive state. The
+high_frequency_buyers mean threshold comes from the per-customer counts,
+the idxmax preference tables from the merged per-group sums, and the
+demographics median from per-group value counts. Spending_Segment depends on
+the Total_Spent quartiles of the whole history. New rows are segmented with
+the stored bounds, and the segment-keyed tables and cube tables are only
+rebuilt from the full file once the stored bounds drift more than
+`segment_tolerance` in rank from the true quartiles. With segment_tolerance=0
+the segments are exact.
+
+Each refresh writes a new state version and switches the manifest to it
+atomically, so an interrupted refresh leaves the previous state in place.
+"""
+import glob
+import hashlib
+import io
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from analysis import aggregate, basket, cube, ingest, quantiles, sections, streaming
+
+DEFAULT_STATE_DIR = "./state"
+# rank distance the stored segment bounds may drift before the segment tables are rebuilt
+DEFAULT_SEGMENT_TOLERANCE = 0.01
+STATE_VERSION = 3
+TAIL_BYTES = 4096
+
+_CATEGORICAL = {column: pd.CategoricalDtype() for column, dtype in ingest.SCHEMA.items() if dtype == "category"}
+
+
+def _spec_key(specs):
+    return hashlib.sha256(repr(sorted(specs.items())).encode()).hexdigest()
+
+
+def _tail_digest(path, offset):
+    with open(path, "rb") as f:
+        f.seek(max(0, offset - TAIL_BYTES))
+        return hashlib.sha256(f.read(offset - f.tell())).hexdigest()
+
+
+def load_manifest(state_dir=DEFAULT_STATE_DIR):
+    try:
+        with open(os.path.join(state_dir, "manifest.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _load_state(state_dir, manifest):
+    version_dir = os.path.join(state_dir, manifest["current"])
+    state = {}
+    for name in manifest["tables"]:
+        state[name] = pd.read_parquet(os.path.join(version_dir, f"{name}.parquet"))
+    spent = quantiles.ExactQuantiles()
+    counts = pd.read_parquet(os.path.join(version_dir, "spent_counts.parquet"))
+    spent.counts = counts.set_index("value")["count"]
+    baskets = basket.CoOccurrence.load(os.path.join(version_dir, "baskets.npz"))
+    return state, spent, baskets, cube.load(os.path.join(version_dir, "cube"))
+
+
+def load_cube(state_dir=DEFAULT_STATE_DIR):
+    """The cube of every row folded into the state, or None before the first refresh."""
+    manifest = load_manifest(state_dir)
+    if manifest is None or manifest["state_version"] != STATE_VERSION:
+        return None
+    return cube.load(os.path.join(state_dir, manifest["current"], "cube"))
+
+
+def _versions(state_dir):
+    return [os.path.basename(directory) for directory in glob.glob(os.path.join(state_dir, "v[0-9]*"))]
+
+
+def _save_state(state_dir, manifest, state, spent, baskets, olap):
+    # a fresh state must not reuse the directory an older manifest may still point at
+    number = max([int(version[1:]) for version in _versions(state_dir)], default=0) + 1
+    new_version = f"v{number}"
+    version_dir = os.path.join(state_dir, new_version)
+    os.makedirs(version_dir, exist_ok=True)
+    for name, table in state.items():
+        table.to_parquet(os.path.join(version_dir, f"{name}.parquet"), index=False)
+    spent.counts.rename_axis("value").rename("count").reset_index().to_parquet(
+        os.path.join(version_dir, "spent_counts.parquet"), index=False)
+    baskets.save(os.path.join(version_dir, "baskets.npz"))
+    if olap is not None:
+        cube.save(olap, os.path.join(version_dir, "cube"), None)
+
+    manifest = {**manifest, "current": new_version, "tables": sorted(state)}
+    tmp = os.path.join(state_dir, "manifest.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(state_dir, "manifest.json"))
+    for version in _versions(state_dir):
+        if version != new_version:
+            shutil.rmtree(os.path.join(state_dir, version), ignore_errors=True)
+    return manifest
+
+
+def complete_end(path):
+    """The byte offset just past the last newline of `path`; a half-written last line is left out."""
+    with open(path, "rb") as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(0, end - TAIL_BYTES)
+            f.seek(start)
+            block = f.read(end - start)
+            newline = block.rfind(b"\n")
+            if newline >= 0:
+                return start + newline + 1
+            end = start
+    return 0
+
+
+class _Bounded(io.RawIOBase):
+    """A read-only view of an open file that stops after `remaining` bytes."""
+
+    def __init__(self, f, remaining):
+        self.f, self.remaining = f, remaining
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self.remaining)
+        if size <= 0:
+            return 0
+        read = self.f.readinto(memoryview(buffer)[:size])
+        self.remaining -= read
+        return read
+
+
+def read_from(path, offset, end, chunksize=streaming.DEFAULT_CHUNKSIZE):
+    """Typed frames of the CSV rows between byte `offset` (0 for the whole file) and `end`."""
+    f = open(path, "rb")
+    header = f.readline()
+    names = header.decode().strip().split(",")
+    start = max(offset, len(header))
+    if start >= end:
+        f.close()
+        return iter(())
+    f.seek(start)
+
+    def chunks():
+        with f:
+            yield from ingest.read_csv_chunks(io.BufferedReader(_Bounded(f, end - start)), chunksize,
+                                              header=None, names=names)
+
+    return chunks()
+
+
+def _drift(spent, bounds, exact_bounds):
+    """How far the stored segment bounds are from the exact quartiles, as the largest share of rows between them."""
+    values, counts = spent.counts.index.to_numpy(), spent.counts.to_numpy()
+    order = np.argsort(values)
+    values, cumulative = values[order], np.cumsum(counts[order])
+
+    def rank(value):
+        below = np.searchsorted(values, value, side="right")
+        return cumulative[below - 1] / cumulative[-1] if below else 0.0
+
+    return max(abs(rank(bound) - rank(exact)) for bound, exact in zip(bounds, exact_bounds))
+
+
+def _drifted(spent, bounds, exact_bounds, tolerance):
+    """Whether the stored segment bounds are too far from the exact quartiles."""
+    if tolerance == 0:
+        return list(bounds) != list(exact_bounds)
+    return _drift(spent, bounds, exact_bounds) > tolerance
+
+
+def refresh(path=ingest.DATA_PATH, state_dir=DEFAULT_STATE_DIR, chunksize=streaming.DEFAULT_CHUNKSIZE,
+            segment_tolerance=DEFAULT_SEGMENT_TOLERANCE, specs=None):
+    """Fold the rows appended to `path` since the last refresh and return the report tables.
+
+    The first refresh, or one after the already-folded part of the file has
+    changed, rebuilds the state from the whole file. `segment_tolerance`
+    trades the Spending_Segment tables' accuracy for refresh cost: up to that
+    share of rows may sit in a neighbouring segment. At 0 they are exact, but
+    nearly every append moves a quartile, so nearly every refresh re-reads the
+    whole file. The drift left in place is recorded in last_refresh.
+    """
+    specs = sections.AGGREGATES if specs is None else specs
+    partial = streaming.partial_specs(specs)
+    segment_specs = {name for name, (keys, _) in specs.items() if "Spending_Segment" in keys}
+    segment_partial = {name: spec for name, spec in partial.items()
+                       if name.split("__")[0] in segment_specs}
+
+    os.makedirs(state_dir, exist_ok=True)
+    manifest = load_manifest(state_dir)
+    if (manifest is None or manifest["state_version"] != STATE_VERSION
+            or manifest["specs"] != _spec_key(specs)
+            or os.path.getsize(path) < manifest["offset"]
+            or _tail_digest(path, manifest["offset"]) != manifest["tail_digest"]):
+        manifest = {"state_version": STATE_VERSION, "specs": _spec_key(specs), "offset": 0, "rows": 0,
+                    "watermark": {"Transaction_Date": None, "Transaction_ID": None},
+                    "spending_bounds": None}
+        state, spent, baskets, olap = {}, quantiles.ExactQuantiles(), basket.CoOccurrence.empty(), None
+    else:
+        state, spent, baskets, olap = _load_state(state_dir, manifest)
+
+    # both passes read up to the same end, whatever is appended meanwhile
+    end = complete_end(path)
+    watermark = dict(manifest["watermark"])
+    since = None if watermark["Transaction_Date"] is None else pd.Timestamp(watermark["Transaction_Date"])
+
+    # pass 1 over the delta: Total_Spent distribution
+    delta_rows = late_rows = 0
+    for chunk in read_from(path, manifest["offset"], end, chunksize):
+        delta_rows += len(chunk)
+        sections.drop_undated(chunk)
+        if since is not None:
+            late_rows += int((chunk["Transaction_Date"] < since).sum())
+        spent.update(chunk["Unit_Price"] * chunk["Quantity"])
+        baskets.update(chunk)
+
+    bounds = manifest["spending_bounds"]
+    exact_bounds = [float(spent.quantile(q)) for q in (0.25, 0.75)]
+    rebuild_segments = False
+    if bounds is None or _drifted(spent, bounds, exact_bounds, segment_tolerance):
+        rebuild_segments = bounds is not None
+        bounds = exact_bounds
+
+    # pass 2 over the delta: fold the partial aggregates
+    fold = {name: spec for name, spec in partial.items() if not (rebuild_segments and name in segment_partial)}
+    for chunk in read_from(path, manifest["offset"], end, chunksize):
+        sections.drop_undated(chunk)
+        sections.enrich(chunk, bounds)
+        streaming.merge(state, aggregate.aggregate(chunk, fold), fold)
+        part = cube.build(chunk, specs)
+        olap = part if olap is None else cube.merge(olap, part)
+        latest, highest = chunk["Transaction_Date"].max(), chunk["Transaction_ID"].max()
+        if pd.notna(latest) and (watermark["Transaction_Date"] is None
+                                 or latest > pd.Timestamp(watermark["Transaction_Date"])):
+            watermark["Transaction_Date"] = latest.isoformat()
+        if pd.notna(highest):
+            watermark["Transaction_ID"] = max(int(highest), watermark["Transaction_ID"] or 0)
+
+    if rebuild_segments:
+        for name in segment_partial:
+            state.pop(name, None)
+        segment_cube = None
+        for chunk in read_from(path, 0, end, chunksize):
+            sections.drop_undated(chunk)
+            sections.enrich(chunk, bounds)
+            streaming.merge(state, aggregate.aggregate(chunk, segment_partial), segment_partial)
+            part = cube.build(chunk, {name: specs[name] for name in segment_specs})
+            segment_cube = part if segment_cube is None else cube.merge(segment_cube, part)
+        if segment_cube is not None:
+            olap = cube.Cube({**olap.tables, **segment_cube.tables}, olap.dtypes)
+
+    manifest.update({
+        "offset": end,
+        "rows": manifest["rows"] + delta_rows,
+        "tail_digest": _tail_digest(path, end),
+        "watermark": watermark,
+        "spending_bounds": [float(b) for b in bounds],
+        "last_refresh": {"delta_rows": delta_rows, "late_rows": late_rows, "rebuilt_segments": rebuild_segments,
+                         "segment_drift": float(_drift(spent, bounds, exact_bounds))},
+    })
+    if delta_rows or rebuild_segments:
+        _save_state(state_dir, manifest, state, spent, baskets, olap)
+    return sections.report(streaming.finalize(state, specs, _CATEGORICAL), baskets=baskets)
@@ -0,0 +1,158 @@
+"""Loading the transactions file and fingerprinting it for cache keys.
+
+The CSV is parsed once against a declared schema (categoricals for the text
+columns, compact ints, dates parsed on read). An integer column with blank
+cells stays float64 with NaN, as an untyped read gives, so section 8 can
+report them. The typed frame is then kept as an uncompressed Feather
+snapshot next to the source, and later loads memory-map that snapshot
+instead of parsing the CSV again.
+"""
+import hashlib
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from analysis import profiling
+
+DATA_PATH = "./data/e_commerce_data.csv"
+
+SCHEMA = {
+    "Customer_ID": "int32",
+    "Transaction_ID": "int32",
+    "Product_Category": "category",
+    "Product_Name": "category",
+    "Quantity": "int16",
+    "Unit_Price": "float64",
+    "Payment_Method": "category",
+    "Region": "category",
+    "Gender": "category",
+    "Age": "int8",
+    "Unit_Cost": "float64",
+}
+DATE_COLUMNS = ["Transaction_Date"]
+# Integer columns are parsed as float64, so a blank cell reads as NaN rather
+# than failing the load; conform() then narrows every column without blanks.
+PARSE_DTYPES = {column: "float64" if dtype.startswith("int") else dtype for column, dtype in SCHEMA.items()}
+
+_digests = {}
+
+
+def source_fingerprint(path=DATA_PATH):
+    """Return a key that changes whenever the file at `path` changes.
+
+    The key is the file's mtime plus a sha256 of its content. The hash is only
+    recomputed when mtime or size move, so calling this on every rerun is cheap.
+    For a dataset directory the key hashes the name, size and mtime of every
+    file under it instead, without reading them.
+    """
+    if os.path.isdir(path):
+        listing = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                listing.update(f"{os.path.relpath(os.path.join(root, name), path)}\0{stat.st_size}\0"
+                               f"{stat.st_mtime_ns}\n".encode())
+        return f"dir-{listing.hexdigest()}"
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _digests:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        _digests[key] = sha.hexdigest()
+    return f"{stat.st_mtime_ns}-{_digests[key]}"
+
+
+def stem(path):
+    """What the stores derived from the source at `path` are named after.
+
+    A file's path without its extension, or a directory's own path, so the
+    stores of data/x.csv and of its dataset data/x.dataset do not collide.
+    """
+    if os.path.isdir(path):
+        return os.path.normpath(path)
+    return os.path.splitext(path)[0]
+
+
+def conform(df):
+    """Narrow the integer columns to their SCHEMA dtype and make sure the date columns are dates.
+
+    An integer column with blanks stays float64. A date that cannot be parsed
+    would leave its whole column as strings, so it is read as NaT instead; the
+    valid_date rule quarantines that row (see sections.drop_undated()).
+    """
+    for column, dtype in SCHEMA.items():
+        if dtype.startswith("int") and column in df and df[column].dtype != dtype and not df[column].isna().any():
+            df[column] = df[column].astype(dtype)
+    for column in DATE_COLUMNS:
+        if column in df and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = pd.to_datetime(df[column], errors="coerce")
+    return df
+
+
+def read_csv(path, **kwargs):
+    """Parse a transactions CSV against SCHEMA."""
+    return conform(pd.read_csv(path, dtype=PARSE_DTYPES, parse_dates=DATE_COLUMNS, engine="pyarrow", **kwargs))
+
+
+def read_csv_chunks(source, chunksize, **kwargs):
+    """Parse a transactions CSV (a path or an open file) against SCHEMA, `chunksize` rows at a time."""
+    with pd.read_csv(source, dtype=PARSE_DTYPES, parse_dates=DATE_COLUMNS, chunksize=chunksize, **kwargs) as reader:
+        for chunk in reader:
+            yield conform(chunk)
+
+
+def snapshot_path(path):
+    return os.path.splitext(path)[0] + ".feather"
+
+
+def _snapshot_fingerprint(snapshot):
+    try:
+        with pa.memory_map(snapshot) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    return metadata.get(b"source_fingerprint", b"").decode()
+
+
+def write_snapshot(df, snapshot, fingerprint):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        b"source_fingerprint": fingerprint.encode(),
+    })
+    tmp = snapshot + ".tmp"
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, snapshot)
+
+
+@profiling.instrument
+def load_data(path=DATA_PATH, snapshot=True):
+    """Load the transactions at `path` as a typed frame.
+
+    Parquet and Feather inputs are read directly. For a CSV, a Feather
+    snapshot is written on first load and memory-mapped on later loads, as
+    long as the CSV's fingerprint still matches the one stored in it.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if os.path.isdir(path):
+        # Hive-style Year=/Month= directories are not read back as columns; enrich() derives them
+        return pd.read_parquet(path, memory_map=True, partitioning=None)
+    if ext == ".parquet":
+        return pd.read_parquet(path, memory_map=True)
+    if ext == ".feather":
+        return feather.read_feather(path, memory_map=True)
+    if not snapshot:
+        return read_csv(path)
+
+    fingerprint = source_fingerprint(path)
+    snap = snapshot_path(path)
+    if _snapshot_fingerprint(snap) == fingerprint:
+        return feather.read_feather(snap, memory_map=True)
+    df = read_csv(path)
+    write_snapshot(df, snap, fingerprint)
+    return df
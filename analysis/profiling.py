@@ -0,0 +1,157 @@
+"""Per-step instrumentation of the pipeline, and its console output.
+
+Steps are named with step() or the @instrument decorator. They only cost
+anything inside a profile() block, which records the wall time, rows in and
+out and peak traced memory above the step's starting point for each one:
+
+    with profiling.profile() as prof:
+        sections.run_all(df)
+    prof.save("profile.json")
+
+Printing whole frames to the console is slow on large inputs, so show()
+prints a one-line shape summary unless ANALYSIS_PRINT_FRAMES=1 is set.
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import time
+import tracemalloc
+
+import pandas as pd
+
+PRINT_FRAMES = os.environ.get("ANALYSIS_PRINT_FRAMES", "0") not in ("", "0")
+PROFILE_PATH = os.environ.get("ANALYSIS_PROFILE")
+
+COLUMNS = ["step", "depth", "seconds", "rows_in", "rows_out", "peak_memory_mb"]
+
+_active = contextvars.ContextVar("profile", default=None)
+
+
+def rows(obj):
+    """Row count of a frame, or the total over a dict/tuple of frames; None otherwise."""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj)
+    if isinstance(obj, dict):
+        obj = obj.values()
+    if isinstance(obj, (tuple, list, type({}.values()))):
+        counts = [n for n in map(rows, obj) if n is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+class Profile:
+    """The steps recorded in one profile() block, in the order they started.
+
+    `depth` is the number of enclosing steps, so nested steps can be told
+    apart from top-level ones when summing times. Memory is measured with
+    tracemalloc, which roughly doubles the run time; memory=False records
+    timings and row counts only.
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.steps = []
+        self._open = []
+
+    def _peak(self):
+        # reset_peak() is global, so fold the peak so far into every open step first
+        peak = tracemalloc.get_traced_memory()[1]
+        for record in self._open:
+            record["_peak"] = max(record["_peak"], peak)
+
+    @contextlib.contextmanager
+    def step(self, name, rows_in=None):
+        record = {"step": name, "depth": len(self._open), "rows_in": rows_in, "rows_out": None}
+        self.steps.append(record)
+        if self.memory:
+            self._peak()
+            tracemalloc.reset_peak()
+            record["_start"] = record["_peak"] = tracemalloc.get_traced_memory()[0]
+        self._open.append(record)
+        clock = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - clock
+            self._open.remove(record)
+            if self.memory:
+                self._peak()
+                record["_peak"] = max(record["_peak"], tracemalloc.get_traced_memory()[1])
+                record["peak_memory_mb"] = (record.pop("_peak") - record.pop("_start")) / 2**20
+            else:
+                record["peak_memory_mb"] = None
+
+    def add(self, name, seconds, steps=()):
+        """Record a step that ran elsewhere, e.g. in a worker, with the `steps` profiled inside it."""
+        depth = len(self._open)
+        self.steps.append({"step": name, "depth": depth, "rows_in": None, "rows_out": None, "seconds": seconds,
+                           "peak_memory_mb": None})
+        self.steps += [{**record, "depth": record["depth"] + depth + 1} for record in steps]
+
+    def frame(self):
+        return pd.DataFrame(self.steps, columns=COLUMNS)
+
+    def to_json(self):
+        return json.dumps({"steps": [{column: record.get(column) for column in COLUMNS} for record in self.steps]},
+                          indent=2)
+
+    def save(self, path):
+        with open(path + ".tmp", "w") as f:
+            f.write(self.to_json())
+        os.replace(path + ".tmp", path)
+
+
+@contextlib.contextmanager
+def profile(memory=True):
+    """Record every step run inside the block; yields the Profile."""
+    prof = Profile(memory)
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    token = _active.set(prof)
+    try:
+        yield prof
+    finally:
+        _active.reset(token)
+        if started:
+            tracemalloc.stop()
+
+
+def active():
+    """The Profile of the innermost profile() block in this context, or None."""
+    return _active.get()
+
+
+def step(name, rows_in=None):
+    """Context manager timing `name` in the active profile; yields its record dict."""
+    prof = _active.get()
+    return prof.step(name, rows_in) if prof is not None else contextlib.nullcontext({})
+
+
+def instrument(func=None, *, name=None):
+    """Decorator recording a call as a step, with rows taken from the first argument and the result."""
+    if func is None:
+        return functools.partial(instrument, name=name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _active.get() is None:
+            return func(*args, **kwargs)
+        with step(name or func.__name__, rows(args[0]) if args else None) as record:
+            result = func(*args, **kwargs)
+            record["rows_out"] = rows(result)
+        return result
+
+    return wrapper
+
+
+def show(obj):
+    """Print a frame in full if ANALYSIS_PRINT_FRAMES is set, else just its shape."""
+    if PRINT_FRAMES or not isinstance(obj, (pd.DataFrame, pd.Series)):
+        print(obj)
+    elif isinstance(obj, pd.DataFrame):
+        print(f"[{obj.shape[0]} rows x {obj.shape[1]} columns]")
+    else:
+        print(f"[{len(obj)} rows]")
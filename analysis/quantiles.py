@@ -0,0 +1,132 @@
+"""Mergeable quantile backends for spending segmentation and outlier checks.
+
+Every backend has the same small interface: update() with a batch of values,
+merge() with another instance, and quantile(q). Instances built from
+different chunks or partitions can be merged, so the Spending_Segment bounds
+and the section 8 outlier thresholds come out of a single pass.
+
+"exact" keeps value counts and matches pandas' Series.quantile exactly; its
+memory grows with the number of distinct values. "kll" is a KLL sketch whose
+memory is O(1/epsilon) and whose answers are within `epsilon` in rank of the
+exact ones (with high probability).
+
+Like pandas, every backend answers NaN while it has seen no values.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_BACKEND = "exact"
+
+
+class ExactQuantiles:
+    """Exact quantiles from merged value counts, interpolated like pandas."""
+
+    def __init__(self):
+        self.counts = pd.Series(dtype=np.int64)
+
+    def update(self, values):
+        values = pd.Series(np.asarray(values)).dropna()
+        self.counts = self.counts.add(values.value_counts(), fill_value=0)
+        return self
+
+    def merge(self, other):
+        self.counts = self.counts.add(other.counts, fill_value=0)
+        return self
+
+    @property
+    def n(self):
+        return int(self.counts.sum())
+
+    def quantile(self, q):
+        return weighted_quantile(self.counts.index.to_numpy(), self.counts.to_numpy(), q)
+
+
+class KLLSketch:
+    """KLL quantile sketch (Karnin, Lang & Liberty, 2016).
+
+    Level h holds items of weight 2**h. When a level outgrows its capacity it
+    is sorted and every other item, starting at a random offset, is promoted
+    to the next level. `epsilon` is the target rank error; k is derived from
+    it as k = 2.5/epsilon, which keeps the measured rank error of merged
+    sketches comfortably under epsilon.
+    """
+
+    def __init__(self, epsilon=0.01, seed=0):
+        self.epsilon = epsilon
+        self.k = max(8, math.ceil(2.5 / epsilon))
+        self.levels = [np.empty(0)]
+        self.n = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # an odd item stays behind so no weight is lost
+                keep, items = (items[-1:], items[:-1]) if len(items) % 2 else (items[:0], items)
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.n += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        if not self.n:
+            return np.nan
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        rank = q * (cumulative[-1] - 1)
+        return items[order][np.searchsorted(cumulative, rank, side="right")]
+
+
+BACKENDS = {"exact": ExactQuantiles, "kll": KLLSketch}
+
+
+def make(backend=DEFAULT_BACKEND, **options):
+    """Return an empty quantile summary for `backend` ("exact" or "kll")."""
+    try:
+        cls = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"unknown quantile backend {backend!r}, expected one of {sorted(BACKENDS)}")
+    return cls(**options)
+
+
+def weighted_quantile(values, counts, q):
+    """Quantile of `values` repeated `counts` times, interpolated like pandas; NaN when there are none."""
+    if not np.sum(counts):
+        return np.nan
+    order = np.argsort(values, kind="stable")
+    values, cumulative = np.asarray(values)[order], np.cumsum(np.asarray(counts)[order])
+    position = (cumulative[-1] - 1) * q
+    lo, hi = int(np.floor(position)), int(np.ceil(position))
+    v_lo = values[np.searchsorted(cumulative, lo, side="right")]
+    v_hi = values[np.searchsorted(cumulative, hi, side="right")]
+    return v_lo + (v_hi - v_lo) * (position - lo)
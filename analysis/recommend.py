@@ -0,0 +1,86 @@
+"""Cross-sell and up-sell suggestion columns for section 7.
+
+Both columns are built in one vectorized pass: each suggestion table is
+looked up once per distinct product, then broadcast to the rows through the
+product codes and masked by Spending_Segment.
+
+Section 7 starts from the curated cross_sell_suggestions and replaces an
+entry only where the baskets hold a strong rule (analysis.basket).
+"""
+import numpy as np
+import pandas as pd
+
+upsell_suggestions = {
+    "Biography": "Collector's Edition Biography","Camera": "Mirrorless Camera",
+    "Candle": "Scented Candle Set","Cookbook": "Premium Cookbook with Video Tutorials",
+    "Curtains": "Designer Curtains", "Dress": "Evening Gown",
+    "Foundation": "Long-Lasting Foundation","Headphones": "Noise-Canceling Headphones",
+    "Jacket": "Leather Jacket ","Jeans": "Designer Jeans",
+    "Lamp": "Smart Lamp ","Laptop": "Premium Business Laptop",
+    "Lipstick": "Luxury Lipstick Set","Mascara": "Waterproof Mascara",
+    "Misc": "Personalized Miscellaneous Items","Novel": "Special Edition or Signed Copy",
+    "Perfume": "Limited Edition Perfume","Smartphone": "Premium Smartphone Model",
+    "T-Shirt": "Branded T-Shirt","Textbook": "Annotated Edition ",
+    "Vase": "Handcrafted Vase"}
+
+cross_sell_suggestions = {
+    "Biography":"Bookmark","Camera":"Camera Bag",
+    "Candle":"Candle Holder","Cookbook":"Recipe Notebook",
+    "Curtains":"Matching Cushions","Dress":"Jewelry",
+    "Foundation":"Makeup Brush","Headphones":"Headphone Case",
+    "Jacket":"Scarf","Jeans":"Belt",
+    "Lamp":"Light Bulb","Laptop":"Laptop Bag",
+    "Lipstick":"Lip Balm","Mascara":"Eyeliner",
+    "Misc":"Personalized Accessories","Novel":"Bookmark",
+    "Perfume":"Body Lotion","Smartphone":"Screen Protector",
+    "T-Shirt":"Sneakers","Textbook":"Notebook",
+    "Vase": "Flowers"}
+
+# which spending segments each kind of suggestion is offered to
+CROSS_SELL_SEGMENTS = ["Medium", "Low"]
+UP_SELL_SEGMENTS = ["High"]
+
+
+def as_mapping(table):
+    """Accept a dict, a Series indexed by product, or a two-column frame."""
+    if isinstance(table, pd.DataFrame):
+        return dict(zip(table.iloc[:, 0], table.iloc[:, 1]))
+    if isinstance(table, pd.Series):
+        return table.to_dict()
+    return dict(table)
+
+
+def _lookup(product_codes, products, table, mask):
+    # one dict lookup per distinct product, then a take over the row codes
+    suggestion = pd.Index(products).map(as_mapping(table))
+    codes, uniques = pd.factorize(suggestion)
+    codes = np.append(codes, -1)  # product code -1 (missing name) -> no suggestion
+    out = codes[product_codes]
+    out[~mask] = -1
+    return pd.Categorical.from_codes(out, uniques)
+
+
+def cross_sell_with(mined):
+    """The curated cross-sell table, with the products in `mined` pointed at their mined suggestion."""
+    return {**cross_sell_suggestions, **as_mapping(mined)}
+
+
+def suggestions(df, upsell=None, cross_sell=None):
+    """Return the (cross_sell_suggestions, Up_sell_Suggestions) columns for `df`.
+
+    `upsell` and `cross_sell` default to the built-in tables and can be any
+    product -> suggestion mapping accepted by as_mapping().
+    """
+    upsell = upsell_suggestions if upsell is None else upsell
+    cross_sell = cross_sell_suggestions if cross_sell is None else cross_sell
+
+    names = df["Product_Name"]
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        product_codes, products = names.cat.codes.to_numpy(), names.cat.categories
+    else:
+        product_codes, products = pd.factorize(names)
+    segment = df["Spending_Segment"].to_numpy()
+
+    cross = _lookup(product_codes, products, cross_sell, np.isin(segment, CROSS_SELL_SEGMENTS))
+    up = _lookup(product_codes, products, upsell, np.isin(segment, UP_SELL_SEGMENTS))
+    return pd.Series(cross, index=df.index), pd.Series(up, index=df.index)
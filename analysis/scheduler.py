@@ -0,0 +1,321 @@
+"""A small DAG scheduler for running the pipeline's independent steps in parallel.
+
+Each Node declares the named values it reads (`inputs`) and the ones it
+produces (`outputs`). run() starts every node whose inputs are available on a
+thread or process pool and records a wall-clock timing per node. Output a
+node prints is captured and replayed in declaration order, so the console
+report reads the same as a serial run. Inside a profiling.profile() block
+every node is a step; the active profile is not visible in a pool's threads
+or processes, so a pooled node records its steps in a profile of its own and
+run() files them under the node afterwards.
+
+The enriched transactions frame is the only large value. With a process pool
+it is not pickled to every worker: share_frame() writes it once as an
+uncompressed Arrow IPC file (on /dev/shm when available), and each worker
+memory-maps only the columns its node needs.
+
+pipeline_nodes() describes the report as a graph. The groupbys are split into
+independent aggregate families (a scanned key set plus the key sets rolled
+up from it), then sections 2-6 depend only on the families they read.
+Sections 1, 7 and 8 touch the row-level frame and run in the coordinating
+process.
+"""
+import collections
+import contextlib
+import functools
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from analysis import aggregate, profiling, sections, timeseries
+
+Node = collections.namedtuple("Node", "name func inputs outputs local", defaults=(False,))
+
+SharedFrame = collections.namedtuple("SharedFrame", "path")
+
+
+def share_frame(df, directory=None):
+    """Write `df` to an Arrow IPC file workers can memory-map; returns a handle."""
+    if directory is None:
+        directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    fd, path = tempfile.mkstemp(suffix=".arrow", dir=directory)
+    os.close(fd)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return SharedFrame(path)
+
+
+def load_frame(frame, columns=None):
+    """Return a DataFrame for `frame`, mapping only `columns` of a SharedFrame."""
+    if not isinstance(frame, SharedFrame):
+        return frame if columns is None else frame[columns]
+    with pa.memory_map(frame.path) as source:
+        table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return table.to_pandas()
+
+
+class _NodeStdout(io.TextIOBase):
+    """sys.stdout stand-in that keeps each thread's prints apart."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer or self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+_stdout_lock = threading.Lock()
+_stdout = None
+_stdout_users = 0
+
+
+@contextlib.contextmanager
+def _node_stdout():
+    """One _NodeStdout in place of sys.stdout for as long as any run() has nodes on threads.
+
+    sys.stdout is process-wide, so concurrent runs (two dashboard sessions,
+    say) share a single stand-in instead of each swapping in its own and
+    restoring the other's on the way out. Threads that are not running a node
+    write through to the original stream.
+    """
+    global _stdout, _stdout_users
+    with _stdout_lock:
+        if _stdout_users == 0:
+            _stdout = sys.stdout = _NodeStdout(sys.stdout)
+        _stdout_users += 1
+        stdout = _stdout
+    try:
+        yield stdout
+    finally:
+        with _stdout_lock:
+            _stdout_users -= 1
+            if _stdout_users == 0:
+                sys.stdout, _stdout = _stdout.stream, None
+
+
+@contextlib.contextmanager
+def quiet():
+    """Discard what the current thread prints, leaving every other thread's output alone.
+
+    contextlib.redirect_stdout() would swap sys.stdout for the whole process,
+    silencing a dashboard session or server thread that happens to print
+    meanwhile; this buffers the calling thread only, through _node_stdout().
+    """
+    with _node_stdout() as stdout:
+        previous = getattr(stdout.local, "buffer", None)
+        stdout.local.buffer = io.StringIO()
+        try:
+            yield
+        finally:
+            stdout.local.buffer = previous
+
+
+def _execute(func, kwargs, capture, stdout=None, memory=None):
+    """Run one node; (outputs, printed text, timing, profiled steps).
+
+    A worker process captures the node's prints (`capture`); a pool thread
+    writes them to its buffer in `stdout`; a serial run lets them through.
+    With `memory` set, the node's steps are recorded in a profile of its own.
+    """
+    start, clock = time.time(), time.perf_counter()
+    text = ""
+    with profiling.profile(memory) if memory is not None else contextlib.nullcontext() as prof:
+        if capture:
+            with contextlib.redirect_stdout(io.StringIO()) as log:
+                outputs = func(**kwargs)
+            text = log.getvalue()
+        elif stdout is not None:
+            previous = getattr(stdout.local, "buffer", None)
+            log = stdout.local.buffer = io.StringIO()
+            try:
+                outputs = func(**kwargs)
+            finally:
+                stdout.local.buffer = previous
+            text = log.getvalue()
+        else:
+            outputs = func(**kwargs)
+    timing = {"start": start, "seconds": time.perf_counter() - clock,
+              "worker": f"{os.getpid()}/{threading.current_thread().name}"}
+    return outputs, text, timing, prof.steps if prof is not None else []
+
+
+def run(nodes, values, executor="thread", workers=None):
+    """Run `nodes` over the initial `values` dict.
+
+    `executor` is "thread", "process" or None (serial, in declaration order).
+    Returns (values, timings) where timings has one entry per node with its
+    start offset, duration and worker, in declaration order.
+    """
+    values = dict(values)
+    pending = {node.name: node for node in nodes}
+    logs, timings, steps = {}, {}, {}
+    workers = workers or os.cpu_count()
+    pool = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}[executor](workers) if executor else None
+    local = ThreadPoolExecutor(1) if executor else None
+    # a serial run records each node as a step of the active profile directly; pool workers
+    # cannot see it, so they profile without memory (tracemalloc's peak is process-wide)
+    prof = profiling.active()
+    memory = None if prof is None or pool is None else False
+    started = time.time()
+    try:
+        with _node_stdout() if pool is not None else contextlib.nullcontext() as stdout:
+            running = {}
+            while pending or running:
+                for name, node in list(pending.items()):
+                    if not all(key in values for key in node.inputs):
+                        continue
+                    del pending[name]
+                    kwargs = {key: values[key] for key in node.inputs}
+                    if pool is None:
+                        with profiling.step(name):
+                            running[name] = _completed(_execute(node.func, kwargs, False))
+                    elif node.local or executor == "thread":
+                        target = local if node.local else pool
+                        running[name] = target.submit(_execute, node.func, kwargs, False, stdout, memory)
+                    else:
+                        running[name] = pool.submit(_execute, node.func, kwargs, True, None, memory)
+                if not running:
+                    raise ValueError(f"unsatisfiable inputs for {sorted(pending)}")
+                done, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+                for name, future in list(running.items()):
+                    if future in done:
+                        outputs, logs[name], timing, steps[name] = future.result()
+                        timings[name] = {**timing, "start": timing["start"] - started}
+                        values.update(outputs)
+                        del running[name]
+    finally:
+        for executor_ in (pool, local):
+            if executor_ is not None:
+                executor_.shutdown()
+    for node in nodes:
+        print(logs[node.name], end="")
+        if memory is not None:
+            prof.add(node.name, timings[node.name]["seconds"], steps[node.name])
+    return values, [{"node": node.name, **timings[node.name]} for node in nodes]
+
+
+def _completed(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def _aggregate_family(frame, specs):
+    columns = sorted({key for keys, _ in specs.values() for key in keys}
+                     | {column for _, measures in specs.values() for column, _ in measures.values()})
+    return aggregate.aggregate(load_frame(frame, columns), specs)
+
+
+def _section(func, df=None, **tables):
+    return func(df, tables)
+
+
+def _revenue_growth(df, upsell, cross_sell, **tables):
+    out = sections.revenue_growth(df, tables, upsell, cross_sell)
+    return {**out, "suggested_frame": df}
+
+
+def _potential_issues(suggested_frame, undated, thresholds=None):
+    issues, ordered = sections.potential_issues(suggested_frame, thresholds, undated)
+    return {**issues, "ordered_frame": ordered}
+
+
+def families(df, specs):
+    """Split `specs` into groups that can be aggregated independently.
+
+    Each group is a key set that needs a row scan plus every key set the
+    aggregation engine would roll up from it.
+    """
+    keysets = list(dict.fromkeys(tuple(keys) for keys, _ in specs.values()))
+    columns = {key for keys in keysets for key in keys}
+    sizes = {key: len(df[key].cat.categories) if isinstance(df[key].dtype, pd.CategoricalDtype)
+             else df[key].nunique() for key in columns}
+    parents = aggregate.plan(keysets, lambda keys: int(np.prod([sizes[k] for k in keys])))
+    roots = {}
+    for keys in keysets:
+        root = keys
+        while parents[root] is not None:
+            root = parents[root]
+        roots[keys] = root
+    groups = collections.defaultdict(dict)
+    for name, (keys, measures) in specs.items():
+        groups[roots[tuple(keys)]][name] = (keys, measures)
+    return list(groups.values())
+
+
+SECTIONS = [
+    ("customer_behavior", sections.customer_behavior, ["customers", "demographics"]),
+    ("product_performance", sections.product_performance, ["products", "categories"]),
+    ("temporal_patterns", sections.temporal_patterns, ["months", "seasons", "product_days"]),
+    ("location_insights", sections.location_insights, ["regions", "region_categories"]),
+    ("payment_trends", sections.payment_trends, ["payment_methods", "payment_segments", "region_payments"]),
+    ("demographics", sections.demographics, ["age_segments", "gender_products", "demographics"]),
+]
+
+# what each section returns, so the graph can be wired without running it
+SECTION_OUTPUTS = {
+    "customer_behavior": ["Number_of_trans", "high_frequency_buyers", "spending_segment", "df_filtered"],
+    "product_performance": ["Top_selling", "top_selling", "popular_categories", "categories_sales", "profitability"],
+    "temporal_patterns": ["sales_trends", "sales_trends_by_season", "sales", *timeseries.BUCKETS],
+    "location_insights": ["Sales_by_region", "Categories_preferences"],
+    "payment_trends": ["common_PM", "payment_methods", "segment_count", "pivot_table", "payment_method"],
+    "demographics": ["Spending_based_on_age", "Gender_preferences", "gender_preferences", "Top_Product_by_Gender",
+                     "Males_preferences", "Females_preferences", "behavior_analysis"],
+}
+
+
+def pipeline_nodes(df, specs=None):
+    """The report as a graph over the initial values "df", "frame", "upsell" and "cross_sell"."""
+    specs = sections.AGGREGATES if specs is None else specs
+    nodes = []
+    for group in families(df, specs):
+        name = "aggregate:" + "+".join(group)
+        nodes.append(Node(name, functools.partial(_aggregate_family, specs=group), ["frame"], list(group)))
+    for name, func, inputs in SECTIONS:
+        local = name == "customer_behavior"
+        node_inputs = (["df"] if local else []) + inputs
+        nodes.append(Node(name, functools.partial(_section, func), node_inputs, SECTION_OUTPUTS[name], local))
+    # section 7 adds the suggestion columns to df, so it waits for section 1's reads of it
+    nodes.append(Node("revenue_growth", _revenue_growth,
+                      ["df", "upsell", "cross_sell", "segment_customers", "regions", "spending_segment"],
+                      ["high_spenders", "contribution", "association_rules", "suggested_frame"], local=True))
+    nodes.append(Node("potential_issues", _potential_issues, ["suggested_frame", "undated"],
+                      ["missing_values", "quantity_outliers", "unit_price_outliers", "validation", "quarantine",
+                       "ordered_frame"], local=True))
+    return nodes
+
+
+def run_all(df, upsell=None, cross_sell=None, executor="process", workers=None):
+    """Parallel counterpart of sections.run_all(); returns (ordered frame, tables, timings)."""
+    start = time.perf_counter()
+    undated = sections.drop_undated(df)
+    sections.enrich(df)
+    enrich_seconds = time.perf_counter() - start
+    frame = share_frame(df) if executor == "process" else df
+    try:
+        initial = {"df": df, "frame": frame, "upsell": upsell, "cross_sell": cross_sell, "undated": undated}
+        values, timings = run(pipeline_nodes(df), initial, executor, workers)
+    finally:
+        if isinstance(frame, SharedFrame):
+            os.remove(frame.path)
+    timings.insert(0, {"node": "enrich", "start": 0.0, "seconds": enrich_seconds, "worker": f"{os.getpid()}/main"})
+    names = [name for outputs in SECTION_OUTPUTS.values() for name in outputs]
+    names += ["high_spenders", "contribution", "association_rules", "missing_values", "quantity_outliers",
+              "unit_price_outliers", "validation", "quarantine"]
+    return values["ordered_frame"], {name: values[name] for name in names}, timings
@@ -0,0 +1,387 @@
+"""Sections 1-8 of the analysis.
+
+enrich() adds the derived columns every section relies on. All the groupbys
+are declared once in AGGREGATES and computed together by the aggregation
+engine; each section function then shapes those tables (sorting, idxmax
+picks, filters) and returns a dict of result tables keyed by the names the
+console report and the dashboard use.
+"""
+import pandas as pd
+
+from analysis import aggregate, basket, profiling, recommend, timeseries, validation
+
+month_to_season = {
+    1: 'Winter', 2: 'Winter', 3: 'Winter',
+    4: 'Spring', 5: 'Spring', 6: 'Spring',
+    7: 'Summer', 8: 'Summer', 9: 'Summer',
+    10: 'Fall', 11: 'Fall', 12: 'Fall'
+    }
+
+
+def drop_undated(df):
+    """Remove the rows without a Transaction_Date from `df` in place and return them.
+
+    Dates that could not be parsed are read as NaT. Those rows go to the
+    quarantine through the valid_date rule and are left out of every section.
+    """
+    undated = df["Transaction_Date"].isna().to_numpy()
+    if not undated.any():
+        return df.iloc[:0]
+    rows = df[undated]
+    df.drop(index=df.index[undated], inplace=True)
+    return rows
+
+
+@profiling.instrument
+def enrich(df, spending_bounds=None):
+    """Add the per-transaction columns from sections 1-3 to `df` in place.
+
+    `spending_bounds` is the (25th, 75th) percentile pair of Total_Spent used
+    for Spending_Segment. It defaults to the percentiles of `df` itself; the
+    streaming path passes the ones of the whole dataset.
+    """
+    df['Total_Spent']=df["Unit_Price"]* df["Quantity"]
+
+    if spending_bounds is None:
+        spending_bounds = df['Total_Spent'].quantile([0.25, 0.75]).tolist()
+    low, high = spending_bounds
+    df['Spending_Segment']='Medium'
+    df.loc[df['Total_Spent']<=low,'Spending_Segment']='Low'
+    df.loc[df['Total_Spent']>high,'Spending_Segment']='High'
+
+    df['Age_Segment']='Adult'
+    df.loc[df['Age']<18,'Age_Segment']=' Below 18'
+    df.loc[(df ['Age']>18) & (df ['Age']<=35),'Age_Segment']='Young Adult'
+    df.loc[df['Age']>50,'Age_Segment']="Senior"
+
+    df['Demographics_Segment']=df['Gender'].astype(str)+" "+df['Age_Segment']
+
+    df['profit']=df['Unit_Price']-df['Unit_Cost']
+
+    df['Year']=df['Transaction_Date'].dt.year
+    df['Month']=df['Transaction_Date'].dt.month
+    df['Day']=df['Transaction_Date'].dt.day
+    df["Season"]=df['Month'].map(month_to_season)
+    return df
+
+
+spent = ("Total_Spent", "sum")
+
+AGGREGATES = {
+    "customers": (["Customer_ID"], {"Number_of_Transaction": ("Transaction_ID", "count"), "Total_Spent": spent}),
+    "segment_customers": (["Spending_Segment", "Customer_ID"], {"Total_Spent": spent}),
+    "demographics": (["Demographics_Segment"], {
+        "Avg_Spent": ("Total_Spent", "mean"), "Median_Spent": ("Total_Spent", "median"),
+        "Total_Spent": spent, "Number_Of_Customer": ("Customer_ID", "count")}),
+    "products": (["Product_Name"], {"Quantity": ("Quantity", "sum"), "Total_Spent": spent, "profit": ("profit", "sum")}),
+    "categories": (["Product_Category"], {"Total_products": ("Product_Name", "count"), "Total_Spent": spent}),
+    "months": (["Year", "Month"], {"Total_Spent": spent}),
+    "seasons": (["Season"], {"Total_Spent": spent}),
+    "product_days": (["Product_Name", "Transaction_Date"], {"Total_Spent": spent}),
+    "regions": (["Region"], {"Total_Spent": spent}),
+    "region_categories": (["Region", "Product_Category"], {"Total_Spent": spent}),
+    "payment_methods": (["Payment_Method"], {"Total_Spent": spent}),
+    "payment_segments": (["Payment_Method", "Spending_Segment"], {"Count": ("Transaction_ID", "size")}),
+    "region_payments": (["Region", "Payment_Method"], {"Total_Spent": spent}),
+    "age_segments": (["Age_Segment"], {"Total_Spent": spent}),
+    "gender_products": (["Gender", "Product_Name"], {"Total_Spent": spent}),
+}
+
+
+# 1. Customer Behavior Analysis
+@profiling.instrument
+def customer_behavior(df, agg):
+    Number_of_trans=agg["customers"][["Customer_ID",'Number_of_Transaction']]
+    Number_of_trans=Number_of_trans.sort_values("Number_of_Transaction",ascending=False)
+    print("The total Number of Transactions for each Customer :")
+    profiling.show(Number_of_trans)
+
+    if df is not None and profiling.PRINT_FRAMES:
+        print(df.info())
+
+    mean=Number_of_trans['Number_of_Transaction'].mean()
+    high_frequency_buyers=Number_of_trans[Number_of_trans['Number_of_Transaction']>mean]
+    high_frequency_buyers=pd.merge(high_frequency_buyers,agg["customers"][["Customer_ID","Total_Spent"]],on="Customer_ID")
+    print("\nhigh frequency buyers:")
+    profiling.show(high_frequency_buyers)
+
+    spending_segment=None
+    if df is not None:
+        spending_segment=df[['Customer_ID', 'Total_Spent', 'Spending_Segment']]
+        profiling.show(spending_segment)
+        if profiling.PRINT_FRAMES:
+            print(df[['Customer_ID', 'Total_Spent','Age' ,'Age_Segment']])
+            print(df[['Customer_ID', 'Demographics_Segment','Total_Spent']])
+
+    df_filtered=agg["demographics"][['Demographics_Segment','Total_Spent']]
+    df_filtered=df_filtered.sort_values("Total_Spent",ascending=False)
+    profiling.show(df_filtered)
+
+    return {
+        "Number_of_trans": Number_of_trans,
+        "high_frequency_buyers": high_frequency_buyers,
+        "spending_segment": spending_segment,
+        "df_filtered": df_filtered,
+    }
+
+
+# 2. Product Performance
+@profiling.instrument
+def product_performance(df, agg):
+    top_selling=agg["products"].set_index('Product_Name')[["Quantity","Total_Spent"]]
+    Top_selling = top_selling.sort_values("Total_Spent",ascending=False)
+    print("\nThe Top selling Product are:")
+    profiling.show(Top_selling)
+
+    popular_categories=agg["categories"][["Product_Category",'Total_products']]
+    print("")
+    profiling.show(popular_categories)
+
+    categories_sales=agg["categories"][["Product_Category","Total_Spent"]]
+
+    profitability=agg["products"][["Product_Name","profit"]]
+    profitability = profitability.sort_values("profit",ascending=False).reset_index(drop=True)
+    print("\nProfitability Analyzation:")
+    profiling.show(profitability)
+
+    return {
+        "Top_selling": Top_selling,
+        "top_selling": top_selling,
+        "popular_categories": popular_categories,
+        "categories_sales": categories_sales,
+        "profitability": profitability,
+    }
+
+
+# 3. Temporal Patterns
+@profiling.instrument
+def temporal_patterns(df, agg):
+    sales_trends=agg["months"]
+    profiling.show(sales_trends)
+    sales_trends_by_totalspent=sales_trends.sort_values("Total_Spent",ascending=False).reset_index(drop=True)
+    peak_period = sales_trends_by_totalspent.iloc[0]
+    low_period=sales_trends_by_totalspent.iloc[-1]
+    print(f"the peak period is: \n{peak_period}\nthe low period is: \n{low_period}")
+
+    sales_trends_by_season=agg["seasons"].sort_values("Total_Spent",ascending=False).reset_index(drop=True)
+    print("\nSales trends by season:")
+    profiling.show(sales_trends_by_season)
+    peak_period_by_season = sales_trends_by_season.iloc[0]
+    low_period_by_season=sales_trends_by_season.iloc[-1]
+    print(f"the peak period is: \n{peak_period_by_season}\nthe low period is: \n{low_period_by_season}")
+
+    return {
+        "sales_trends": sales_trends,
+        "sales_trends_by_season": sales_trends_by_season,
+        "sales": agg["product_days"],
+        **timeseries.rollups(agg["product_days"]),
+    }
+
+
+# 4. Location-Based Insights
+@profiling.instrument
+def location_insights(df, agg):
+    Sales_by_region=agg["regions"].sort_values("Total_Spent",ascending=False).reset_index(drop=True)
+    print("\nSales performance by region:")
+    profiling.show(Sales_by_region)
+
+    Categories_preferences=agg["region_categories"]
+    Categories_preferences=Categories_preferences.loc[Categories_preferences.groupby("Region",observed=True)["Total_Spent"].idxmax()]
+    Categories_preferences = Categories_preferences.reset_index(drop=True)
+    print("\nProduct Categories preferences by region:")
+    profiling.show(Categories_preferences)
+
+    return {
+        "Sales_by_region": Sales_by_region,
+        "Categories_preferences": Categories_preferences,
+    }
+
+
+# 5. Payment Trends
+@profiling.instrument
+def payment_trends(df, agg):
+    common_PM=agg["payment_methods"].sort_values("Total_Spent", ascending=False)
+    profiling.show(common_PM)
+    print(f"\nThe most common payment method is {common_PM.iloc[0,0]}")
+
+    segment_count=agg["payment_segments"]
+    profiling.show(segment_count)
+    pivot_table = segment_count.pivot(index='Payment_Method', columns='Spending_Segment', values='Count').fillna(0)
+    profiling.show(pivot_table)
+
+    payment_method=agg["region_payments"]
+    payment_method=payment_method.loc[payment_method.groupby("Region",observed=True)["Total_Spent"].idxmax()]
+    payment_method= payment_method.reset_index(drop=True)
+    payment_method=payment_method.drop(columns=["Total_Spent"])
+    print("\nPayment_Method performance based on region:")
+    profiling.show(payment_method)
+
+    return {
+        "common_PM": common_PM,
+        "payment_methods": common_PM,
+        "segment_count": segment_count,
+        "pivot_table": pivot_table,
+        "payment_method": payment_method,
+    }
+
+
+# 6. Demographics Analysis
+@profiling.instrument
+def demographics(df, agg):
+    Spending_based_on_age=agg["age_segments"].sort_values("Total_Spent",ascending=False).reset_index(drop=True)
+    print("\nSales performance by age:")
+    profiling.show(Spending_based_on_age)
+
+    Gender_preferences=agg["gender_products"].sort_values("Total_Spent",ascending=False).reset_index(drop=True)
+    Top_Product_by_Gender=Gender_preferences.loc[Gender_preferences.groupby("Gender",observed=True)["Total_Spent"].idxmax()].reset_index(drop=True)
+    print("\n Top Product based on gender:")
+    profiling.show(Top_Product_by_Gender)
+    Males_preferences=Gender_preferences[Gender_preferences["Gender"]=="Male"].reset_index(drop=True)
+    print("\nProducts preferences based on gender(Males only):")
+    profiling.show(Males_preferences)
+    Females_preferences=Gender_preferences[Gender_preferences["Gender"]=="Female"].reset_index(drop=True)
+    print("\nProducts preferences based on gender(Females only):")
+    profiling.show(Females_preferences)
+
+    behavior_analysis=agg["demographics"].sort_values("Total_Spent",ascending=False)
+    print("")
+    profiling.show(behavior_analysis)
+
+    return {
+        "Spending_based_on_age": Spending_based_on_age,
+        "Gender_preferences": Gender_preferences,
+        "gender_preferences": Gender_preferences,
+        "Top_Product_by_Gender": Top_Product_by_Gender,
+        "Males_preferences": Males_preferences,
+        "Females_preferences": Females_preferences,
+        "behavior_analysis": behavior_analysis,
+    }
+
+
+# 7. Revenue and Growth Opportunities
+@profiling.instrument
+def revenue_growth(df, agg, upsell=None, cross_sell=None, baskets=None):
+    high_spenders=agg["segment_customers"]
+    high_spenders=high_spenders[high_spenders['Spending_Segment']=='High'].drop(columns=['Spending_Segment']).reset_index(drop=True)
+    print("High-value customers:")
+    profiling.show(high_spenders)
+
+    total_revenue=agg["regions"]["Total_Spent"].sum()
+    high_spenders_revenue=high_spenders["Total_Spent"].sum()
+    contribution=(high_spenders_revenue/total_revenue)*100
+    print( f"\nHigh-value customers contribute {contribution:.3f}% to total revenue")
+
+    tables = {
+        "high_spenders": high_spenders,
+        "contribution": contribution,
+    }
+    # `baskets` comes from the streaming and incremental paths, which have no frame to mine
+    if baskets is None and df is not None:
+        baskets = basket.CoOccurrence.from_frame(df)
+    if baskets is not None:
+        tables["association_rules"] = baskets.rules()
+    if df is not None:
+        if cross_sell is None:
+            # the curated suggestions, except where customers clearly buy something else together
+            cross_sell = recommend.cross_sell_with(baskets.cross_sell_table())
+        df["cross_sell_suggestions"], df["Up_sell_Suggestions"] = recommend.suggestions(df, upsell, cross_sell)
+
+    return tables
+
+
+# 8. Potential Issues to Investigate
+OUTLIER_QUANTILE = 0.99
+
+
+def outlier_thresholds(df):
+    """Exact 99th percentiles of Quantity and Unit_Price over `df`."""
+    return {column: df[column].quantile(OUTLIER_QUANTILE) for column in ("Quantity", "Unit_Price")}
+
+
+def outliers(df, thresholds):
+    """Return the (quantity_outliers, unit_price_outliers) rows of `df`."""
+    quantity_outliers = df[(df['Quantity'] < 0) | (df['Quantity'] > thresholds["Quantity"])]
+    quantity_outliers=quantity_outliers[["Customer_ID","Quantity"]]
+    unit_price_outliers = df[df['Unit_Price'] > thresholds["Unit_Price"]]
+    unit_price_outliers=unit_price_outliers[["Customer_ID","Unit_Price"]]
+    return quantity_outliers, unit_price_outliers
+
+
+@profiling.instrument
+def potential_issues(df, thresholds=None, undated=None):
+    """Checks data quality; returns the tables and the date-ordered frame.
+
+    `thresholds` overrides the outlier cut-offs from outlier_thresholds().
+    `undated` holds the rows drop_undated() took out of `df`; they are
+    counted as missing and validated with the rest.
+    """
+    print("Missing values in each column:")
+    missing_values=df.isnull().sum()
+    checked = df
+    if undated is not None and len(undated):
+        missing_values = missing_values.add(undated.isnull().sum(), fill_value=0).reindex(
+            missing_values.index).astype(int)
+        columns = [column for column in df.columns if column in undated.columns]
+        checked = pd.concat([df[columns], undated[columns]]).sort_index()
+    profiling.show(missing_values)
+
+    if thresholds is None:
+        thresholds = outlier_thresholds(df)
+    quantity_outliers, unit_price_outliers = outliers(df, thresholds)
+    print("\nQuantity outliers:")
+    profiling.show(quantity_outliers)
+    print("\nUnit price outliers:")
+    profiling.show(unit_price_outliers)
+
+    rule_report, quarantined = validation.validate(checked)
+    print("\nValidation rules:")
+    profiling.show(rule_report)
+
+    if not df['Transaction_Date'].is_monotonic_increasing:
+        print("Dates are not in order. Sorting them...")
+        df = df.sort_values('Transaction_Date')
+        print("Dates are in order now ")
+    else:
+        print("Dates are in order")
+
+    return {
+        "missing_values": missing_values,
+        "quantity_outliers": quantity_outliers,
+        "unit_price_outliers": unit_price_outliers,
+        "validation": rule_report,
+        "quarantine": quarantined,
+    }, df
+
+
+def report(agg, df=None, upsell=None, cross_sell=None, baskets=None):
+    """Run sections 1-7 over the AGGREGATES tables in `agg`.
+
+    `df` is the enriched frame; without it (streaming mode) the row-level
+    tables and the suggestion columns are skipped, and section 7 mines the
+    given basket.CoOccurrence instead.
+    """
+    tables = {}
+    tables.update(customer_behavior(df, agg))
+    tables.update(product_performance(df, agg))
+    tables.update(temporal_patterns(df, agg))
+    tables.update(location_insights(df, agg))
+    tables.update(payment_trends(df, agg))
+    tables.update(demographics(df, agg))
+    tables.update(revenue_growth(df, agg, upsell, cross_sell, baskets))
+    return tables
+
+
+def run_all(df, upsell=None, cross_sell=None):
+    """Run sections 1-8 in order and return (date-ordered frame, tables).
+
+    `upsell` and `cross_sell` override the section 7 suggestion tables.
+    Rows without a usable Transaction_Date are dropped from `df` first, and
+    only show up in the validation tables.
+    """
+    undated = drop_undated(df)
+    enrich(df)
+    agg = aggregate.aggregate(df, AGGREGATES)
+    tables = report(agg, df, upsell, cross_sell)
+    issues, ordered = potential_issues(df, undated=undated)
+    tables.update(issues)
+    return ordered, tables
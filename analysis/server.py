@@ -0,0 +1,300 @@
+"""An asyncio HTTP service sharing one versioned copy of the report tables.
+
+    python -m analysis serve [--path data/e_commerce_data.csv] [--host 127.0.0.1] [--port 8765]
+
+    GET /tables            {"version": ..., "items": {name: "frame" | "series" | "scalar"}}
+    GET /tables/<name>     the table as JSON (pandas orient="table"), or as an
+                           Arrow IPC stream with ?format=arrow or
+                           Accept: application/vnd.apache.arrow.stream
+    GET /cube              {"version": ..., "items": {name: "frame"}, "dtypes": ...}
+    GET /cube/<name>       one filter cube table (analysis.cube) as Arrow IPC
+    GET /features          {"version": ..., "items": {name: "array"}, "vocab": ..., "meta": ...}
+    GET /features/<name>   one customer feature array (analysis.features) as .npy
+
+With the cube and the feature store served too, a dashboard pointed at the
+server needs neither the source file nor any store of its own.
+
+Every viewer reads the same Report, loaded once per version of the source
+file from the stored report tables, cube and feature store (computing and
+storing whichever are missing). A Report is immutable and encodes every
+item in the formats it is served in when it is built, off the event loop, so a request is a dict lookup and a
+socket write. The version is derived from the source fingerprint and is the
+ETag of every response: a viewer that sends it back in If-None-Match gets an
+empty 304 until the source changes.
+
+A background task polls the source fingerprint every REFRESH_INTERVAL
+seconds. When it moves, the new Report is built in a worker thread and
+swapped in whole, so a response never mixes two versions; until then, and if
+the rebuild fails, the previous version keeps being served.
+"""
+import asyncio
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from analysis import artifacts, cli, cube, features, ingest, profiling, sections
+
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("ANALYSIS_SERVER_PORT", "8765"))
+REFRESH_INTERVAL = float(os.environ.get("ANALYSIS_REFRESH_INTERVAL", "5"))
+ARROW = "application/vnd.apache.arrow.stream"
+JSON = "application/json"
+NPY = "application/x-npy"
+# format -> content type
+FORMATS = {"json": JSON, "arrow": ARROW, "npy": NPY}
+# collection -> the formats its items are served in, the first being the default
+COLLECTIONS = {"tables": ("json", "arrow"), "cube": ("arrow",), "features": ("npy",)}
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           503: "Service Unavailable"}
+# the most of an unwanted request body that is read and discarded to keep a connection open
+MAX_DISCARD = 1 << 20
+
+
+def _kind(table):
+    if isinstance(table, pd.Series):
+        return "series"
+    if isinstance(table, pd.DataFrame):
+        return "frame"
+    return "scalar"
+
+
+def _scalar(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+def encode_json(table):
+    if _kind(table) == "scalar":
+        return json.dumps({"value": _scalar(table)}).encode()
+    return table.to_json(orient="table", date_format="iso").encode()
+
+
+def encode_arrow(table):
+    """An Arrow IPC stream; a series travels as a one-column frame, a scalar as a one-row "value" column."""
+    kind = _kind(table)
+    if kind == "scalar":
+        batch = pa.table({"value": [_scalar(table)]})
+    else:
+        frame = table.to_frame("values") if kind == "series" else table
+        batch = pa.Table.from_pandas(frame, preserve_index=True)
+        if kind == "series":
+            name = json.dumps(table.name).encode()
+            batch = batch.replace_schema_metadata({**batch.schema.metadata, b"series_name": name})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_table(batch)
+    return sink.getvalue()
+
+
+def encode_npy(array):
+    sink = io.BytesIO()
+    np.save(sink, np.asarray(array))
+    return sink.getvalue()
+
+
+ENCODERS = {"json": encode_json, "arrow": encode_arrow, "npy": encode_npy}
+
+
+class Report:
+    """One version of the report tables, cube and features, with every response body encoded up front."""
+
+    def __init__(self, tables, fingerprint, cube=None, features=None):
+        self.tables = tables
+        self.cube = cube
+        self.features = features
+        self.fingerprint = fingerprint
+        self.version = hashlib.sha256(fingerprint.encode()).hexdigest()[:16]
+        self.loaded = time.time()
+        # collection -> ({name: kind}, extra index fields, {name: item})
+        collections = {"tables": ({name: _kind(table) for name, table in tables.items()}, {}, tables)}
+        if cube is not None:
+            collections["cube"] = (dict.fromkeys(cube.tables, "frame"), {"dtypes": cube.dtypes}, cube.tables)
+        if features is not None:
+            collections["features"] = (dict.fromkeys(features.arrays, "array"),
+                                       {"vocab": features.vocab, "meta": features.meta}, features.arrays)
+        self.indexes = {collection: json.dumps({"version": self.version, "items": kinds, **extra}).encode()
+                        for collection, (kinds, extra, _) in collections.items()}
+        self.bodies = {(collection, name, fmt): ENCODERS[fmt](item)
+                       for collection, (_, _, items) in collections.items() for name, item in items.items()
+                       for fmt in COLLECTIONS[collection]}
+
+    def etag(self, collection, name=None, fmt="json"):
+        return f'"{self.version}"' if name is None else f'"{self.version}-{collection}/{name}-{fmt}"'
+
+
+def build(path):
+    """The Report for the current version of `path`.
+
+    Stores missing for this version are computed and saved: the report
+    tables, the cube and the feature store, and none of the batch run's other
+    output files.
+    """
+    fingerprint = ingest.source_fingerprint(path)
+    tables = artifacts.load_tables(artifacts.tables_path(path), fingerprint)
+    olap = cube.load(cube.cube_path(path), fingerprint)
+    customers = features.FeatureStore.load(features.store_path(path), fingerprint)
+    df = None
+    if tables is None:
+        with profiling.profile() as prof:
+            df, _, tables = cli.compute(path, quiet=True, snapshot=False)
+        tables["profile"] = prof.frame()
+        artifacts.save_tables(tables, artifacts.tables_path(path), fingerprint)
+    if (olap is None or customers is None) and df is None:
+        df = ingest.load_data(path, snapshot=False)
+        sections.drop_undated(df)
+        sections.enrich(df)
+    if olap is None:
+        olap = cube.build(df)
+        cube.save(olap, cube.cube_path(path), fingerprint)
+    if customers is None:
+        features.build(df).save(features.store_path(path), fingerprint)
+        customers = features.FeatureStore.load(features.store_path(path), fingerprint)
+    return Report(tables, fingerprint, olap, customers)
+
+
+def _format(collection, query, headers):
+    fmt = parse_qs(query).get("format", [None])[0]
+    if fmt is None:
+        arrow = "arrow" in COLLECTIONS[collection] and ARROW in headers.get("accept", "")
+        fmt = "arrow" if arrow else COLLECTIONS[collection][0]
+    return fmt
+
+
+class ReportServer:
+    """Serves the Report of `path` over HTTP/1.1 with keep-alive, refreshing it when the source changes."""
+
+    def __init__(self, path=ingest.DATA_PATH, interval=REFRESH_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.report = None
+        self.requests = 0
+        self._server = self._watcher = None
+
+    async def refresh(self):
+        """Rebuild the Report if the source changed; True when a new version was swapped in."""
+        loop = asyncio.get_running_loop()
+        fingerprint = await loop.run_in_executor(None, ingest.source_fingerprint, self.path)
+        if self.report is not None and self.report.fingerprint == fingerprint:
+            return False
+        report = await loop.run_in_executor(None, build, self.path)
+        self.report = report
+        return True
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if await self.refresh():
+                    print(f"report version {self.report.version} loaded", file=sys.stderr)
+            except Exception as error:  # keep serving the last good version
+                print(f"refresh failed, still serving {self.report.version}: {error!r}", file=sys.stderr)
+
+    async def start(self, host=HOST, port=PORT):
+        """Load the first version, then listen; port 0 picks a free one (see `port`)."""
+        await self.refresh()
+        self._server = await asyncio.start_server(self._connection, host, port)
+        self._watcher = asyncio.create_task(self._watch())
+        return self
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self._watcher.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    def respond(self, method, target, headers):
+        """(status, headers, body) for one request, against the Report current when it arrived."""
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+        report = self.report
+        if report is None:
+            return 503, {}, b""
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        collection = parts[0]
+        if len(parts) == 1 and collection in report.indexes:
+            name, fmt, body = None, "json", report.indexes[collection]
+        elif len(parts) == 2 and (collection, parts[1], COLLECTIONS.get(collection, ("json",))[0]) in report.bodies:
+            name, fmt = parts[1], _format(collection, url.query, headers)
+            if fmt not in COLLECTIONS[collection]:
+                message = f"format must be one of {sorted(COLLECTIONS[collection])}\n"
+                return 400, {"Content-Type": "text/plain"}, message.encode()
+            body = report.bodies[collection, name, fmt]
+        else:
+            return 404, {"Content-Type": "text/plain"}, b"not found\n"
+        etag = report.etag(collection, name, fmt)
+        extra = {"ETag": etag, "Cache-Control": "no-cache", "X-Report-Version": report.version}
+        if etag in [tag.strip() for tag in headers.get("if-none-match", "").split(",")]:
+            return 304, extra, b""
+        return 200, {"Content-Type": FORMATS[fmt], **extra}, body
+
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                request = await reader.readline()
+                if not request.strip():
+                    break
+                try:
+                    method, target, version = request.decode("latin-1").split()
+                except ValueError:
+                    method, target, version = None, "", "HTTP/1.0"
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                # no request is answered from its body, so a body is read and thrown away to keep the
+                # connection in step; one that cannot be delimited cheaply closes the connection instead
+                try:
+                    length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    length = -1
+                in_step = method is not None and "transfer-encoding" not in headers and 0 <= length <= MAX_DISCARD
+                if in_step and length:
+                    await reader.readexactly(length)
+                if method is None:
+                    status, extra, body = 400, {}, b""
+                else:
+                    status, extra, body = self.respond(method, target, headers)
+                self.requests += 1
+                connection = headers.get("connection", "").lower()
+                keep_alive = in_step and connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+                lines = [f"HTTP/1.1 {status} {REASONS[status]}", f"Content-Length: {len(body)}",
+                         f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                lines += [f"{key}: {value}" for key, value in extra.items()]
+                writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+                if method != "HEAD":
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def serve(path=ingest.DATA_PATH, host=HOST, port=PORT, interval=REFRESH_INTERVAL):
+    """Run the report server until interrupted."""
+    async def main():
+        server = await ReportServer(path, interval).start(host, port)
+        print(f"serving report version {server.report.version} on http://{host}:{server.port}", file=sys.stderr)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,220 @@
+"""Chunked execution of the pipeline for files that do not fit in memory.
+
+The source is read twice in chunks. The first pass finds the Total_Spent
+percentiles behind Spending_Segment and the section 8 outlier thresholds,
+using a mergeable backend from analysis.quantiles. The second pass enriches
+each chunk, runs the aggregation engine on it and merges the partial tables
+into a running state. Means are carried as sum and count, medians as
+per-group value counts, and the per-group argmax "preference" tables are
+taken from the merged sums, so the section 1-7 tables are the same as the
+in-memory path's. Outlier rows are collected chunk by chunk.
+
+Peak memory is one chunk, whose size can be derived from a memory budget,
+plus the running state. Most partial tables are bounded by the report's keys
+(regions, products, months, ...), but these states grow with the number of
+distinct values in the data, not with the chunk size:
+
+    per-customer partial tables    one row per Customer_ID
+    Total_Spent value counts       one entry per distinct Total_Spent (the
+                                   exact quantile backend; KLL is bounded)
+    demographics median counts     one row per Demographics_Segment and
+                                   distinct Total_Spent
+    unique_transaction_id rule     every Transaction_ID seen, sorted
+                                   (validation._unique)
+    customer baskets               per customer (basket.CoOccurrence)
+
+merge() also concatenates each partial table with the state on every chunk,
+so a state table briefly exists twice. On synthetic data with a 32 MB
+budget, peak RSS rises about 50 MB over 200k rows and 130 MB over 1M.
+"""
+import glob
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from analysis import aggregate, basket, ingest, quantiles, recommend, sections, validation
+
+DEFAULT_CHUNKSIZE = 250_000
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield typed frames of at most `chunksize` rows from a CSV or Parquet file, or a directory of them."""
+    if os.path.isdir(path):
+        for file in sorted(glob.glob(os.path.join(path, "**", "*.parquet"), recursive=True)):
+            yield from iter_chunks(file, chunksize)
+    elif os.path.splitext(path)[1].lower() == ".parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from ingest.read_csv_chunks(path, chunksize)
+
+
+def chunksize_for(path, memory_limit_mb, sample_rows=10_000):
+    """Pick a chunk size that keeps one enriched chunk within `memory_limit_mb`.
+
+    The per-row footprint is measured on an enriched sample, with headroom for
+    the temporaries the aggregation creates.
+    """
+    sample = next(iter_chunks(path, sample_rows))
+    sections.drop_undated(sample)
+    sections.enrich(sample)
+    row_bytes = sample.memory_usage(deep=True).sum() / max(len(sample), 1)
+    return max(1_000, int(memory_limit_mb * 1e6 / (row_bytes * 4)))
+
+
+def profile(path, chunksize=DEFAULT_CHUNKSIZE, backend=quantiles.DEFAULT_BACKEND, validator=None, baskets=None,
+            **options):
+    """One pass over `path` for every percentile the pipeline needs.
+
+    Returns (spending_bounds, outlier_thresholds): the Total_Spent quartiles
+    behind Spending_Segment and the section 8 99th percentiles, computed with
+    the given quantiles backend. A `validator` observes every chunk as well,
+    and every chunk is folded into `baskets` (a basket.CoOccurrence).
+    """
+    sketches = {column: quantiles.make(backend, **options)
+                for column in ("Total_Spent", "Quantity", "Unit_Price")}
+    for chunk in iter_chunks(path, chunksize):
+        if validator is not None:
+            validator.observe(chunk)
+        sections.drop_undated(chunk)
+        if baskets is not None:
+            baskets.update(chunk)
+        sketches["Total_Spent"].update(chunk["Unit_Price"] * chunk["Quantity"])
+        sketches["Quantity"].update(chunk["Quantity"])
+        sketches["Unit_Price"].update(chunk["Unit_Price"])
+    bounds = [sketches["Total_Spent"].quantile(q) for q in (0.25, 0.75)]
+    thresholds = {column: sketches[column].quantile(sections.OUTLIER_QUANTILE)
+                  for column in ("Quantity", "Unit_Price")}
+    return bounds, thresholds
+
+
+def partial_specs(specs):
+    """Rewrite `specs` into mergeable specs.
+
+    A mean becomes a hidden sum and count pair, and a median becomes an extra
+    spec counting each (keys, value) pair.
+    """
+    partial = {}
+    for name, (keys, measures) in specs.items():
+        merged = {}
+        for out, (column, func) in measures.items():
+            if func in aggregate.ADDITIVE:
+                merged[out] = (column, func)
+            elif func == "mean":
+                merged[f"{out}__sum"] = (column, "sum")
+                merged[f"{out}__count"] = (column, "count")
+            elif func == "median":
+                partial[f"{name}__{out}"] = (list(keys) + [column], {"n": (column, "size")})
+            else:
+                raise ValueError(f"{func!r} aggregates cannot be streamed")
+        partial[name] = (keys, merged)
+    return partial
+
+
+def merge(state, parts, specs):
+    """Fold one chunk's partial tables into the running state."""
+    for name, part in parts.items():
+        keys = list(specs[name][0])
+        if name in state:
+            part = pd.concat([state[name], part], ignore_index=True)
+        for key in keys:
+            # chunks see different category sets; merge on the plain values
+            if isinstance(part[key].dtype, pd.CategoricalDtype):
+                part[key] = part[key].astype(part[key].cat.categories.dtype)
+        state[name] = part.groupby(keys, sort=True).sum().reset_index()
+    return state
+
+
+def finalize(state, specs, dtypes):
+    """Turn the merged state back into the tables aggregate() would return."""
+    tables = {}
+    for name, (keys, measures) in specs.items():
+        part = state[name]
+        table = {}
+        for key in keys:
+            if isinstance(dtypes.get(key), pd.CategoricalDtype):
+                table[key] = pd.Categorical(part[key], categories=sorted(part[key].unique()))
+            else:
+                table[key] = part[key].to_numpy()
+        for out, (column, func) in measures.items():
+            if func == "mean":
+                table[out] = part[f"{out}__sum"] / part[f"{out}__count"]
+            elif func == "median":
+                counts = state[f"{name}__{out}"]
+                medians = counts.groupby(list(keys), sort=True)[[column, "n"]].apply(
+                    lambda g: quantiles.weighted_quantile(g[column].to_numpy(), g["n"].to_numpy(), 0.5))
+                table[out] = medians.to_numpy()
+            else:
+                table[out] = part[out].to_numpy()
+        tables[name] = pd.DataFrame(table)
+    return tables
+
+
+def stream_aggregates(path, specs=None, chunksize=DEFAULT_CHUNKSIZE, quantile_backend=quantiles.DEFAULT_BACKEND,
+                      quantile_options=None, enriched_path=None, upsell=None, cross_sell=None,
+                      quarantine_path=None, baskets=None):
+    """Compute `specs` (default sections.AGGREGATES) over `path` chunk by chunk.
+
+    Returns (tables, issues) where issues holds the section 8 outlier rows
+    and the validation report. If `enriched_path` is given, every enriched
+    chunk, including the section 7 suggestion columns, is appended to that
+    CSV as it is processed; if `quarantine_path` is given, so are the rows
+    breaking a validation rule. The customer baskets are built into
+    `baskets` during the first pass, so the suggestion columns use the same
+    mined cross-sells as the in-memory run.
+    """
+    specs = sections.AGGREGATES if specs is None else specs
+    validator = validation.Validator()
+    baskets = basket.CoOccurrence.empty() if baskets is None else baskets
+    bounds, thresholds = profile(path, chunksize, quantile_backend, validator, baskets, **(quantile_options or {}))
+    if cross_sell is None:
+        cross_sell = recommend.cross_sell_with(baskets.cross_sell_table())
+    partial = partial_specs(specs)
+    state, dtypes, offset = {}, {}, 0
+    quantity_outliers, unit_price_outliers = [], []
+    for chunk in iter_chunks(path, chunksize):
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        quarantined = validation.quarantine(chunk, validator.check(chunk))
+        if quarantine_path is not None:
+            validation.write_quarantine(quarantined, quarantine_path, append=offset > 0)
+        chunk_rows = len(chunk)
+        sections.drop_undated(chunk)
+        sections.enrich(chunk, bounds)
+        dtypes.update(chunk.dtypes.to_dict())
+        merge(state, aggregate.aggregate(chunk, partial), partial)
+        quantity, unit_price = sections.outliers(chunk, thresholds)
+        quantity_outliers.append(quantity)
+        unit_price_outliers.append(unit_price)
+        if enriched_path is not None:
+            chunk["cross_sell_suggestions"], chunk["Up_sell_Suggestions"] = recommend.suggestions(
+                chunk, upsell, cross_sell)
+            chunk.to_csv(enriched_path, mode="w" if offset == 0 else "a", header=offset == 0)
+        offset += chunk_rows
+    issues = {
+        "quantity_outliers": pd.concat(quantity_outliers),
+        "unit_price_outliers": pd.concat(unit_price_outliers),
+        "validation": validator.report(),
+    }
+    return finalize(state, specs, dtypes), issues
+
+
+def run_stream(path=ingest.DATA_PATH, chunksize=None, memory_limit_mb=None, enriched_path=None,
+               quantile_backend=quantiles.DEFAULT_BACKEND, quantile_options=None):
+    """Streaming counterpart of sections.run_all().
+
+    Give either `chunksize` rows or a `memory_limit_mb` budget to size the
+    chunks from. `quantile_backend` ("exact" or "kll") and its options decide
+    how the segmentation and outlier percentiles are found. Returns the same
+    result tables, minus the row-level ones; quarantined rows go to the file
+    given by validation.quarantine_path(path).
+    """
+    if chunksize is None:
+        chunksize = chunksize_for(path, memory_limit_mb) if memory_limit_mb else DEFAULT_CHUNKSIZE
+    baskets = basket.CoOccurrence.empty()
+    agg, issues = stream_aggregates(path, chunksize=chunksize, quantile_backend=quantile_backend,
+                                    quantile_options=quantile_options, enriched_path=enriched_path,
+                                    quarantine_path=validation.quarantine_path(path), baskets=baskets)
+    tables = sections.report(agg, baskets=baskets)
+    tables.update(issues)
+    return tables
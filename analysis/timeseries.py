@@ -0,0 +1,68 @@
+"""Per-product sales time series for the "Sales Trends Over Time" chart.
+
+rollups() pivots the (Product_Name, Transaction_Date) sales table once into a
+date x product frame and resamples it to weekly and monthly buckets. The
+chart picks the finest bucket that fits its point budget and thins any
+series still over budget with LTTB (Largest-Triangle-Three-Buckets), which
+keeps the peaks and troughs a plain stride would drop.
+"""
+import numpy as np
+
+BUCKETS = {"sales_daily": "D", "sales_weekly": "W", "sales_monthly": "MS"}
+BUCKET_LABELS = {"sales_daily": "Daily", "sales_weekly": "Weekly", "sales_monthly": "Monthly"}
+MAX_POINTS = 120
+
+
+def rollups(sales):
+    """Return {"sales_daily", "sales_weekly", "sales_monthly"} date x product frames."""
+    daily = sales.pivot_table(index="Transaction_Date", columns="Product_Name", values="Total_Spent",
+                              aggfunc="sum", fill_value=0, observed=True)
+    daily = daily.asfreq("D", fill_value=0)
+    daily.columns = daily.columns.astype(str)
+    return {name: daily if rule == "D" else daily.resample(rule).sum() for name, rule in BUCKETS.items()}
+
+
+def choose_bucket(frames, max_points=MAX_POINTS):
+    """Name of the finest rollup with at most `max_points` rows, else the coarsest."""
+    for name in BUCKETS:
+        if len(frames[name]) <= max_points:
+            return name
+    return list(BUCKETS)[-1]
+
+
+def lttb(x, y, threshold):
+    """Indices of the `threshold` points LTTB keeps from the series (x, y)."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        # average of the next bucket is the third corner of the triangle
+        cx, cy = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - cx) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (cy - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def plot_series(frames, max_points=MAX_POINTS):
+    """Pick a bucket and downsample every product to at most `max_points`.
+
+    Returns (bucket name, {product: (dates, values)}).
+    """
+    name = choose_bucket(frames, max_points)
+    frame = frames[name]
+    x = frame.index.to_numpy()
+    series = {}
+    for product in frame.columns:
+        y = frame[product].to_numpy()
+        keep = lttb(x.astype("datetime64[ns]").astype(np.int64), y, max_points)
+        series[product] = (x[keep], y[keep])
+    return name, series
@@ -0,0 +1,183 @@
+"""Declarative data-quality rules, checked one chunk at a time.
+
+RULES maps a rule name to (check, params). Each check is a vectorized
+function that returns a boolean mask over the chunk's rows, True where a row
+breaks the rule:
+
+    "range"     column outside [min, max]; either bound may be left out
+    "enum"      column not one of `values`
+    "less"      `left` not strictly below `right`
+    "unique"    a repeat of an earlier `column` value, in this chunk or a
+                previous one (the first occurrence passes)
+    "date"      column missing or not a parseable date
+    "zscore"    |value - group mean| / group std above `limit`, with `column`
+                grouped by `by`
+
+A Validator runs the whole rule set over a chunk in one pass and keeps the
+failure counts and the time spent per rule. The z-score rules need the group
+means and deviations of the whole dataset, so observe() collects them first:
+the in-memory path observes the frame it checks, and the streaming path
+observes each chunk during its profiling pass.
+
+Rows that break any rule are quarantined: returned with a `failed_rules`
+column naming the rules they broke, and written to a CSV next to the source.
+Rows whose Transaction_Date is missing or unparseable (valid_date) are also
+removed from the report, since every section groups or filters by date (see
+sections.drop_undated()). Rows that break only the other rules are reported,
+not removed, and the report still covers them.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from analysis import ingest, profiling
+
+REGIONS = ["Baghdad", "Basra", "Erbil", "Kirkuk", "Mosul", "Najaf"]
+PAYMENT_METHODS = ["Cash", "Credit Card", "Debit Card", "PayPal"]
+
+RULES = {
+    "quantity_range": ("range", {"column": "Quantity", "min": 1}),
+    "unit_price_range": ("range", {"column": "Unit_Price", "min": 0.01}),
+    "age_range": ("range", {"column": "Age", "min": 0, "max": 120}),
+    "known_region": ("enum", {"column": "Region", "values": REGIONS}),
+    "known_payment_method": ("enum", {"column": "Payment_Method", "values": PAYMENT_METHODS}),
+    "cost_below_price": ("less", {"left": "Unit_Cost", "right": "Unit_Price"}),
+    "unique_transaction_id": ("unique", {"column": "Transaction_ID"}),
+    "valid_date": ("date", {"column": "Transaction_Date"}),
+    "unit_price_zscore": ("zscore", {"column": "Unit_Price", "by": "Product_Name", "limit": 4.0}),
+    "quantity_zscore": ("zscore", {"column": "Quantity", "by": "Product_Category", "limit": 4.0}),
+}
+REPORT_COLUMNS = ["rule", "check", "failed", "seconds"]
+
+
+def quarantine_path(path):
+    return ingest.stem(path) + ".quarantine.csv"
+
+
+def _range(chunk, state, column, min=None, max=None):
+    values = chunk[column].to_numpy()
+    ok = ~pd.isna(values)
+    if min is not None:
+        ok &= values >= min
+    if max is not None:
+        ok &= values <= max
+    return ~ok
+
+
+def _enum(chunk, state, column, values):
+    return ~chunk[column].isin(values).to_numpy()
+
+
+def _less(chunk, state, left, right):
+    return ~(chunk[left].to_numpy() < chunk[right].to_numpy())
+
+
+def _unique(chunk, state, column):
+    values = chunk[column].to_numpy()
+    seen = state.get("seen", np.empty(0, dtype=values.dtype))
+    failed = chunk[column].duplicated().to_numpy()
+    position = np.searchsorted(seen, values).clip(max=max(len(seen) - 1, 0))
+    if len(seen):
+        failed |= seen[position] == values
+    # keep the ids seen so far sorted and distinct: only this chunk's new ids
+    # are sorted, then inserted at their searchsorted positions
+    new = np.sort(values[~failed])
+    state["seen"] = np.insert(seen, np.searchsorted(seen, new), new)
+    return failed
+
+
+def _date(chunk, state, column):
+    values = chunk[column]
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, errors="coerce")
+    return values.isna().to_numpy()
+
+
+def _zscore(chunk, state, column, by, limit):
+    moments = state["moments"]
+    group = moments.index.get_indexer(chunk[by].astype(object))
+    count, total, squares = (np.append(moments[name].to_numpy(), np.nan)[group]
+                             for name in ("count", "sum", "squares"))
+    mean = total / count
+    std = np.sqrt(np.maximum(squares / count - mean ** 2, 0) * count / (count - 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.abs(chunk[column].to_numpy(dtype=np.float64) - mean) / std
+    return np.nan_to_num(z, nan=0.0, posinf=0.0) > limit
+
+
+CHECKS = {"range": _range, "enum": _enum, "less": _less, "unique": _unique, "date": _date, "zscore": _zscore}
+
+
+class Validator:
+    """Runs `rules` over chunks and keeps per-rule failure counts and timings."""
+
+    def __init__(self, rules=None):
+        self.rules = RULES if rules is None else rules
+        unknown = {check for check, _ in self.rules.values()} - set(CHECKS)
+        if unknown:
+            raise ValueError(f"unknown checks {sorted(unknown)}, expected some of {sorted(CHECKS)}")
+        self.state = {name: {} for name in self.rules}
+        self.failed = dict.fromkeys(self.rules, 0)
+        self.seconds = dict.fromkeys(self.rules, 0.0)
+
+    def observe(self, chunk):
+        """Add `chunk` to the group moments the z-score rules compare against."""
+        for name, (check, params) in self.rules.items():
+            if check != "zscore":
+                continue
+            values = chunk[params["column"]].astype(np.float64)
+            grouped = pd.DataFrame({"value": values, "square": values ** 2,
+                                    "by": chunk[params["by"]].astype(object)})
+            part = grouped.groupby("by").agg(count=("value", "count"), sum=("value", "sum"),
+                                             squares=("square", "sum"))
+            moments = self.state[name].get("moments")
+            self.state[name]["moments"] = part if moments is None else moments.add(part, fill_value=0)
+
+    def check(self, chunk):
+        """A rows x rules boolean frame for `chunk`, True where a row breaks a rule."""
+        failures = {}
+        for name, (check, params) in self.rules.items():
+            start = time.perf_counter()
+            failures[name] = CHECKS[check](chunk, self.state[name], **params)
+            self.seconds[name] += time.perf_counter() - start
+            self.failed[name] += int(failures[name].sum())
+        return pd.DataFrame(failures, index=chunk.index)
+
+    def report(self):
+        return pd.DataFrame({
+            "rule": list(self.rules),
+            "check": [check for check, _ in self.rules.values()],
+            "failed": list(self.failed.values()),
+            "seconds": list(self.seconds.values()),
+        }, columns=REPORT_COLUMNS)
+
+
+def quarantine(chunk, failures):
+    """The source columns of the rows of `chunk` that broke a rule, plus `failed_rules` naming them."""
+    columns = [column for column in chunk.columns if column in ingest.SCHEMA or column in ingest.DATE_COLUMNS]
+    matrix = failures.to_numpy()
+    bad = matrix.any(axis=1)
+    # name each distinct combination of broken rules once, then broadcast
+    bits = matrix[bad].astype(np.int64) @ (1 << np.arange(matrix.shape[1], dtype=np.int64))
+    combos, inverse = np.unique(bits, return_inverse=True)
+    names = list(failures.columns)
+    labels = np.array([";".join(name for i, name in enumerate(names) if combo >> i & 1) for combo in combos],
+                      dtype=object)
+    rows = chunk.loc[bad, columns].copy()
+    rows["failed_rules"] = labels[inverse]
+    return rows
+
+
+@profiling.instrument
+def validate(df, rules=None):
+    """Check the whole frame `df`; returns (per-rule report, quarantined rows)."""
+    validator = Validator(rules)
+    validator.observe(df)
+    rows = quarantine(df, validator.check(df))
+    return validator.report(), rows
+
+
+def write_quarantine(rows, path, append=False):
+    """Write (or append) quarantined rows to the CSV at `path`."""
+    rows.to_csv(path, mode="a" if append else "w", header=not append)
@@ -0,0 +1,76 @@
+"""Report wall time per query backend, and a check that they agree.
+
+Every installed backend runs sections 1-8 over the same file. Each backend's
+tables are compared with the pandas ones: frames must match in shape, dtypes,
+order and index, and floats must be equal to 1e-12 relative tolerance, since
+sums are added up in different orders. Exits non-zero on any difference.
+
+    python benchmarks/bench_backends.py [--rows 1000000] [--backends pandas duckdb polars]
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import backends, ingest  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def differences(expected, actual):
+    """Names of the tables in `actual` that do not match `expected`."""
+    wrong = []
+    for name, table in expected.items():
+        other = actual.get(name)
+        try:
+            if isinstance(table, pd.DataFrame):
+                pd.testing.assert_frame_equal(table, other, check_exact=False, rtol=1e-12)
+            elif isinstance(table, pd.Series):
+                pd.testing.assert_series_equal(table, other, check_exact=False, rtol=1e-12)
+            elif table is None:
+                assert other is None
+            else:
+                assert np.isclose(table, other, rtol=1e-12)
+        except (AssertionError, TypeError) as error:
+            wrong.append(f"{name}: {str(error).strip().splitlines()[0]}")
+    return wrong
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, help="synthetic rows instead of the sample CSV")
+    parser.add_argument("--backends", nargs="+", default=list(backends.BACKENDS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(ROOT, ingest.DATA_PATH)
+        if args.rows:
+            path = synthetic.write(args.rows, os.path.join(tmp, "synthetic.parquet"))
+        results, failed = {}, False
+        for backend in args.backends:
+            if backend != "pandas" and importlib.util.find_spec(backend) is None:
+                print(f"{backend:<8}  not installed, skipped")
+                continue
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[backend] = backends.run(path, backend)
+            elapsed = time.perf_counter() - start
+            wrong = differences(results["pandas"], results[backend]) if "pandas" in results else []
+            failed |= bool(wrong)
+            print(f"{backend:<8}{elapsed * 1000:>10.0f} ms  {'MISMATCH' if wrong else 'ok'}")
+            for line in wrong:
+                print(f"    {line}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Co-occurrence engine: full build vs incremental update, checked against B^T B.
+
+Builds the baskets of `--rows` synthetic transactions, then folds in
+`--delta-rows` more with update() and compares it with a rebuild over all
+rows. The pair counts are checked against the dense incidence-matrix product.
+
+    python benchmarks/bench_basket.py [--rows 1000000] [--delta-rows 10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import basket  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<24}{(time.perf_counter() - start) * 1000:>10.0f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--delta-rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    customers = max(2_000, args.rows // synthetic.ROWS_PER_CUSTOMER)
+    history = synthetic.generate(args.rows, customers=customers)
+    delta = synthetic.generate(args.delta_rows, customers=customers, start=args.rows)
+    everything = pd.concat([history, delta], ignore_index=True)
+    print(f"{args.rows:,} rows, {customers:,} customers, {args.delta_rows:,} appended")
+
+    engine = timed("build", lambda: basket.CoOccurrence.from_frame(history))
+    timed("update", lambda: engine.update(delta))
+    rebuilt = timed("rebuild", lambda: basket.CoOccurrence.from_frame(everything))
+    timed("rules", engine.rules)
+
+    incidence = np.zeros((len(rebuilt.customers), len(rebuilt.products)), dtype=np.float64)
+    incidence[np.repeat(np.arange(len(rebuilt.customers)), np.diff(rebuilt.offsets)), rebuilt.codes] = 1
+    assert (incidence.T @ incidence == rebuilt.pairs).all(), "pair counts differ from B^T B"
+    assert engine.baskets == rebuilt.baskets and (engine.pairs == rebuilt.pairs).all(), "update differs from rebuild"
+    assert (engine.offsets == rebuilt.offsets).all() and (engine.codes == rebuilt.codes).all()
+    print("update matches rebuild and B^T B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Server CPU and memory per dashboard page view: pyplot figures vs the chart cache.
+
+The "pyplot" path is what the dashboard used to do on every rerun: build
+each figure with plt.subplots() and rasterize it like st.pyplot() does,
+without closing it. The "cached" path asks analysis.charts for the PNG. Each
+view draws the four dashboard charts.
+
+    python benchmarks/bench_charts.py [--views 50]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import charts, ingest, sections, timeseries  # noqa: E402
+
+
+def pyplot_view(tables):
+    figures = []
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.bar(tables["top_selling"].index, tables["top_selling"]["Total_Spent"], color='skyblue')
+    figures.append(fig)
+    fig, ax = plt.subplots(figsize=(8, 6))
+    ax.bar(tables["categories_sales"]["Product_Category"], tables["categories_sales"]["Total_Spent"], color='pink')
+    figures.append(fig)
+    fig, ax = plt.subplots(figsize=(8, 6))
+    for product, (dates, revenue) in timeseries.plot_series(tables)[1].items():
+        ax.plot(dates, revenue, marker="o", markersize=3, label=product)
+    ax.legend(title="Product")
+    figures.append(fig)
+    fig, ax = plt.subplots()
+    ax.pie(tables["common_PM"]["Total_Spent"], labels=tables["common_PM"]["Payment_Method"], autopct='%1.1f%%')
+    figures.append(fig)
+    for fig in figures:
+        fig.savefig(io.BytesIO(), format="png", dpi=charts.DPI, bbox_inches="tight")
+
+
+def cached_view(tables):
+    charts.png("product_sales", tables["top_selling"])
+    charts.png("category_sales", tables["categories_sales"])
+    bucket, series = timeseries.plot_series(tables)
+    charts.png("sales_over_time", charts.series_frame(series), label=timeseries.BUCKET_LABELS[bucket])
+    charts.png("payment_share", tables["common_PM"])
+
+
+def measure(view, tables, views):
+    """(CPU seconds per view, bytes still allocated after `views` more views, figures left open)."""
+    figures = len(plt.get_fignums())
+    start = time.process_time()
+    for _ in range(views):
+        view(tables)
+    cpu = time.process_time() - start
+    # a second round under tracemalloc, which would distort the CPU times
+    tracemalloc.start()
+    for _ in range(views):
+        view(tables)
+    growth = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return cpu / views, growth, len(plt.get_fignums()) - figures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--views", type=int, default=50)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", "More than 20 figures")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, tables = sections.run_all(ingest.load_data(os.path.join(ROOT, ingest.DATA_PATH)))
+    for label, view in (("pyplot", pyplot_view), ("cached", cached_view)):
+        cpu, growth, figures = measure(view, tables, args.views)
+        print(f"{label:<8}{cpu * 1000:>8.1f} ms CPU/view  {growth / 1e6:>8.1f} MB retained after {args.views} views"
+              f"  ({figures} figures left open)")
+    print(f"cache: {len(charts.cache)} entries, {charts.cache.hits} hits, {charts.cache.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
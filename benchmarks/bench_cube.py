@@ -0,0 +1,75 @@
+"""Keeping the dashboard cube current: incremental merge vs a full rebuild.
+
+Writes `--rows` synthetic transactions (synthetic.py) as a CSV, folds them
+into a fresh incremental state, then appends `--delta-rows` more and times
+`cli.refresh`, which merges the cube of the appended rows into the stored
+one, against cube.build_stream(), the full rebuild cube.load_or_build() runs
+when the source changes under it. Also prints the rows of every cube table
+next to the source's, and the time of a filtered rollup.
+
+    python benchmarks/bench_cube.py [--rows 10000000] [--delta-rows 100000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import cli, cube, incremental  # noqa: E402
+import synthetic  # noqa: E402
+
+FILTERS = {"Region": ["Baghdad", "Erbil"], "Gender": ["Female"], "Transaction_Date": ("2024-03-01", "2024-08-31")}
+
+
+def write_csv(path, rows, start, customers, transaction_ids, mode):
+    """Append synthetic rows `start` to `start + rows` of one dataset to the CSV at `path`."""
+    with open(path, mode) as f:
+        for offset in range(start, start + rows, synthetic.CHUNK_ROWS):
+            chunk = synthetic.generate(min(synthetic.CHUNK_ROWS, start + rows - offset), 0, customers, offset,
+                                       transaction_ids)
+            chunk.to_csv(f, header=f.tell() == 0, index=False)
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{elapsed * 1000:>10.0f} ms")
+    return elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--delta-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    total = args.rows + args.delta_rows
+    customers = max(2_000, total // synthetic.ROWS_PER_CUSTOMER)
+    transaction_ids = max(1, int(total * synthetic.IDS_PER_ROW))
+    with tempfile.TemporaryDirectory() as tmp:
+        path, state_dir = os.path.join(tmp, "transactions.csv"), os.path.join(tmp, "state")
+        write_csv(path, args.rows, 0, customers, transaction_ids, "w")
+        print(f"{args.rows:,} rows of history, {args.delta_rows:,} appended")
+
+        timed("initial refresh", lambda: cli.refresh(path, state_dir, quiet=True))
+        write_csv(path, args.delta_rows, args.rows, customers, transaction_ids, "a")
+        merge, _ = timed("refresh with cube merge", lambda: cli.refresh(path, state_dir, quiet=True))
+        rebuild, _ = timed("cube.build_stream", lambda: cube.build_stream(path))
+        print(f"merging is {rebuild / merge:.1f}x cheaper; {incremental.load_manifest(state_dir)['last_refresh']}")
+
+        olap = cube.load(cube.cube_path(path))
+        timed("filtered rollup", lambda: cube.rollup(olap, FILTERS))
+        print(f"\n{'cube table':<34}{'rows':>12}{'of source':>11}")
+        for name, table in sorted(olap.tables.items()):
+            print(f"{name:<34}{len(table):>12,}{len(table) / total:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Per-interaction latency of the dashboard: recomputed, cold load and cached.
+
+Each page is timed three ways, with the Streamlit caches and the chart cache
+cleared before the first two:
+
+    recompute   the stored report tables are moved away, so the rerun
+                computes sections 1-8 in memory, as every interaction did
+                before the dashboard cached anything
+    cold load   the rerun loads the tables the batch run stored, as the
+                first view after a restart or a new source version does
+    cached      the same rerun again, served from the caches: what a
+                sidebar change costs now
+
+The cube and the customer features are loaded from their stores in the
+first two, so "recompute" only isolates the cost of the sections.
+
+    python benchmarks/bench_dashboard.py [--repeat 5]
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import artifacts, charts, ingest  # noqa: E402
+
+PAGES = ['Customers Behavior', 'Products Performance', 'Temporal Patterns',
+         'Location-Based Insights', 'Payment Trends', 'Demographics Analysis']
+MODES = ["recompute", "cold load", "cached"]
+
+
+def timed_run(at, page=None):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if page is None:
+            at.run()
+        else:
+            at.selectbox[0].select(page).run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return time.perf_counter() - start
+
+
+def clear_caches():
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    charts.cache.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    store = artifacts.tables_path(ingest.DATA_PATH)
+    if artifacts.load_tables(store, ingest.source_fingerprint(ingest.DATA_PATH)) is None:
+        sys.exit("no stored report tables for the current data; run `python -m analysis run` first")
+    at = AppTest.from_file(os.path.join(ROOT, "data_analysis_project.py"), default_timeout=600)
+    timed_run(at)
+
+    times = {page: {mode: [] for mode in MODES} for page in PAGES}
+    for page in PAGES:
+        for _ in range(args.repeat):
+            clear_caches()
+            os.replace(store, store + ".aside")
+            try:
+                times[page]["recompute"].append(timed_run(at, page))
+            finally:
+                os.replace(store + ".aside", store)
+            clear_caches()
+            times[page]["cold load"].append(timed_run(at, page))
+            times[page]["cached"].append(timed_run(at, page))
+
+    print(f"{'page':<26}" + "".join(f"{mode + ' ms':>14}" for mode in MODES) + f"{'speedup':>10}")
+    for page in PAGES:
+        medians = [statistics.median(times[page][mode]) * 1000 for mode in MODES]
+        print(f"{page:<26}" + "".join(f"{ms:>14.1f}" for ms in medians) + f"{medians[0] / medians[-1]:>9.1f}x")
+    print("\nspeedup: recompute over cached")
+
+
+if __name__ == "__main__":
+    main()
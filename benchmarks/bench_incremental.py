@@ -0,0 +1,58 @@
+"""Refresh cost of incremental append mode vs a full streaming recompute.
+
+Builds a history of `--scale` copies of the source CSV, folds it into a fresh
+state, then appends `--delta-rows` rows and times the incremental refresh.
+
+    python benchmarks/bench_incremental.py [--scale 50] [--delta-rows 10000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import incremental, streaming  # noqa: E402
+from bench_ingest import tile_csv  # noqa: E402
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{elapsed * 1000:>10.0f} ms")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=50)
+    parser.add_argument("--delta-rows", type=int, default=10_000)
+    parser.add_argument("--segment-tolerance", type=float, default=incremental.DEFAULT_SEGMENT_TOLERANCE)
+    args = parser.parse_args()
+
+    source = os.path.join(ROOT, "data", "e_commerce_data.csv")
+    with open(source) as f:
+        delta = f.readlines()[1:args.delta_rows + 1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path, state_dir = os.path.join(tmp, "e_commerce_data.csv"), os.path.join(tmp, "state")
+        tile_csv(source, path, args.scale)
+        print(f"{args.scale * 10_000:,} rows of history, {len(delta):,} appended")
+
+        timed("initial build", lambda: incremental.refresh(path, state_dir, segment_tolerance=args.segment_tolerance))
+        with open(path, "a") as f:
+            f.writelines(delta)
+        fold = timed("incremental refresh", lambda: incremental.refresh(
+            path, state_dir, segment_tolerance=args.segment_tolerance))
+        full = timed("full streaming recompute", lambda: streaming.run_stream(path))
+        print(f"refresh is {full / fold:.0f}x cheaper; {incremental.load_manifest(state_dir)['last_refresh']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Load time and frame memory: untyped read_csv vs typed parse vs snapshot.
+
+The source CSV is tiled `--scale` times into a temporary file so the numbers
+reflect production-sized extracts rather than the 10k-row sample.
+
+    python benchmarks/bench_ingest.py [--scale 100]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import ingest  # noqa: E402
+
+
+def tile_csv(src, dst, scale):
+    with open(src) as f:
+        header = f.readline()
+        body = f.read()
+    if not body.endswith("\n"):
+        body += "\n"
+    with open(dst, "w") as f:
+        f.write(header)
+        for _ in range(scale):
+            f.write(body)
+
+
+def measure(label, load):
+    start = time.perf_counter()
+    df = load()
+    elapsed = time.perf_counter() - start
+    mb = df.memory_usage(deep=True).sum() / 1e6
+    print(f"{label:<22}{elapsed * 1000:>10.0f} ms{mb:>10.1f} MB")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "e_commerce_data.csv")
+        tile_csv(os.path.join(ROOT, ingest.DATA_PATH), path, args.scale)
+        print(f"{args.scale * 10_000:,} rows")
+        measure("read_csv (untyped)", lambda: pd.read_csv(path))
+        measure("typed parse", lambda: ingest.load_data(path))
+        measure("feather snapshot", lambda: ingest.load_data(path))
+
+
+if __name__ == "__main__":
+    main()
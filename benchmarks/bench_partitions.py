@@ -0,0 +1,78 @@
+"""A "last quarter" report: one Parquet file vs the Year/Month partitioned dataset.
+
+Writes `--years` years of synthetic history both ways, then loads the last
+three months and runs sections 1-8 on them. Reports bytes touched and wall
+time for each layout and checks that both see the same rows.
+
+    python benchmarks/bench_partitions.py [--rows-per-year 1000000] [--years 3]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import dataset, ingest, sections  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def history(rows_per_year, years):
+    """`years` consecutive years of synthetic transactions, oldest first."""
+    parts = []
+    for year in range(years):
+        part = synthetic.generate(rows_per_year, start=year * rows_per_year)
+        part["Transaction_Date"] += np.timedelta64(synthetic.DAYS * year, "D")
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows-per-year", type=int, default=1_000_000)
+    parser.add_argument("--years", type=int, default=3)
+    args = parser.parse_args()
+
+    df = history(args.rows_per_year, args.years)
+    with tempfile.TemporaryDirectory() as tmp:
+        single, directory = os.path.join(tmp, "history.parquet"), os.path.join(tmp, "history.dataset")
+        df.to_parquet(single, index=False)
+        dataset.write(df, directory)
+        del df
+
+        first, last = dataset.bounds(directory)
+        start = (last - pd.DateOffset(months=3)).normalize() + pd.Timedelta(days=1)
+        print(f"{args.rows_per_year * args.years:,} rows over {first.date()} - {last.date()}, "
+              f"last quarter from {start.date()}")
+
+        def whole_file():
+            frame = ingest.load_data(single)
+            return frame[frame["Transaction_Date"] >= start].reset_index(drop=True)
+
+        full, full_seconds = timed(lambda: sections.run_all(whole_file()))
+        pruned, pruned_seconds = timed(lambda: dataset.run(directory, start=start))
+        pd.testing.assert_frame_equal(full[1]["Sales_by_region"], pruned[1]["Sales_by_region"])
+
+        touched = sum(entry["bytes"] for entry in dataset.files(directory, start=start))
+        total = sum(entry["bytes"] for entry in dataset.files(directory))
+        print(f"single file  {os.path.getsize(single) / 1e6:>8.1f} MB read  {full_seconds * 1000:>8.0f} ms")
+        print(f"partitioned  {touched / 1e6:>8.1f} MB read  {pruned_seconds * 1000:>8.0f} ms  "
+              f"({touched / total:.0%} of the dataset)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Exact vs KLL quantiles for the segmentation and outlier percentiles.
+
+Feeds each column to both backends in chunks, as streaming mode does, and
+reports each answer's rank error; tests/test_quantiles.py holds the KLL
+answers to `epsilon`.
+
+    python benchmarks/bench_quantiles.py [--scale 100] [--epsilon 0.01]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import ingest, quantiles, sections  # noqa: E402
+
+PERCENTILES = {"Total_Spent": [0.25, 0.75], "Quantity": [sections.OUTLIER_QUANTILE],
+               "Unit_Price": [sections.OUTLIER_QUANTILE]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--epsilon", type=float, default=0.01)
+    parser.add_argument("--chunks", type=int, default=20)
+    args = parser.parse_args()
+
+    df = ingest.load_data(os.path.join(ROOT, ingest.DATA_PATH))
+    rng = np.random.default_rng(0)
+    columns = {
+        "Total_Spent": (df["Unit_Price"] * df["Quantity"]).to_numpy(),
+        "Quantity": df["Quantity"].to_numpy(),
+        "Unit_Price": df["Unit_Price"].to_numpy(),
+    }
+    # jitter the tiled copies so the sketch sees distinct values
+    columns = {name: np.concatenate([values * rng.uniform(0.95, 1.05, len(values))
+                                     for _ in range(args.scale)])
+               for name, values in columns.items()}
+    print(f"{args.scale * len(df):,} values per column, epsilon={args.epsilon}")
+
+    for name, values in columns.items():
+        ordered = np.sort(values)
+        for backend, options in (("exact", {}), ("kll", {"epsilon": args.epsilon})):
+            start = time.perf_counter()
+            summary = quantiles.make(backend, **options)
+            for part in np.array_split(values, args.chunks):
+                summary.merge(quantiles.make(backend, **options).update(part))
+            answers = [summary.quantile(q) for q in PERCENTILES[name]]
+            elapsed = time.perf_counter() - start
+            errors = [abs(np.searchsorted(ordered, a, side="right") / len(values) - q)
+                      for a, q in zip(answers, PERCENTILES[name])]
+            print(f"{name:<12}{backend:<6}{elapsed * 1000:>9.0f} ms  max rank error {max(errors):.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Section 7 suggestion columns: row-wise df.apply vs the vectorized stage.
+
+    python benchmarks/bench_recommend.py [--scale 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import ingest, recommend  # noqa: E402
+
+
+# the original per-row implementation
+def Cross_sell_suggestions(row):
+    if row["Spending_Segment"] in ["Medium", "Low"]:
+        return recommend.cross_sell_suggestions.get(row["Product_Name"], None)
+    else:
+        return None
+
+
+def Up_sell_Suggestions(row):
+    if row["Spending_Segment"] =="High":
+        return recommend.upsell_suggestions.get(row["Product_Name"],None)
+    else:
+        return None
+
+
+def apply_path(df):
+    return df.apply(Cross_sell_suggestions, axis=1), df.apply(Up_sell_Suggestions, axis=1)
+
+
+def build_frame(scale):
+    df = ingest.load_data(os.path.join(ROOT, ingest.DATA_PATH))
+    df = pd.concat([df] * scale, ignore_index=True)
+    total = df["Unit_Price"] * df["Quantity"]
+    low, high = total.quantile(0.25), total.quantile(0.75)
+    df["Spending_Segment"] = "Medium"
+    df.loc[total <= low, "Spending_Segment"] = "Low"
+    df.loc[total > high, "Spending_Segment"] = "High"
+    return df
+
+
+def best_of(fn, df, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(df)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = build_frame(args.scale)
+    slow, (cross_a, up_a) = best_of(apply_path, df, args.repeat)
+    fast, (cross_v, up_v) = best_of(recommend.suggestions, df, args.repeat)
+    assert cross_a.fillna("").eq(cross_v.astype(object).fillna("")).all()
+    assert up_a.fillna("").eq(up_v.astype(object).fillna("")).all()
+
+    print(f"{len(df):,} rows")
+    print(f"df.apply     {slow * 1000:>10.1f} ms")
+    print(f"vectorized   {fast * 1000:>10.1f} ms  ({slow / fast:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""How the report scales: every section at 10k, 1M, 10M and 100M synthetic rows.
+
+Each size is generated once by synthetic.py (cached under --data-dir) and run
+in its own process, so the recorded peak RSS belongs to that run alone.
+Sizes above --stream-above rows use the streaming pipeline instead of the
+in-memory one; --mode duckdb or polars runs the report on that query
+backend instead. Every run is appended to --results as one JSON line tagged
+with the git commit, and --compare prints the change against the latest
+run of another commit.
+
+    python benchmarks/bench_scaling.py [--rows 10000 1000000] [--compare HEAD~1]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import backends, ingest, profiling, sections, streaming  # noqa: E402
+import synthetic  # noqa: E402
+
+SIZES = [10_000, 1_000_000, 10_000_000, 100_000_000]
+STREAM_ABOVE = 10_000_000
+RESULTS = os.path.join(ROOT, "benchmarks", "results.jsonl")
+DATA_DIR = os.path.join(ROOT, "benchmarks", ".data")
+
+
+def git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def dataset(rows, seed, data_dir):
+    path = os.path.join(data_dir, f"synthetic-v{synthetic.VERSION}-{rows}-{seed}.parquet")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        start = time.perf_counter()
+        synthetic.write(rows, path, seed)
+        print(f"generated {rows:,} rows in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+    return path
+
+
+def child(path, mode, trace_memory):
+    """Run the report once over `path` and print the measurements as JSON."""
+    with contextlib.redirect_stdout(io.StringIO()), profiling.profile(memory=trace_memory) as prof:
+        start = time.perf_counter()
+        if mode == "memory":
+            sections.run_all(ingest.load_data(path))
+        elif mode == "stream":
+            streaming.run_stream(path)
+        else:
+            backends.run(path, mode)
+        seconds = time.perf_counter() - start
+    steps = prof.frame().groupby("step", sort=False).agg(
+        depth=("depth", "min"), calls=("step", "size"), seconds=("seconds", "sum"),
+        rows_in=("rows_in", "sum"), peak_memory_mb=("peak_memory_mb", "max"))
+    steps["rows_per_s"] = steps["rows_in"] / steps["seconds"]
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"seconds": seconds, "peak_rss_mb": peak_rss_mb,
+                      "steps": json.loads(steps.reset_index().to_json(orient="records"))}))
+
+
+def run(rows, args):
+    path = dataset(rows, args.seed, args.data_dir)
+    mode = args.mode if args.mode != "auto" else ("stream" if rows > args.stream_above else "memory")
+    command = [sys.executable, os.path.abspath(__file__), "--child", path, "--mode", mode]
+    if args.trace_memory:
+        command.append("--trace-memory")
+    out = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "pandas": pd.__version__,
+                    "cpus": os.cpu_count(), "platform": platform.platform()},
+        "rows": rows, "seed": args.seed, "mode": mode,
+        "rows_per_s": rows / result["seconds"], **result,
+    }
+
+
+def latest(results, commit, rows, mode):
+    if not os.path.exists(results):
+        return None
+    with open(results) as f:
+        runs = [json.loads(line) for line in f if line.strip()]
+    runs = [r for r in runs if r["commit"] == commit and r["rows"] == rows and r["mode"] == mode]
+    return runs[-1] if runs else None
+
+
+def report(record, baseline):
+    change = ""
+    if baseline:
+        change = (f"  vs {baseline['commit']}: {baseline['seconds'] / record['seconds']:.2f}x speed, "
+                  f"{record['peak_rss_mb'] - baseline['peak_rss_mb']:+.0f} MB")
+    print(f"{record['rows']:>12,} {record['mode']:<7}{record['seconds']:>9.2f} s"
+          f"{record['rows_per_s'] / 1e6:>9.2f} Mrows/s{record['peak_rss_mb']:>9.0f} MB{change}")
+    for step in record["steps"]:
+        if step["depth"] == 0:
+            rate = f"{step['rows_per_s'] / 1e6:>9.2f} Mrows/s" if step["rows_per_s"] else ""
+            print(f"    {step['step']:<24}{step['seconds']:>9.3f} s{rate}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=["auto", "memory", "stream", "duckdb", "polars"], default="auto")
+    parser.add_argument("--stream-above", type=int, default=STREAM_ABOVE)
+    parser.add_argument("--trace-memory", action="store_true", help="per-step peak memory (slower)")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--results", default=RESULTS)
+    parser.add_argument("--compare", metavar="REV", help="commit to compare against")
+    parser.add_argument("--child", metavar="PATH", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.mode, args.trace_memory)
+        return
+
+    baseline = git("rev-parse", "--short", args.compare) if args.compare else None
+    for rows in args.rows:
+        record = run(rows, args)
+        previous = baseline and latest(args.results, baseline, rows, record["mode"])
+        with open(args.results, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        report(record, previous)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""End-to-end wall time of the report: serial vs thread pool vs process pool.
+
+    python benchmarks/bench_scheduler.py [--scale 100] [--workers 8] [--timings]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import ingest, scheduler  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--timings", action="store_true", help="print per-node timings")
+    args = parser.parse_args()
+
+    base = ingest.load_data(os.path.join(ROOT, ingest.DATA_PATH))
+    base = pd.concat([base] * args.scale, ignore_index=True)
+    print(f"{len(base):,} rows, {args.workers} workers")
+
+    serial = None
+    for executor in (None, "thread", "process"):
+        df = base.copy()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, _, timings = scheduler.run_all(df, executor=executor, workers=args.workers)
+        elapsed = time.perf_counter() - start
+        serial = serial or elapsed
+        print(f"{executor or 'serial':<10}{elapsed:>8.2f} s  ({serial / elapsed:.1f}x)")
+        if args.timings:
+            for t in sorted(timings, key=lambda t: t["start"]):
+                print(f"    {t['node']:<48}{t['start']:>8.3f}{t['seconds']:>8.3f}  {t['worker']}")
+
+
+if __name__ == "__main__":
+    main()
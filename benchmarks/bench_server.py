@@ -0,0 +1,129 @@
+"""Report server throughput as the number of concurrent viewers grows.
+
+Starts `python -m analysis serve` in a subprocess, then simulates 1 to 200
+viewers, each on its own keep-alive connection, loading the tables of a
+dashboard page as Arrow over and over for `--seconds`. "full" viewers
+download every table each time; "conditional" viewers send back the ETag
+they got, as the thin client does, and get 304s. For comparison, the first
+line is what one page view costs when every session recomputes sections 1-8.
+
+The load generator shares the machine with the server, so the numbers are a
+lower bound on what the server does alone.
+
+    python benchmarks/bench_server.py [--seconds 5] [--viewers 1 10 50 100 200]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import ingest, sections, server  # noqa: E402
+
+PAGE = ["Sales_by_region", "Categories_preferences", "common_PM", "payment_method", "behavior_analysis"]
+
+
+async def get(reader, writer, target, etag=None):
+    """One GET on an open connection; (status, ETag)."""
+    headers = f"Accept: {server.ARROW}\r\n" + (f"If-None-Match: {etag}\r\n" if etag else "")
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length, tag = 0, None
+    while (line := await reader.readline()) != b"\r\n":
+        key, _, value = line.decode("latin-1").partition(":")
+        if key.lower() == "content-length":
+            length = int(value)
+        elif key.lower() == "etag":
+            tag = value.strip()
+    await reader.readexactly(length)
+    return status, tag
+
+
+async def viewer(port, deadline, conditional, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    etags = {}
+    try:
+        while time.perf_counter() < deadline:
+            for name in PAGE:
+                start = time.perf_counter()
+                status, tag = await get(reader, writer, f"/tables/{name}", etags.get(name))
+                latencies.append(time.perf_counter() - start)
+                if status not in (200, 304):
+                    raise RuntimeError(f"/tables/{name}: {status}")
+                if conditional:
+                    etags[name] = tag
+    finally:
+        writer.close()
+
+
+async def load(port, viewers, seconds, conditional):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(viewer(port, start + seconds, conditional, latencies) for _ in range(viewers)))
+    return latencies, time.perf_counter() - start
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_ready(port, timeout=600):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+            continue
+        await get(reader, writer, "/tables")
+        writer.close()
+        return
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--viewers", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        sections.run_all(ingest.load_data(ingest.DATA_PATH))
+    recompute = time.perf_counter() - start
+    print(f"recompute per session: {recompute * 1000:.0f} ms per page view, {1 / recompute:.1f} views/s\n")
+
+    port = free_port()
+    process = subprocess.Popen([sys.executable, "-m", "analysis", "serve", "--port", str(port), "--interval", "3600"],
+                               cwd=ROOT, stderr=subprocess.DEVNULL)
+    try:
+        asyncio.run(wait_ready(port))
+        print(f"{'viewers':>8}{'mode':>13}{'req/s':>10}{'views/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+        for viewers in args.viewers:
+            for conditional in (False, True):
+                latencies, elapsed = asyncio.run(load(port, viewers, args.seconds, conditional))
+                latencies.sort()
+                p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+                print(f"{viewers:>8}{'conditional' if conditional else 'full':>13}"
+                      f"{len(latencies) / elapsed:>10.0f}{len(latencies) / len(PAGE) / elapsed:>10.0f}"
+                      f"{statistics.median(latencies) * 1000:>9.2f}{p99 * 1000:>9.2f}")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Startup cost of the batch CLI and the dashboard, each in a fresh interpreter.
+
+Imports: wall time of `python -c "import <module>"` over a bare interpreter,
+for the CLI entry point and the modules the two sides pull in. CLI: `--help`
+and a full `run --quiet`. Dashboard: the first script run of a new process,
+with the precomputed report tables present, and with them moved away so the
+dashboard has to compute them in memory (what every cold start used to cost).
+The default page draws no PNG chart, so matplotlib is not imported on it.
+
+    python benchmarks/bench_startup.py [--repeat 3]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+IMPORTS = ["analysis.cli", "analysis.sections", "analysis.charts", "pandas", "matplotlib.figure", "streamlit"]
+
+DASHBOARD = f"""
+import time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({os.path.join(ROOT, "data_analysis_project.py")!r}, default_timeout=600)
+start = time.perf_counter()
+at.run()
+assert not at.exception, at.exception
+print(time.perf_counter() - start)
+"""
+
+
+def timed(*args):
+    """Wall seconds of the command, and its stdout."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True,
+                            env={**os.environ, "PYTHONPATH": ROOT})
+    if result.returncode != 0:
+        raise RuntimeError(f"{args} failed:\n{result.stderr}")
+    return time.perf_counter() - start, result.stdout
+
+
+def median(repeat, *args):
+    return statistics.median(timed(*args)[0] for _ in range(repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from analysis import artifacts, ingest
+
+    baseline = median(args.repeat, "-c", "pass")
+    print(f"{'import':<28}{'ms':>8}")
+    for module in IMPORTS:
+        print(f"{module:<28}{(median(args.repeat, '-c', f'import {module}') - baseline) * 1000:>8.0f}")
+
+    print(f"\n{'command':<28}{'ms':>8}")
+    print(f"{'python -m analysis --help':<28}{median(args.repeat, '-m', 'analysis', '--help') * 1000:>8.0f}")
+    print(f"{'python -m analysis run':<28}{median(args.repeat, '-m', 'analysis', 'run', '--quiet') * 1000:>8.0f}")
+
+    store = artifacts.tables_path(os.path.join(ROOT, ingest.DATA_PATH))
+    cold = [float(timed("-c", DASHBOARD)[1]) for _ in range(args.repeat)]
+    aside = store + ".aside"
+    # without the stored tables the dashboard computes them in memory and writes nothing
+    runs = []
+    for _ in range(args.repeat):
+        os.replace(store, aside)
+        try:
+            runs.append(float(timed("-c", DASHBOARD)[1]))
+        finally:
+            os.replace(aside, store)
+    print(f"\n{'dashboard first run':<28}{'ms':>8}")
+    print(f"{'precomputed tables':<28}{statistics.median(cold) * 1000:>8.0f}")
+    print(f"{'no stored tables':<28}{statistics.median(runs) * 1000:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Peak RSS of the in-memory pipeline vs streaming mode under a memory budget.
+
+Each mode runs in its own subprocess over the source CSV tiled `--scale`
+times, and reports its own peak RSS. The streaming run also checks that its
+tables match the in-memory ones.
+
+    python benchmarks/bench_streaming.py [--scale 50] [--memory-limit-mb 64]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_ingest import tile_csv  # noqa: E402
+
+CHILD = """
+import contextlib, io, pickle, resource, sys, time
+sys.path.insert(0, {root!r})
+from analysis import ingest, sections, streaming
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    if {mode!r} == "memory":
+        _, tables = sections.run_all(ingest.load_data({path!r}, snapshot=False))
+    else:
+        tables = streaming.run_stream({path!r}, memory_limit_mb={limit})
+elapsed = time.perf_counter() - start
+with open({out!r}, "wb") as f:
+    pickle.dump({{k: v for k, v in tables.items() if k in {keys!r}}}, f)
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, elapsed)
+"""
+
+COMPARED = ["Top_selling", "Sales_by_region", "Categories_preferences", "payment_method",
+            "behavior_analysis", "high_frequency_buyers", "high_spenders", "sales_trends"]
+
+
+def run(mode, path, limit, out):
+    code = CHILD.format(root=ROOT, mode=mode, path=path, limit=limit, out=out, keys=COMPARED)
+    result = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    peak_mb, elapsed = map(float, result.stdout.split()[-2:])
+    return peak_mb, elapsed
+
+
+def main():
+    import pickle
+
+    import pandas as pd
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=int, default=50)
+    parser.add_argument("--memory-limit-mb", type=int, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "e_commerce_data.csv")
+        tile_csv(os.path.join(ROOT, "data", "e_commerce_data.csv"), path, args.scale)
+        outs = {mode: os.path.join(tmp, f"{mode}.pkl") for mode in ("memory", "stream")}
+        print(f"{args.scale * 10_000:,} rows, streaming budget {args.memory_limit_mb} MB")
+        for mode, out in outs.items():
+            peak, elapsed = run(mode, path, args.memory_limit_mb, out)
+            print(f"{mode:<8}{peak:>10.0f} MB peak RSS{elapsed:>10.1f} s")
+
+        with open(outs["memory"], "rb") as f:
+            expected = pickle.load(f)
+        with open(outs["stream"], "rb") as f:
+            actual = pickle.load(f)
+        for name in COMPARED:
+            pd.testing.assert_frame_equal(actual[name].reset_index(drop=True),
+                                          expected[name].reset_index(drop=True),
+                                          check_dtype=False, check_categorical=False)
+        print("tables match")
+
+
+if __name__ == "__main__":
+    main()
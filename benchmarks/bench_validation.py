@@ -0,0 +1,41 @@
+"""Per-rule cost of the validation stage on synthetic transactions.
+
+    python benchmarks/bench_validation.py [--rows 1000000] [--chunksize 250000]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from analysis import validation  # noqa: E402
+import synthetic  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunksize", type=int, default=250_000)
+    args = parser.parse_args()
+
+    df = synthetic.generate(args.rows)
+    chunks = [df.iloc[start:start + args.chunksize] for start in range(0, len(df), args.chunksize)]
+    validator = validation.Validator()
+    start = time.perf_counter()
+    for chunk in chunks:
+        validator.observe(chunk)
+    observed = time.perf_counter() - start
+    quarantined = 0
+    for chunk in chunks:
+        quarantined += len(validation.quarantine(chunk, validator.check(chunk)))
+    total = time.perf_counter() - start
+
+    print(f"{args.rows:,} rows in {len(chunks)} chunks, {quarantined:,} quarantined")
+    print(validator.report().to_string(index=False))
+    print(f"observe {observed * 1000:.0f} ms, total {total * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
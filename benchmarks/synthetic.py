@@ -0,0 +1,119 @@
+"""Seeded synthetic transactions shaped like data/e_commerce_data.csv.
+
+The distributions are the ones measured on the 10k-row sample: categories,
+payment methods, regions and genders are uniform. Products are uniform
+within their category, except Groceries and Sports, which only sell "Misc",
+so "Misc" ends up with about 2/7 of all rows and tops Top_selling.csv.
+Quantity is 1-10, Unit_Price 5-100, Unit_Cost 50-90% of the price, Age
+18-65, and dates cover the sample's 366 days. The customer base grows with
+the row count, keeping the sample's ~5 transactions per customer.
+
+Transaction_IDs repeat like the sample's: its 10k rows draw their IDs
+uniformly, with replacement, from the 9,000 values 1000-9999, leaving 6,066
+distinct. The ID range here is 0.9 IDs per row from 1000 up, which gives
+about 61% distinct at any row count, so the unique_transaction_id rule
+quarantines as large a share of the rows as it does on the sample.
+
+    python benchmarks/synthetic.py 1000000 out.parquet [--seed 0]
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# bumped whenever the same rows and seed start producing different data, so cached files are regenerated
+VERSION = 2
+
+CATALOG = {
+    "Beauty": ["Foundation", "Lipstick", "Mascara", "Perfume"],
+    "Books": ["Biography", "Cookbook", "Novel", "Textbook"],
+    "Clothing": ["Dress", "Jacket", "Jeans", "T-Shirt"],
+    "Electronics": ["Camera", "Headphones", "Laptop", "Smartphone"],
+    "Groceries": ["Misc"],
+    "Home Decor": ["Candle", "Curtains", "Lamp", "Vase"],
+    "Sports": ["Misc"],
+}
+PAYMENT_METHODS = ["Cash", "Credit Card", "Debit Card", "PayPal"]
+REGIONS = ["Baghdad", "Basra", "Erbil", "Kirkuk", "Mosul", "Najaf"]
+GENDERS = ["Female", "Male"]
+FIRST_DATE, DAYS = np.datetime64("2023-12-28", "ns"), 366
+ROWS_PER_CUSTOMER = 5
+IDS_PER_ROW = 0.9
+FIRST_ID = 1000
+CHUNK_ROWS = 1_000_000
+
+_CATEGORIES = sorted(CATALOG)
+_PRODUCTS = sorted({product for products in CATALOG.values() for product in products})
+# category code -> product codes, padded by repetition so a uniform pick stays uniform per category
+_PRODUCT_TABLE = np.array([[_PRODUCTS.index(p) for p in (CATALOG[c] * 4)[:4]] for c in _CATEGORIES])
+
+
+def _categorical(codes, categories):
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def generate(rows, seed=0, customers=None, start=0, transaction_ids=None):
+    """`rows` transactions as a frame typed like ingest.load_data().
+
+    `start` offsets the random stream, so chunks generated with the same
+    seed and consecutive starts concatenate to one reproducible dataset.
+    `transaction_ids` is the size of the ID range drawn from; chunks of one
+    dataset share it, as they share `customers`.
+    """
+    rng = np.random.default_rng([seed, start])
+    customers = customers or max(2_000, rows // ROWS_PER_CUSTOMER)
+    transaction_ids = transaction_ids or max(1, int(rows * IDS_PER_ROW))
+    category = rng.integers(0, len(_CATEGORIES), rows)
+    product = _PRODUCT_TABLE[category, rng.integers(0, 4, rows)]
+    price = np.round(rng.uniform(5, 100, rows), 2)
+    return pd.DataFrame({
+        "Customer_ID": rng.integers(1, customers + 1, rows).astype(np.int32),
+        "Transaction_ID": rng.integers(FIRST_ID, FIRST_ID + transaction_ids, rows).astype(np.int32),
+        "Transaction_Date": FIRST_DATE + rng.integers(0, DAYS, rows).astype("timedelta64[D]"),
+        "Product_Category": _categorical(category, _CATEGORIES),
+        "Product_Name": _categorical(product, _PRODUCTS),
+        "Quantity": rng.integers(1, 11, rows).astype(np.int16),
+        "Unit_Price": price,
+        "Payment_Method": _categorical(rng.integers(0, len(PAYMENT_METHODS), rows), PAYMENT_METHODS),
+        "Region": _categorical(rng.integers(0, len(REGIONS), rows), REGIONS),
+        "Gender": _categorical(rng.integers(0, len(GENDERS), rows), GENDERS),
+        "Age": rng.integers(18, 66, rows).astype(np.int8),
+        "Unit_Cost": np.round(price * rng.uniform(0.5, 0.9, rows), 3),
+    })
+
+
+def write(rows, path, seed=0, chunk_rows=CHUNK_ROWS):
+    """Write `rows` synthetic transactions to a Parquet file, `chunk_rows` at a time."""
+    customers = max(2_000, rows // ROWS_PER_CUSTOMER)
+    transaction_ids = max(1, int(rows * IDS_PER_ROW))
+    tmp = path + ".tmp"
+    writer = None
+    try:
+        for start in range(0, rows, chunk_rows):
+            chunk = generate(min(chunk_rows, rows - start), seed, customers, start, transaction_ids)
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("rows", type=int)
+    parser.add_argument("path")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write(args.rows, args.path, args.seed)
+    print(f"wrote {args.rows:,} rows to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
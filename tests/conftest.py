@@ -0,0 +1,20 @@
+import os
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE = os.path.join(ROOT, "data", "e_commerce_data.csv")
+
+
+@pytest.fixture
+def sample_csv(tmp_path):
+    """Writes the first `rows` sample rows to a CSV in tmp_path, with `edits` {(row, column): text} applied."""
+    def write(rows=500, edits=None):
+        df = pd.read_csv(SAMPLE, dtype=str, keep_default_na=False, nrows=rows)
+        for (row, column), value in (edits or {}).items():
+            df.loc[row, column] = value
+        path = str(tmp_path / "tx.csv")
+        df.to_csv(path, index=False)
+        return path
+    return write
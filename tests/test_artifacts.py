@@ -0,0 +1,27 @@
+"""Stored report tables switch versions whole."""
+import os
+
+import pandas as pd
+
+from analysis import artifacts
+
+
+def test_save_tables_switches_versions_and_deletes_orphans(tmp_path):
+    directory = str(tmp_path / "tx.report")
+    first = {"regions": pd.DataFrame({"Total_Spent": [1.0, 2.0]}), "dropped": pd.Series([1, 2], name="n"),
+             "count": 2}
+    second = {"regions": pd.DataFrame({"Total_Spent": [3.0]}), "count": 1}
+    artifacts.save_tables(first, directory, "a")
+    old = artifacts._load_manifest(directory)["current"]
+    artifacts.save_tables(second, directory, "b")
+
+    tables = artifacts.load_tables(directory, "b")
+    assert sorted(tables) == ["count", "regions"] and tables["count"] == 1
+    pd.testing.assert_frame_equal(tables["regions"], second["regions"])
+    assert artifacts.load_tables(directory, "a") is None
+    # the previous version stays for readers that loaded its manifest, until the next save
+    assert os.path.exists(os.path.join(directory, old, "dropped.parquet"))
+    artifacts.save_tables(second, directory, "c")
+    current = artifacts._load_manifest(directory)["current"]
+    assert not os.path.exists(os.path.join(directory, old))
+    assert sorted(os.listdir(os.path.join(directory, current))) == ["regions.parquet"]
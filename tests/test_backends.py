@@ -0,0 +1,48 @@
+"""The query backends agree on the sample."""
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import SAMPLE
+
+from analysis import backends
+
+
+def assert_tables_equal(tables, expected_tables):
+    assert sorted(tables) == sorted(expected_tables)
+    # sums are added up in each engine's own order, so floats agree to rounding only
+    for name, expected in expected_tables.items():
+        if isinstance(expected, pd.DataFrame):
+            pd.testing.assert_frame_equal(tables[name], expected, check_exact=False, rtol=1e-12, obj=name)
+        elif isinstance(expected, pd.Series):
+            pd.testing.assert_series_equal(tables[name], expected, check_exact=False, rtol=1e-12, obj=name)
+        elif expected is None:
+            assert tables[name] is None, name
+        else:
+            assert np.isclose(tables[name], expected, rtol=1e-12), name
+
+
+@pytest.fixture(scope="module")
+def pandas_tables():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return backends.run(SAMPLE, "pandas")
+
+
+@pytest.mark.parametrize("backend", ["duckdb", "polars"])
+def test_backend_tables_equal_pandas(pandas_tables, backend):
+    pytest.importorskip(backend)
+    with contextlib.redirect_stdout(io.StringIO()):
+        tables = backends.run(SAMPLE, backend)
+    assert_tables_equal(tables, pandas_tables)
+
+
+@pytest.mark.parametrize("backend", ["duckdb", "polars"])
+def test_backend_drops_undated_rows_like_pandas(sample_csv, backend):
+    pytest.importorskip(backend)
+    path = sample_csv(edits={(3, "Transaction_Date"): "", (7, "Transaction_Date"): "not-a-date"})
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = backends.run(path, "pandas")
+        tables = backends.run(path, backend)
+    assert_tables_equal(tables, expected)
@@ -0,0 +1,35 @@
+"""Basket co-occurrence counts and the section 7 cross-sell table."""
+import pandas as pd
+
+from analysis import basket, ingest, recommend
+from conftest import SAMPLE
+
+
+def test_update_matches_a_rebuild():
+    df = ingest.load_data(SAMPLE)
+    whole = basket.CoOccurrence.from_frame(df)
+    chunked = basket.CoOccurrence.empty()
+    # the first chunks miss some products, so update() has to grow the product list
+    names = df["Product_Name"].astype(str)
+    for part in (df[names < "L"].iloc[:3000], df[names >= "L"], df[names < "L"].iloc[3000:]):
+        chunked.update(part)
+    assert chunked.products == whole.products
+    assert (chunked.customers == whole.customers).all()
+    assert (chunked.pairs == whole.pairs).all() and chunked.baskets == whole.baskets
+    pd.testing.assert_frame_equal(chunked.rules(), whole.rules())
+
+
+def test_weak_rules_keep_the_curated_cross_sells():
+    baskets = basket.CoOccurrence.from_frame(ingest.load_data(SAMPLE))
+    assert baskets.rules()["lift"].max() < basket.MIN_LIFT
+    assert recommend.cross_sell_with(baskets.cross_sell_table()) == recommend.cross_sell_suggestions
+
+
+def test_strong_rule_replaces_the_curated_cross_sell():
+    customers = range(200)
+    rows = [(c, "Camera") for c in customers[:100]] + [(c, "Lamp") for c in customers[:100]]
+    rows += [(c, "Novel") for c in customers[100:]]
+    df = pd.DataFrame(rows, columns=["Customer_ID", "Product_Name"])
+    table = recommend.cross_sell_with(basket.CoOccurrence.from_frame(df).cross_sell_table())
+    assert table["Camera"] == "Lamp" and table["Lamp"] == "Camera"
+    assert table["Novel"] == recommend.cross_sell_suggestions["Novel"]
@@ -0,0 +1,63 @@
+"""The aggregate cube against direct groupbys over the transactions."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import cube, ingest, sections
+from conftest import SAMPLE
+
+FILTERS = {"Region": ["Baghdad", "Erbil"], "Gender": ["Female"],
+           "Transaction_Date": ("2024-03-01", "2024-08-31")}
+
+
+def enriched(path):
+    df = ingest.load_data(path, snapshot=False)
+    sections.drop_undated(df)
+    return sections.enrich(df)
+
+
+def assert_rollup_equal(rolled, expected):
+    for name, (keys, measures) in sections.AGGREGATES.items():
+        if "Customer_ID" in keys:
+            continue
+        columns = [out for out, (_, func) in measures.items() if func != "median"]
+        got = rolled[name].sort_values(keys).reset_index(drop=True)
+        want = expected[name].sort_values(keys).reset_index(drop=True)
+        assert got[keys].astype(str).equals(want[keys].astype(str)), name
+        np.testing.assert_allclose(got[columns].to_numpy(dtype=float), want[columns].to_numpy(dtype=float),
+                                   rtol=1e-9, err_msg=name)
+
+
+def groupby(df):
+    tables = {}
+    for name, (keys, measures) in sections.AGGREGATES.items():
+        if "Customer_ID" not in keys:
+            tables[name] = (df.groupby(keys, observed=True)
+                            .agg(**{out: (column, func) for out, (column, func) in measures.items()})
+                            .reset_index())
+    return tables
+
+
+@pytest.fixture(scope="module")
+def sample():
+    return enriched(SAMPLE)
+
+
+def test_rollup_under_filters_equals_a_groupby(sample):
+    olap = cube.build(sample)
+    start, end = (pd.Timestamp(bound) for bound in FILTERS["Transaction_Date"])
+    mask = (sample["Region"].isin(FILTERS["Region"]) & sample["Gender"].isin(FILTERS["Gender"])
+            & sample["Transaction_Date"].between(start, end))
+    assert 0 < mask.sum() < len(sample)
+    assert_rollup_equal(cube.rollup(olap, FILTERS), groupby(sample[mask]))
+    assert_rollup_equal(cube.rollup(olap), groupby(sample))
+
+
+def test_merged_cube_equals_a_whole_build(sample):
+    bounds = sample["Total_Spent"].quantile([0.25, 0.75]).tolist()
+    halves = [sections.enrich(part.copy(), bounds) for part in (sample[:4000], sample[4000:])]
+    merged = cube.merge(cube.build(halves[0]), cube.build(halves[1]))
+    whole = cube.build(sample)
+    for name, table in whole.tables.items():
+        assert len(merged.tables[name]) == len(table), name
+    assert_rollup_equal(cube.rollup(merged, FILTERS), cube.rollup(whole, FILTERS))
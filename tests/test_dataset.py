@@ -0,0 +1,41 @@
+"""Writing the partitioned dataset month by month."""
+import os
+
+import pandas as pd
+
+from analysis import dataset, ingest
+
+
+def files_by_month(directory):
+    return {os.path.dirname(entry["path"]): entry["path"] for entry in dataset.load_manifest(directory)["files"]}
+
+
+def test_write_only_touches_changed_and_new_months(sample_csv, tmp_path):
+    df = ingest.read_csv(sample_csv())
+    directory = str(tmp_path / "tx.dataset")
+    months = df["Transaction_Date"].dt.to_period("M")
+    last = months.max()
+    dataset.write(df[months < last], directory)
+    before = files_by_month(directory)
+
+    assert dataset.write(df[months < last], directory) == []
+    assert files_by_month(directory) == before
+
+    # one changed month and the new last one
+    changed = df.copy()
+    first = changed.index[months == months.min()][0]
+    changed.loc[first, "Quantity"] += 1
+    written = dataset.write(changed, directory)
+    after = files_by_month(directory)
+    assert sorted(os.path.dirname(entry["path"]) for entry in written) == sorted(
+        dataset.partition(period.year, period.month) for period in (months.min(), last))
+    assert {month: path for month, path in after.items() if path in before.values()} == {
+        month: path for month, path in before.items() if month != dataset.partition(months.min().year,
+                                                                                     months.min().month)}
+    assert all(os.path.exists(os.path.join(directory, path)) for path in after.values())
+    assert sum(len(files) for _, _, files in os.walk(directory)) == len(after) + 1
+
+    # files are read in path order, so months come back in date order and rows in source order within them
+    loaded = dataset.load(directory)
+    expected = changed.iloc[months.argsort(kind="stable")].reset_index(drop=True)[list(loaded.columns)]
+    pd.testing.assert_frame_equal(loaded, expected, check_dtype=False, check_categorical=False)
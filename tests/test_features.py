@@ -0,0 +1,73 @@
+"""The customer feature store against the frame it was built from."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import features, ingest, sections
+from conftest import SAMPLE
+
+
+def enriched(path):
+    df = ingest.load_data(path, snapshot=False)
+    sections.drop_undated(df)
+    return sections.enrich(df)
+
+
+@pytest.fixture(scope="module")
+def sample():
+    df = enriched(SAMPLE)
+    return df, features.build(df)
+
+
+def test_save_and_load_round_trip(sample, tmp_path):
+    _, store = sample
+    store.save(str(tmp_path), "v1")
+    loaded = features.FeatureStore.load(str(tmp_path), "v1")
+    assert sorted(loaded.arrays) == sorted(store.arrays)
+    for name, values in store.arrays.items():
+        np.testing.assert_array_equal(loaded.arrays[name], values, err_msg=name)
+        assert loaded.arrays[name].dtype == values.dtype, name
+    assert loaded.vocab == store.vocab and loaded.meta == store.meta
+    assert features.FeatureStore.load(str(tmp_path), "v2") is None
+
+
+def test_lookup_matches_the_frame(sample):
+    df, store = sample
+    for customer_id in df["Customer_ID"].drop_duplicates().iloc[:50]:
+        rows = df[df["Customer_ID"] == customer_id]
+        latest = rows.sort_values("Transaction_Date", kind="stable").iloc[-1]
+        profile = store.lookup(customer_id)
+        assert profile["transactions"] == len(rows)
+        assert profile["total_spent"] == pytest.approx(rows["Total_Spent"].sum())
+        assert profile["first_purchase"] == rows["Transaction_Date"].min()
+        assert profile["last_purchase"] == rows["Transaction_Date"].max()
+        assert (profile["gender"], profile["age"], profile["region"]) == (latest["Gender"], latest["Age"],
+                                                                          latest["Region"])
+        assert profile["basket"] == rows["Product_Name"].tolist()
+    with pytest.raises(KeyError):
+        store.lookup(-1)
+
+
+def test_baskets_equal_grouped_product(sample):
+    df, store = sample
+    grouped_product = df.groupby("Customer_ID", observed=True)["Product_Name"].apply(list)
+    baskets = store.baskets()
+    assert baskets.index.tolist() == grouped_product.index.tolist()
+    assert baskets.tolist() == grouped_product.tolist()
+
+
+def test_blank_categories_decode_to_none_and_blank_ids_are_dropped(sample_csv):
+    head = pd.read_csv(SAMPLE, nrows=500)
+    customer = head.loc[0, "Customer_ID"]
+    edits = {(row, column): "" for row in head.index[head["Customer_ID"] == customer]
+             for column in ("Gender", "Region")}
+    edits[len(head) - 1, "Customer_ID"] = ""
+    store = features.build(enriched(sample_csv(edits=edits)))
+
+    profile = store.lookup(customer)
+    assert profile["gender"] is None and profile["region"] is None
+    frame = store.frame(["customer_id", "gender", "region"]).set_index("customer_id")
+    assert frame.loc[customer].isna().all()
+    assert frame.drop(customer).notna().all().all()
+    assert store.arrays["customer_id"].dtype == np.int32
+    assert store.arrays["transactions"].sum() == len(head) - 1
@@ -0,0 +1,131 @@
+"""Incremental append mode."""
+import contextlib
+import io
+import json
+import os
+
+import pandas as pd
+
+from analysis import cli, cube, incremental, ingest, sections, streaming
+from conftest import SAMPLE
+
+
+def refresh(path, state_dir):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return incremental.refresh(path, state_dir)
+
+
+def transactions(tables):
+    return int(tables["Number_of_trans"]["Number_of_Transaction"].sum())
+
+
+def sample_lines(start, stop):
+    with open(SAMPLE) as f:
+        return f.readlines()[1 + start:1 + stop]
+
+
+def test_refresh_matches_a_full_recompute(sample_csv, tmp_path):
+    path, state_dir = sample_csv(rows=4000), str(tmp_path / "state")
+    refresh(path, state_dir)
+    with open(path, "a") as f:
+        f.writelines(sample_lines(4000, 6000))
+    tables = refresh(path, state_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        full = streaming.run_stream(path, chunksize=1000)
+    for name in ("Number_of_trans", "Sales_by_region", "common_PM", "behavior_analysis"):
+        pd.testing.assert_frame_equal(tables[name], full[name], check_dtype=False)
+
+
+def test_refresh_merges_the_appended_rows_into_the_cube(sample_csv, tmp_path):
+    path, state_dir = sample_csv(rows=4000), str(tmp_path / "state")
+    cli.refresh(path, state_dir, quiet=True)
+    with open(path, "a") as f:
+        f.writelines(sample_lines(4000, 6000))
+    cli.refresh(path, state_dir, quiet=True)
+    olap = cube.load(cube.cube_path(path), ingest.source_fingerprint(path))
+    df = ingest.load_data(path, snapshot=False)
+    sections.drop_undated(df)
+    whole = cube.build(sections.enrich(df, incremental.load_manifest(state_dir)["spending_bounds"]))
+    for name, table in whole.tables.items():
+        pd.testing.assert_frame_equal(olap.tables[name].astype(table.dtypes), table, obj=name)
+
+
+def test_rows_appended_during_a_refresh_wait_for_the_next(sample_csv, tmp_path, monkeypatch):
+    path, state_dir = sample_csv(rows=5000), str(tmp_path / "state")
+    read_from = incremental.read_from
+
+    def append_after_first_pass(*args, **kwargs):
+        chunks = read_from(*args, **kwargs)
+        if not os.path.exists(path + ".appended"):
+            open(path + ".appended", "w").close()
+            with open(path, "a") as f:
+                f.writelines(sample_lines(5000, 6000))
+        return chunks
+
+    monkeypatch.setattr(incremental, "read_from", append_after_first_pass)
+    assert transactions(refresh(path, state_dir)) == 5000
+    monkeypatch.undo()
+    assert transactions(refresh(path, state_dir)) == 6000
+
+
+def test_half_written_line_is_left_for_the_next_refresh(sample_csv, tmp_path):
+    path, state_dir = sample_csv(rows=1000), str(tmp_path / "state")
+    line = sample_lines(1000, 1001)[0]
+    with open(path, "a") as f:
+        f.write(line[:10])
+    assert transactions(refresh(path, state_dir)) == 1000
+    with open(path, "a") as f:
+        f.write(line[10:])
+    assert transactions(refresh(path, state_dir)) == 1001
+
+
+def test_fresh_state_does_not_reuse_a_version_directory(sample_csv, tmp_path):
+    path, state_dir = sample_csv(rows=1000), str(tmp_path / "state")
+    refresh(path, state_dir)
+    manifest_path = os.path.join(state_dir, "manifest.json")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    # an outdated state forces a rebuild, which must switch to a new directory
+    manifest["state_version"] = 0
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+    refresh(path, state_dir)
+    current = incremental.load_manifest(state_dir)["current"]
+    assert current != manifest["current"]
+    assert sorted(os.listdir(state_dir)) == ["manifest.json", current]
+
+
+def test_late_rows_are_counted(sample_csv, tmp_path):
+    path, state_dir = sample_csv(rows=1000), str(tmp_path / "state")
+    refresh(path, state_dir)
+    late = sample_lines(1000, 1001)[0].split(",")
+    late[2] = "2000-01-01"
+    with open(path, "a") as f:
+        f.write(",".join(late))
+    refresh(path, state_dir)
+    assert incremental.load_manifest(state_dir)["last_refresh"]["late_rows"] == 1
+
+
+def test_cli_incremental_run_stores_the_report(sample_csv, tmp_path):
+    path, state_dir = sample_csv(rows=1000), str(tmp_path / "state")
+    assert cli.main(["run", "--incremental", "--path", path, "--state", state_dir, "--quiet"]) == 0
+    assert os.path.isdir(os.path.join(tmp_path, "tx.report"))
+    assert incremental.load_manifest(state_dir)["rows"] == 1000
+
+
+def test_cli_states_the_segment_tradeoff(sample_csv, tmp_path, capsys):
+    path, state_dir = sample_csv(rows=4000), str(tmp_path / "state")
+    args = ["run", "--incremental", "--path", path, "--state", state_dir, "--quiet"]
+    cli.main(args)
+    with open(path, "a") as f:
+        f.writelines(sample_lines(4000, 4100))
+    cli.main(args)
+    drift = incremental.load_manifest(state_dir)["last_refresh"]["segment_drift"]
+    assert 0 < drift <= incremental.DEFAULT_SEGMENT_TOLERANCE
+    assert f"up to {drift:.2%} of rows sit in a neighbouring segment" in capsys.readouterr().err
+
+    with open(path, "a") as f:
+        f.writelines(sample_lines(4100, 4200))
+    cli.main(args + ["--segment-tolerance", "0"])
+    assert incremental.load_manifest(state_dir)["last_refresh"]["rebuilt_segments"]
+    assert "rebuilt from the whole file" in capsys.readouterr().err
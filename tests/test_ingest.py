@@ -0,0 +1,41 @@
+"""Typed ingestion of the transactions CSV."""
+import contextlib
+import io
+
+import pandas as pd
+
+from analysis import artifacts, cli, dataset, ingest, streaming
+
+
+def test_clean_columns_keep_compact_ints(sample_csv):
+    df = ingest.read_csv(sample_csv())
+    for column, dtype in ingest.SCHEMA.items():
+        assert df[column].dtype == dtype, column
+
+
+def test_blank_integer_cells_are_reported_not_fatal(sample_csv, tmp_path):
+    path = sample_csv(edits={(3, "Quantity"): "", (7, "Age"): ""})
+    df = ingest.read_csv(path)
+    assert df["Quantity"].dtype == "float64" and df["Age"].dtype == "float64"
+    assert df["Customer_ID"].dtype == "int32"
+
+    tables = cli.run(path, out=str(tmp_path), quiet=True)
+    assert tables["missing_values"]["Quantity"] == 1
+    assert tables["missing_values"]["Age"] == 1
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        streamed = streaming.run_stream(path, chunksize=100)
+    assert streamed["Sales_by_region"]["Total_Spent"].sum() > 0
+
+
+def test_dataset_directory_is_a_source(sample_csv, tmp_path):
+    path = sample_csv()
+    from_file = cli.run(path, out=str(tmp_path), quiet=True)
+    directory = dataset.dataset_path(path)
+    fingerprint = ingest.source_fingerprint(directory)
+
+    from_directory = cli.run(directory, out=str(tmp_path), quiet=True)
+    pd.testing.assert_frame_equal(from_directory["Sales_by_region"], from_file["Sales_by_region"])
+    assert ingest.source_fingerprint(directory) == fingerprint
+    assert artifacts.tables_path(directory) != artifacts.tables_path(path)
+    assert artifacts.load_tables(artifacts.tables_path(directory), fingerprint) is not None
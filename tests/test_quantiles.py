@@ -0,0 +1,52 @@
+"""The mergeable quantile backends."""
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import SAMPLE
+
+from analysis import quantiles, sections
+
+PERCENTILES = {"Total_Spent": [0.25, 0.75], "Quantity": [sections.OUTLIER_QUANTILE],
+               "Unit_Price": [sections.OUTLIER_QUANTILE]}
+
+
+@pytest.fixture(scope="module")
+def columns():
+    """The sample's columns tiled 10 times, jittered so the sketch sees distinct values."""
+    df = pd.read_csv(SAMPLE)
+    rng = np.random.default_rng(0)
+    columns = {"Total_Spent": (df["Unit_Price"] * df["Quantity"]).to_numpy(),
+               "Quantity": df["Quantity"].to_numpy(dtype=np.float64),
+               "Unit_Price": df["Unit_Price"].to_numpy()}
+    return {name: np.concatenate([values * rng.uniform(0.95, 1.05, len(values)) for _ in range(10)])
+            for name, values in columns.items()}
+
+
+def merged(backend, values, chunks=20, **options):
+    summary = quantiles.make(backend, **options)
+    for part in np.array_split(values, chunks):
+        summary.merge(quantiles.make(backend, **options).update(part))
+    return summary
+
+
+@pytest.mark.parametrize("name", sorted(PERCENTILES))
+def test_exact_matches_pandas(columns, name):
+    summary = merged("exact", columns[name])
+    for q in PERCENTILES[name]:
+        assert summary.quantile(q) == pytest.approx(pd.Series(columns[name]).quantile(q), rel=1e-12)
+
+
+@pytest.mark.parametrize("name", sorted(PERCENTILES))
+def test_kll_rank_error_within_epsilon(columns, name, epsilon=0.01):
+    ordered = np.sort(columns[name])
+    summary = merged("kll", columns[name], epsilon=epsilon)
+    for q in PERCENTILES[name]:
+        rank = np.searchsorted(ordered, summary.quantile(q), side="right") / len(ordered)
+        assert abs(rank - q) <= epsilon
+
+
+@pytest.mark.parametrize("backend", sorted(quantiles.BACKENDS))
+def test_empty_input_gives_nan(backend):
+    for summary in (quantiles.make(backend), quantiles.make(backend).update([]),
+                    quantiles.make(backend).update([np.nan]), quantiles.make(backend).merge(quantiles.make(backend))):
+        assert np.isnan(summary.quantile(0.5))
@@ -0,0 +1,77 @@
+"""The CLI run on the scheduler's graph, serially and on pools."""
+import contextlib
+import io
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+from analysis import cli, ingest, profiling, scheduler, sections
+
+
+def assert_tables_equal(left, right):
+    assert sorted(left) == sorted(right)
+    for name, table in left.items():
+        if isinstance(table, pd.DataFrame):
+            # the validation table times its rules
+            pd.testing.assert_frame_equal(table.drop(columns="seconds", errors="ignore"),
+                                          right[name].drop(columns="seconds", errors="ignore"), check_exact=False)
+        elif isinstance(table, pd.Series):
+            pd.testing.assert_series_equal(table, right[name], check_exact=False)
+        else:
+            assert table == pytest.approx(right[name]), name
+
+
+@pytest.mark.parametrize("executor", [None, "thread", "process"])
+def test_scheduled_run_matches_sections(sample_csv, executor):
+    path = sample_csv()
+    with contextlib.redirect_stdout(io.StringIO()) as expected_log:
+        _, expected = sections.run_all(ingest.read_csv(path))
+
+    with profiling.profile(memory=False) as prof, contextlib.redirect_stdout(io.StringIO()) as log:
+        _, _, tables = cli.compute(path, snapshot=False, executor=executor, workers=2)
+    assert_tables_equal(tables, expected)
+    assert log.getvalue() == expected_log.getvalue()
+
+    # every node is a step, with the steps profiled inside it, in a worker or not, nested below
+    steps = prof.frame()
+    assert {"customer_behavior", "potential_issues"} <= set(steps.loc[steps["depth"] == 0, "step"])
+    assert {"aggregate", "validate"} <= set(steps.loc[steps["depth"] > 0, "step"])
+
+
+def test_concurrent_runs_share_one_stdout_stand_in(sample_csv):
+    df = sections.enrich(ingest.read_csv(sample_csv()))
+    real_stdout, errors = sys.stdout, []
+
+    def report():
+        try:
+            scheduler.run_all(df.copy(), executor="thread", workers=2)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=report) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert sys.stdout is real_stdout
+
+
+def test_quiet_only_silences_the_calling_thread(sample_csv, capsys):
+    started, printed = threading.Event(), threading.Event()
+
+    def other():
+        started.wait()
+        print("from another thread")
+        printed.set()
+
+    thread = threading.Thread(target=other)
+    thread.start()
+    with scheduler.quiet():
+        cli.compute(sample_csv(), snapshot=False)
+        started.set()
+        printed.wait()
+    thread.join()
+    assert capsys.readouterr().out == "from another thread\n"
@@ -0,0 +1,75 @@
+"""The report server and its thin client."""
+import asyncio
+import os
+import socket
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import cli, client, cube, features, server
+
+
+@pytest.fixture
+def report_server(sample_csv, tmp_path):
+    """A ReportServer for the sample, running on its own event loop in a thread; yields its port."""
+    path = sample_csv()
+    cli.run(path, out=str(tmp_path), quiet=True)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    running = asyncio.run_coroutine_threadsafe(server.ReportServer(path, interval=3600).start("127.0.0.1", 0),
+                                               loop).result()
+    yield path, running.port
+    asyncio.run_coroutine_threadsafe(running.close(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+def test_client_needs_no_local_stores(report_server):
+    path, port = report_server
+    remote = client.ReportClient(f"http://127.0.0.1:{port}")
+    tables, olap, customers = remote.tables(), remote.cube(), remote.features()
+
+    local = cube.load_or_build(path)
+    assert sorted(olap.tables) == sorted(local.tables)
+    pd.testing.assert_frame_equal(cube.report(olap, {"Region": ["Basra"]})["Sales_by_region"],
+                                  cube.report(local, {"Region": ["Basra"]})["Sales_by_region"])
+    store = features.load_or_build(path)
+    customer_id = int(store.arrays["customer_id"][0])
+    assert customers.lookup(customer_id) == store.lookup(customer_id)
+    assert np.array_equal(customers.arrays["basket_codes"], store.arrays["basket_codes"])
+
+    requests = remote.requests
+    assert remote.tables() is tables and remote.cube() is olap and remote.features() is customers
+    assert remote.requests == requests + 3
+
+
+def exchange(sock, request):
+    sock.sendall(request)
+    response = sock.recv(1 << 16)
+    return int(response.split()[1]), response
+
+
+def test_unwanted_request_body_is_discarded(report_server):
+    _, port = report_server
+    with socket.create_connection(("127.0.0.1", port)) as sock:
+        status, response = exchange(sock, b"POST /tables HTTP/1.1\r\nHost: x\r\nContent-Length: 5\r\n\r\nhello")
+        assert status == 405 and b"Connection: keep-alive" in response
+        status, _ = exchange(sock, b"GET /tables HTTP/1.1\r\nHost: x\r\n\r\n")
+        assert status == 200
+
+    with socket.create_connection(("127.0.0.1", port)) as sock:
+        status, response = exchange(sock, b"POST /tables HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\n"
+                                          b"5\r\nhello\r\n0\r\n\r\n")
+        assert status == 405 and b"Connection: close" in response
+        assert sock.recv(1 << 16) == b""
+
+
+def test_build_writes_only_the_served_stores(sample_csv, tmp_path, monkeypatch):
+    path = sample_csv()
+    monkeypatch.chdir(tmp_path)
+    report = server.build(path)
+    assert sorted(os.listdir(tmp_path)) == ["tx.csv", "tx.cube", "tx.features", "tx.report"]
+    assert server.build(path).version == report.version
@@ -0,0 +1,49 @@
+"""Streaming mode stays within its memory budget."""
+import os
+import subprocess
+import sys
+
+import pytest
+from conftest import ROOT
+
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+import synthetic  # noqa: E402
+
+# how far peak RSS may rise over the interpreter with its imports loaded, in MB: one chunk plus the
+# states that grow with the distinct customers, IDs and amounts (see analysis.streaming)
+RSS_BUDGET_MB = float(os.environ.get("ANALYSIS_TEST_RSS_BUDGET_MB", "64"))
+MEMORY_LIMIT_MB = 32
+ROWS = 200_000
+
+# Linux resets the peak (VmHWM) to the current RSS on "5" > clear_refs, so the
+# imports' own transient peak is not counted against the run
+CHILD = """
+import contextlib, io, sys
+from analysis import streaming
+
+def peak_mb():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM:")) / 1024
+
+with open("/proc/self/clear_refs", "w") as f:
+    f.write("5")
+baseline = peak_mb()
+with contextlib.redirect_stdout(io.StringIO()):
+    tables = streaming.run_stream(sys.argv[1], memory_limit_mb=int(sys.argv[2]))
+assert tables["Sales_by_region"]["Total_Spent"].sum() > 0
+print(peak_mb() - baseline)
+"""
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/clear_refs"), reason="needs Linux's resettable peak RSS")
+def test_run_stream_peak_rss_within_budget(tmp_path):
+    # synthetic rows, so customers and Transaction_IDs keep growing with the file as they would in
+    # production; loaded whole, the file would take several times the budget
+    path = tmp_path / "tx.csv"
+    synthetic.generate(ROWS).to_csv(path, index=False)
+
+    result = subprocess.run([sys.executable, "-c", CHILD, str(path), str(MEMORY_LIMIT_MB)], cwd=ROOT,
+                            capture_output=True, text=True, env={**os.environ, "PYTHONPATH": ROOT})
+    assert result.returncode == 0, result.stderr
+    growth = float(result.stdout.split()[-1])
+    assert growth <= RSS_BUDGET_MB, f"peak RSS rose {growth:.0f} MB, budget {RSS_BUDGET_MB:.0f} MB"
@@ -0,0 +1,35 @@
+"""Validation rules and the quarantine."""
+import contextlib
+import io
+
+import pandas as pd
+
+from analysis import cli, ingest, streaming, validation
+from conftest import SAMPLE
+
+
+def test_unparseable_dates_are_quarantined(sample_csv, tmp_path):
+    path = sample_csv(edits={(5, "Transaction_Date"): "", (9, "Transaction_Date"): "not-a-date"})
+
+    tables = cli.run(path, out=str(tmp_path), quiet=True)
+    quarantined = tables["quarantine"]
+    assert {5, 9} <= set(quarantined.index)
+    assert quarantined.loc[[5, 9], "failed_rules"].str.contains("valid_date").all()
+    assert tables["missing_values"]["Transaction_Date"] == 2
+    assert tables["sales_trends"]["Year"].dtype.kind == "i"
+    assert tables["Number_of_trans"]["Number_of_Transaction"].sum() == 500 - 2
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        streamed = streaming.run_stream(path, chunksize=100)
+    pd.testing.assert_frame_equal(streamed["Sales_by_region"], tables["Sales_by_region"])
+    written = pd.read_csv(validation.quarantine_path(path), index_col=0)
+    assert {5, 9} <= set(written.index)
+
+
+def test_unique_across_chunks_matches_whole_frame():
+    df = ingest.load_data(SAMPLE)
+    whole = validation.Validator({"unique": ("unique", {"column": "Transaction_ID"})}).check(df)
+    chunked = validation.Validator({"unique": ("unique", {"column": "Transaction_ID"})})
+    parts = [chunked.check(df.iloc[start:start + 777]) for start in range(0, len(df), 777)]
+    pd.testing.assert_frame_equal(pd.concat(parts), whole)
+    assert chunked.failed["unique"] == df["Transaction_ID"].duplicated().sum()